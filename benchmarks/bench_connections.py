@@ -0,0 +1,77 @@
+# Benchmark: per-operation latency of rapsdb with a fresh connection per call
+# (the old behaviour) versus the shared connection manager.
+#
+#   python benchmarks/bench_connections.py [iterations]
+import os
+import sys
+import sqlite3
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import rapsdb
+
+# Old style: connect, execute, commit and close on every call
+def connect_per_call(path, sql, params=(), fetch=False):
+    conn = sqlite3.connect(path)
+    cursor = conn.cursor()
+    cursor.execute(sql, params)
+    rows = cursor.fetchall() if fetch else None
+    conn.commit()
+    conn.close()
+    return rows
+
+def timed(label, fn, iterations):
+    start = time.perf_counter()
+    for i in range(iterations):
+        fn(i)
+    elapsed = time.perf_counter() - start
+    per_op = elapsed / iterations * 1e6
+    print(f"  {label:<22} {per_op:10.1f} us/op")
+    return per_op
+
+def run_old(path, iterations):
+    print("connect per call:")
+    rapsdb.configure(path)
+    rapsdb.migrate()
+    rapsdb.close_connections()
+    insert = 'INSERT INTO roster (name, position, age, height_in, weight_lb, salary_cents) VALUES (?, ?, ?, ?, ?, ?)'
+    results = {}
+    results['add_player'] = timed('add_player', lambda i: connect_per_call(
+        path, insert, (f'Player {i}', 'G', 25, 77, 200, 100000000)), iterations)
+    results['get_player_by_id'] = timed('get_player_by_id', lambda i: connect_per_call(
+        path, 'SELECT * FROM roster WHERE id = ?', (i + 1,), fetch=True), iterations)
+    results['add_game'] = timed('add_game', lambda i: connect_per_call(
+        path, 'INSERT INTO schedule (team, season, game_date, game_time, time_zone, opponent, location) '
+              'VALUES (?, ?, ?, ?, ?, ?, ?)',
+        ('Toronto Raptors', '2024-25', f'2024-10-{i % 28 + 1:02d}', '19:30', 'EST', f'Team {i}', 'Home')), iterations)
+    results['get_games_by_date'] = timed('get_games_by_date', lambda i: connect_per_call(
+        path, 'SELECT * FROM schedule WHERE game_date = ?', (f'2024-10-{i % 28 + 1:02d}',), fetch=True), iterations)
+    return results
+
+def run_new(path, iterations):
+    print("shared connection manager:")
+    rapsdb.configure(path)
+    rapsdb.migrate()
+    results = {}
+    results['add_player'] = timed('add_player', lambda i: rapsdb.add_player(
+        f'Player {i}', 'G', 25, "6'5", '200 lbs', 1000000.0), iterations)
+    results['get_player_by_id'] = timed('get_player_by_id', lambda i: rapsdb.get_player_by_id(i + 1), iterations)
+    results['add_game'] = timed('add_game', lambda i: rapsdb.add_game(
+        f'2024-10-{i % 28 + 1:02d}', f'Team {i}', 'Home', '7:30 PM EST'), iterations)
+    results['get_games_by_date'] = timed('get_games_by_date', lambda i: rapsdb.get_games_by_date(
+        f'2024-10-{i % 28 + 1:02d}'), iterations)
+    rapsdb.close_connections()
+    return results
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    with tempfile.TemporaryDirectory() as tmp:
+        old = run_old(os.path.join(tmp, 'old.db'), iterations)
+        new = run_new(os.path.join(tmp, 'new.db'), iterations)
+    print("speedup:")
+    for name in old:
+        print(f"  {name:<22} {old[name] / new[name]:10.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+# Benchmark: throughput of the streaming schedule parser on a synthetic file,
+# parse only and parse + chunked import into a fresh database.
+#
+#   python benchmarks/bench_schedule_parser.py [lines]
+import os
+import sys
+import resource
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import rapsdb
+import rapsparse
+
+OPPONENTS = ['Cleveland', 'Philadelphia', 'Minnesota', 'Denver', 'Charlotte', 'Boston',
+             'Miami', 'New York', 'Chicago', 'Detroit']
+TIMES = ['7:30PM EST', '07:30 PM EST ', '8:00PM EST', '1:00 PM ET', 'TBD']
+
+# Every 50th line is bad in one of the ways real files are
+BAD_LINES = ['', '2024-13-45, Boston, Home, 7:30PM EST', 'Boston, Home, 7:30PM EST',
+             '2024-10-23, Boston, Neutral, 7:30PM EST', '2024-10-23, Boston, Home, 25:99']
+
+def write_synthetic_file(path, lines):
+    start = date(1900, 1, 1)
+    with open(path, 'w', encoding='utf-8') as file:
+        for i in range(lines):
+            if i % 50 == 49:
+                file.write(BAD_LINES[i // 50 % len(BAD_LINES)] + '\n')
+                continue
+            game_day = start + timedelta(days=i // len(OPPONENTS))
+            # Mix ISO dates with the slower formats that go through strptime
+            game_date = game_day.isoformat() if i % 3 else game_day.strftime('%m-%d-%Y')
+            location = 'Home' if i % 2 else 'Away'
+            trailing = ',' if i % 7 == 0 else ''
+            file.write(f"{game_date}, {OPPONENTS[i % len(OPPONENTS)]}, {location}, "
+                       f"{TIMES[i % len(TIMES)]}{trailing}\n")
+
+def max_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def report_line(label, lines, elapsed):
+    print(f"  {label:<16} {elapsed:8.2f} s {lines / elapsed:12,.0f} lines/s  max rss {max_rss_mb():7.1f} MB")
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 2000000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'schedule.txt')
+        write_synthetic_file(path, lines)
+        print(f"{lines:,} lines, {os.path.getsize(path) / 1e6:.1f} MB")
+
+        report = rapsparse.ParseReport()
+        start = time.perf_counter()
+        for _ in rapsparse.iter_schedule_file(path, report):
+            pass
+        report_line('parse', lines, time.perf_counter() - start)
+        print(f"  {report.records:,} records, {report.error_count:,} errors")
+
+        rapsdb.configure(os.path.join(tmp, 'bench.db'))
+        rapsdb.migrate()
+        start = time.perf_counter()
+        added, skipped = rapsdb.import_schedule_file(path)
+        report_line('parse + import', lines, time.perf_counter() - start)
+        print(f"  {added:,} added, {skipped:,} skipped")
+        rapsdb.close_connections()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+# Benchmark: latency of the FTS5 search-as-you-type queries on a synthetic
+# database, typed one character at a time like the search box sends them.
+#
+#   python benchmarks/bench_search.py [rows]
+import os
+import sys
+import random
+import tempfile
+import time
+from collections import namedtuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import rapsdb
+
+# Budget per query for the search box to feel instant
+TARGET_MS = 10.0
+
+FIRST_NAMES = ['Scottie', 'RJ', 'Immanuel', 'Jakob', 'Gradey', 'Ochai', 'Chris', 'Bruce', 'Kelly',
+               'Jamal', 'Garrett', 'Davion', 'Ulrich', 'Jonathan', 'Bruno', 'Jared', 'Jamison']
+LAST_NAMES = ['Barnes', 'Barrett', 'Quickley', 'Poeltl', 'Dick', 'Agbaji', 'Boucher', 'Brown',
+              'Olynyk', 'Shead', 'Temple', 'Mitchell', 'Chomche', 'Mogbo', 'Fernando', 'Rhoden', 'Battle']
+OPPONENTS = ['Cleveland', 'Philadelphia', 'Minnesota', 'Denver', 'Charlotte', 'Boston', 'Miami',
+             'New York', 'Chicago', 'Detroit', 'Milwaukee', 'Indiana', 'Orlando', 'Atlanta', 'Washington',
+             'Brooklyn', 'Los Angeles', 'Golden State', 'Phoenix', 'Sacramento', 'Portland', 'Utah',
+             'Oklahoma City', 'Dallas', 'Houston', 'San Antonio', 'Memphis', 'New Orleans']
+QUERIES = ['Scottie Barnes', 'ja po', 'Gradey', 'b', 'Chris Bou', 'Jonathan Mog']
+GAME_QUERIES = ['Phil', 'New Y', 'Golden', 'sa', 'Oklahoma']
+
+SyntheticGame = namedtuple('SyntheticGame', ['game_date', 'opponent', 'location', 'game_time', 'time_zone', 'team'])
+
+def build_database(path, rows):
+    rapsdb.configure(path)
+    rapsdb.migrate()
+    rng = random.Random(7)
+    rapsdb.import_players(
+        (None, f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}', rng.choice(['PG', 'SG', 'SF', 'PF', 'C']),
+         20 + i % 18, 72 + i % 14, 180 + i % 80, i * 1000, None)
+        for i in range(rows)
+    )
+    rapsdb.import_schedule_records(
+        SyntheticGame(f'{1950 + i // 2000}-{i % 12 + 1:02d}-{i % 28 + 1:02d}', OPPONENTS[i % len(OPPONENTS)],
+                      'Home' if i % 2 else 'Away', f'{18 + i % 4}:{i % 60:02d}', 'EST', f'Team {i % 30}')
+        for i in range(rows)
+    )
+
+def time_typing(search, queries):
+    timings = []
+    for query in queries:
+        for end in range(1, len(query) + 1):
+            start = time.perf_counter()
+            search(query[:end])
+            timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return sum(timings) / len(timings), timings[int(len(timings) * 0.99)], timings[-1]
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        build_database(os.path.join(tmp, 'search.db'), rows)
+        print(f"{rows:,} players and {rows:,} games loaded in {time.perf_counter() - start:.1f} s")
+
+        print(f"  {'query':<22} {'mean ms':>8} {'p99 ms':>8} {'max ms':>8}")
+        for label, search, queries in [
+            ('search_players', lambda text: rapsdb.search_players(text), QUERIES),
+            ('search_games', lambda text: rapsdb.search_games(text), GAME_QUERIES),
+            ('query_players search', lambda text: rapsdb.query_players(search=text, limit=100), QUERIES)
+        ]:
+            mean, p99, worst = time_typing(search, queries)
+            verdict = 'ok' if p99 <= TARGET_MS else f'over {TARGET_MS:.0f} ms target'
+            print(f"  {label:<22} {mean:8.2f} {p99:8.2f} {worst:8.2f}  {verdict}")
+        rapsdb.close_connections()
+
+if __name__ == '__main__':
+    main()
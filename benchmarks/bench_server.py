@@ -0,0 +1,117 @@
+# Load test: requests per second and latency of rapsserver with concurrent
+# keep-alive clients, for full responses and for If-None-Match revalidation.
+# The server runs in its own process against a synthetic database.
+#
+#   python benchmarks/bench_server.py [clients] [seconds]
+import os
+import sys
+import time
+import socket
+import asyncio
+import tempfile
+import subprocess
+from collections import namedtuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import rapsdb
+
+PLAYERS = 2000
+GAMES = 5000
+
+SCENARIOS = [
+    ('roster page', '/roster?order_by=salary_cents&desc=1&limit=50'),
+    ('roster filter', '/roster?position=G&min_age=25&limit=50'),
+    ('player', '/roster/17'),
+    ('schedule month', '/schedule?start=2024-11-01&end=2024-11-30'),
+]
+
+SyntheticGame = namedtuple('SyntheticGame', ['game_date', 'opponent', 'location', 'game_time', 'time_zone', 'team'])
+
+def build_database(path):
+    rapsdb.configure(path)
+    rapsdb.migrate()
+    positions = ['PG', 'SG', 'SF', 'PF', 'C', 'G', 'F']
+    rapsdb.import_players(
+        (None, f'Player {i}', positions[i % len(positions)], 19 + i % 18, 72 + i % 14, 180 + i % 80,
+         (i * 7919 % 4000000) * 100 + 100000, None)
+        for i in range(PLAYERS)
+    )
+    teams = [f'Team {i}' for i in range(30)]
+    rapsdb.import_schedule_records(
+        SyntheticGame(f'{2020 + i // 1500}-{11 if i % 2 else 12}-{i % 28 + 1:02d}', teams[i % 30],
+                      'Home' if i % 3 else 'Away', f'{18 + i % 4}:30', 'EST', teams[(i * 7) % 30])
+        for i in range(GAMES)
+    )
+    rapsdb.close_connections()
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+async def request(reader, writer, path, etag=None):
+    lines = [f'GET {path} HTTP/1.1', 'Host: localhost']
+    if etag:
+        lines.append(f'If-None-Match: {etag}')
+    writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode())
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode().partition(':')
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get('content-length') or 0)
+    if length:
+        await reader.readexactly(length)
+    return status, headers.get('etag')
+
+async def client(port, path, deadline, conditional, latencies):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    _, etag = await request(reader, writer, path)
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        status, _ = await request(reader, writer, path, etag if conditional else None)
+        latencies.append(time.perf_counter() - start)
+        assert status == (304 if conditional else 200), status
+    writer.close()
+
+async def run_scenario(port, path, clients, seconds, conditional):
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    start = time.perf_counter()
+    await asyncio.gather(*(client(port, path, deadline, conditional, latencies) for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return (len(latencies) / elapsed, latencies[len(latencies) // 2] * 1000,
+            latencies[int(len(latencies) * 0.99)] * 1000)
+
+def main():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 3.0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        build_database(path)
+        port = free_port()
+        server = subprocess.Popen([sys.executable, '-m', 'raptors', '--db', path, 'serve', '--port', str(port)],
+                                  cwd=ROOT, stdout=subprocess.PIPE, text=True)
+        try:
+            server.stdout.readline()  # "Serving ..." once it is listening
+            print(f"{clients} clients, {seconds:.0f} s per scenario, {PLAYERS} players, {GAMES} games")
+            print(f"  {'scenario':<28} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+            for label, target in SCENARIOS:
+                for conditional in (False, True):
+                    rate, p50, p99 = asyncio.run(run_scenario(port, target, clients, seconds, conditional))
+                    name = f"{label}{' (304)' if conditional else ''}"
+                    print(f"  {name:<28} {rate:9.0f} {p50:8.2f} {p99:8.2f}")
+        finally:
+            server.terminate()
+            server.wait()
+
+if __name__ == '__main__':
+    main()
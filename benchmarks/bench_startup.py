@@ -0,0 +1,74 @@
+# Benchmark: app startup time.
+#
+# Runs rapsapp with RAPTORS_STARTUP_BENCH set so it exits as soon as the home
+# page is drawn, and reports the time to that first frame as the app measures
+# it (its `first_frame` line, timed from the top of rapsapp.py), the whole
+# process's wall-clock time, and the slowest imports from `python -X
+# importtime`. Needs a display.
+#
+#   python benchmarks/bench_startup.py [runs]
+import os
+import sys
+import subprocess
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Time-to-first-frame budget in seconds
+FIRST_FRAME_TARGET = 0.5
+
+def run_once():
+    env = dict(os.environ, RAPTORS_STARTUP_BENCH='1')
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', 'rapsapp.py'], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    elapsed = time.perf_counter() - start
+
+    first_frame = None
+    for line in result.stdout.splitlines():
+        if line.startswith('first_frame '):
+            first_frame = float(line.split()[1])
+    if first_frame is None:
+        raise RuntimeError("rapsapp did not report its first frame")
+
+    imports = []
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package", nested
+        # packages indented by two more spaces per level
+        if line.startswith('import time:') and '|' in line and 'cumulative' not in line:
+            _, cumulative, name = line.split('|')
+            imports.append((int(cumulative), name[1:].rstrip()))
+    return first_frame, elapsed, imports
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    timings = []
+    wall_times = []
+    for _ in range(runs):
+        first_frame, elapsed, imports = run_once()
+        timings.append(first_frame)
+        wall_times.append(elapsed)
+
+    timings.sort()
+    wall_times.sort()
+    median = timings[len(timings) // 2]
+    print(f"time to first frame: median {median * 1000:.0f} ms, best {timings[0] * 1000:.0f} ms over {runs} runs")
+    print(f"process wall-clock: median {wall_times[len(wall_times) // 2] * 1000:.0f} ms")
+
+    # Top-level imports only, so nested modules aren't counted twice
+    top_level = sorted((item for item in imports if not item[1].startswith(' ')), reverse=True)
+    print("slowest top-level imports (cumulative):")
+    for cumulative, name in top_level[:10]:
+        print(f"  {name:<30} {cumulative / 1000:8.1f} ms")
+
+    heavy = [name.strip() for _, name in imports if name.strip() in ('pandas', 'numpy', 'nba_api')]
+    if heavy:
+        print(f"warning: imported at startup: {', '.join(sorted(set(heavy)))}")
+
+    if median > FIRST_FRAME_TARGET:
+        print(f"FAIL: above the {FIRST_FRAME_TARGET * 1000:.0f} ms target")
+        sys.exit(1)
+    print(f"OK: within the {FIRST_FRAME_TARGET * 1000:.0f} ms target")
+
+if __name__ == '__main__':
+    main()
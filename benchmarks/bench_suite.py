@@ -0,0 +1,380 @@
+# Benchmark suite: builds a synthetic database at the chosen scale and times
+# roster CRUD, bulk imports, roster queries and search, schedule import and
+# range queries, the roster and schedule view models (built fresh and served
+# from their memo), undo,
+# and the stats engine and result sync with the NBA API stubbed out (no
+# network needed). Results are compared with benchmarks/baseline.json; a case
+# slower than the baseline by more than the threshold is a regression and
+# makes the run exit with status 1.
+#
+#   python benchmarks/bench_suite.py [--scale small|medium|large] [--case roster.]
+#   python benchmarks/bench_suite.py --save-baseline       (after a deliberate change)
+#   python benchmarks/bench_suite.py --json results.json --threshold 0.5
+import os
+import sys
+import json
+import random
+import argparse
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+import rapsdb
+import synthetic
+
+BASELINE_PATH = os.path.join(BENCH_DIR, 'baseline.json')
+
+# Allowed slowdown against the baseline before a case counts as a regression
+THRESHOLD = 0.25
+
+# p95 latencies below this are mostly timer noise and only throughput is compared
+MIN_COMPARED_MS = 0.05
+
+# players: roster rows; seasons: league seasons of schedule (30 teams x 82
+# games each); lines: schedule text file; samples: timed calls per latency case;
+# log_players: players in the stubbed league game logs
+SCALES = {
+    'small': dict(players=10000, seasons=5, lines=100000, samples=200, log_players=100),
+    'medium': dict(players=100000, seasons=25, lines=500000, samples=500, log_players=450),
+    'large': dict(players=1000000, seasons=50, lines=2000000, samples=1000, log_players=450)
+}
+
+LAST_SEASON = '2024-25'
+TEAM = rapsdb.DEFAULT_TEAM
+
+CASES = []
+
+# Register a case: `unit` names what one operation is. The function gets the
+# run context and returns (operations, per-operation latencies in seconds or
+# None for throughput-only cases); setup it does before its clock starts is
+# not counted.
+def case(name, unit):
+    def register(func):
+        CASES.append((name, unit, func))
+        return func
+    return register
+
+# Time `call(i)` for each sample, returning latencies
+def sample(call, count):
+    latencies = []
+    for i in range(count):
+        start = time.perf_counter()
+        call(i)
+        latencies.append(time.perf_counter() - start)
+    return count, latencies
+
+class Context:
+    def __init__(self, directory, scale):
+        self.directory = directory
+        self.scale = scale
+        self.rng = random.Random(11)
+        self.player_ids = []
+        self.clock = 0.0
+        self.__dict__.update(scale)
+
+    def random_player_id(self):
+        return self.rng.choice(self.player_ids)
+
+@case('roster.import_players', 'rows')
+def bench_import_players(ctx):
+    start = time.perf_counter()
+    rapsdb.import_players(synthetic.roster_rows(ctx.players))
+    ctx.clock = time.perf_counter() - start
+    ctx.player_ids = [player.id for player in rapsdb.iter_players()]
+    return ctx.players, None
+
+@case('roster.add_player', 'calls')
+def bench_add_player(ctx):
+    added = []
+    result = sample(lambda i: added.append(rapsdb.add_player(f'Bench Player {i}', 'G', 25, "6' 5\"",
+                                                             '210 lbs', '$1,500,000')), ctx.samples)
+    ctx.player_ids.extend(added)
+    return result
+
+@case('roster.update_player', 'calls')
+def bench_update_player(ctx):
+    return sample(lambda i: rapsdb.update_player(ctx.random_player_id(), f'Renamed Player {i}', 'F', 30,
+                                                 "6' 9\"", '240 lbs', '$9,000,000'), ctx.samples)
+
+@case('roster.undo_redo', 'calls')
+def bench_undo_redo(ctx):
+    def step(i):
+        if i % 2:
+            rapsdb.redo_roster_change()
+        else:
+            rapsdb.undo_roster_change()
+    return sample(step, ctx.samples)
+
+@case('roster.delete_player', 'calls')
+def bench_delete_player(ctx):
+    doomed = ctx.player_ids[-ctx.samples:]
+    del ctx.player_ids[-ctx.samples:]
+    return sample(lambda i: rapsdb.delete_player_from_db(doomed[i]), ctx.samples)
+
+@case('roster.get_player_by_id', 'calls')
+def bench_get_player(ctx):
+    return sample(lambda i: rapsdb.get_player_by_id(ctx.random_player_id()), ctx.samples)
+
+@case('roster.page_by_salary', 'pages')
+def bench_roster_page(ctx):
+    # Keyset paging as the roster table scrolls, 100 rows at a time
+    page = []
+    def next_page(i):
+        nonlocal page
+        page = rapsdb.query_players(order_by='salary_cents', descending=True, limit=100,
+                                    after=page[-1] if page and i % 20 else None, season=LAST_SEASON)
+    return sample(next_page, ctx.samples)
+
+@case('roster.filtered_count', 'calls')
+def bench_filtered_count(ctx):
+    positions = synthetic.POSITIONS
+    return sample(lambda i: rapsdb.count_players(position=positions[i % len(positions)], min_age=20 + i % 10,
+                                                 max_salary=20_000_000), ctx.samples)
+
+@case('roster.search_players', 'queries')
+def bench_search_players(ctx):
+    words = ['sc', 'scottie ba', 'ja', 'jakob poe', 'gr di', 'bruce']
+    return sample(lambda i: rapsdb.search_players(words[i % len(words)], 20, LAST_SEASON), ctx.samples)
+
+@case('view.roster_rows', 'rows')
+def bench_roster_rows(ctx):
+    # What the roster table does per page, minus the widgets
+    from rapsviewmodel import roster_row_values
+
+    players = rapsdb.query_players(order_by='name', limit=1000, season=LAST_SEASON)
+    start = time.perf_counter()
+    for _ in range(10):
+        for player in players:
+            roster_row_values(player)
+    ctx.clock = time.perf_counter() - start
+    return 10 * len(players), None
+
+@case('view.roster_page', 'pages')
+def bench_roster_page_model(ctx):
+    # A roster page model built from scratch, as after every roster change
+    import rapsviewmodel
+
+    def page(i):
+        rapsviewmodel.roster_page.cache_clear()
+        rapsviewmodel.roster_page('salary_cents', True, None, (), LAST_SEASON, 100)
+    return sample(page, ctx.samples)
+
+@case('view.roster_page_cached', 'pages')
+def bench_roster_page_model_cached(ctx):
+    # The same page again with nothing changed: a version check
+    import rapsviewmodel
+
+    rapsviewmodel.roster_page('salary_cents', True, None, (), LAST_SEASON, 100)
+    return sample(lambda i: rapsviewmodel.roster_page('salary_cents', True, None, (), LAST_SEASON, 100),
+                  ctx.samples)
+
+@case('schedule.import_records', 'games')
+def bench_import_records(ctx):
+    games = list(synthetic.schedule_records(ctx.seasons, LAST_SEASON))
+    start = time.perf_counter()
+    rapsdb.import_schedule_records(games)
+    ctx.clock = time.perf_counter() - start
+    return len(games), None
+
+@case('schedule.import_text_file', 'lines')
+def bench_import_file(ctx):
+    path = os.path.join(ctx.directory, 'schedule.txt')
+    synthetic.write_schedule_file(path, ctx.lines)
+    start = time.perf_counter()
+    rapsdb.import_schedule_file(path, team='Bench Team')
+    ctx.clock = time.perf_counter() - start
+    return ctx.lines, None
+
+@case('schedule.games_between', 'queries')
+def bench_games_between(ctx):
+    first_year = int(LAST_SEASON[:4]) - ctx.seasons + 1
+    def month(i):
+        year = first_year + i % ctx.seasons
+        rapsdb.get_games_between(f'{year}-11-01', f'{year}-11-30', TEAM)
+    return sample(month, ctx.samples)
+
+@case('view.schedule_months', 'seasons')
+def bench_schedule_months(ctx):
+    # The calendar grouping show_schedule builds its tabs from
+    from rapscalendar import load_schedule_months, load_seasons
+
+    seasons = list(load_seasons(TEAM))
+    return sample(lambda i: load_schedule_months(seasons[i % len(seasons)], TEAM), min(ctx.samples, 100))
+
+@case('view.schedule', 'seasons')
+def bench_schedule_view(ctx):
+    # Whole schedule page models (pickers, month grids) built from scratch
+    import rapsviewmodel
+    from rapscalendar import load_seasons
+
+    seasons = list(load_seasons(TEAM))
+    def build(i):
+        rapsviewmodel.schedule.cache_clear()
+        rapsviewmodel.schedule(seasons[i % len(seasons)], TEAM)
+    return sample(build, min(ctx.samples, 100))
+
+@case('view.schedule_cached', 'seasons')
+def bench_schedule_view_cached(ctx):
+    import rapsviewmodel
+    from rapscalendar import load_seasons
+
+    seasons = list(load_seasons(TEAM))
+    for season in seasons:
+        rapsviewmodel.schedule(season, TEAM)
+    return sample(lambda i: rapsviewmodel.schedule(seasons[i % len(seasons)], TEAM), ctx.samples)
+
+@case('nba.sync_results', 'games')
+def bench_sync_results(ctx):
+    import rapsnba
+
+    games = list(rapsdb.iter_games(LAST_SEASON, TEAM))
+    def fetch(team_id, season, date_from):
+        return synthetic.team_games_frame(game for game in games if not date_from or game.game_date >= date_from)
+
+    rapsdb.clear_sync_state(TEAM)
+    start = time.perf_counter()
+    changes = rapsnba.sync_team_results(TEAM, LAST_SEASON, fetch=fetch)
+    ctx.clock = time.perf_counter() - start
+    return changes['fetched'], None
+
+@case('stats.refresh_season_stats', 'log rows')
+def bench_refresh_stats(ctx):
+    import rapsnba
+    import rapsstats
+
+    # Names resolve from the nba_players table, filled here instead of by nba_api
+    rapsdb.save_nba_players(synthetic.nba_player_rows(ctx.log_players, rapsnba.normalize_name))
+    frame = synthetic.league_game_log_frame(LAST_SEASON, ctx.log_players)
+    roster = rapsdb.get_all_players()[:ctx.log_players]
+
+    start = time.perf_counter()
+    rapsstats.refresh_season_stats([LAST_SEASON], roster, fetch=lambda season: frame)
+    ctx.clock = time.perf_counter() - start
+    return len(frame), None
+
+@case('nba.snapshot_dashboard', 'calls')
+def bench_snapshot_dashboard(ctx):
+    # Player stats served from an offline snapshot instead of stats.nba.com
+    import pandas as pd
+    import rapsbackend
+    import rapsnba
+
+    path = os.path.join(ctx.directory, 'nba.db')
+    conn = rapsbackend.create_snapshot(path)
+    dashboard = pd.DataFrame([{'GP': 70, 'PTS': 1400, 'REB': 420, 'AST': 350, 'FG_PCT': 0.481, 'FG3_PCT': 0.362}])
+    for i in range(ctx.log_players):
+        rapsbackend.save_snapshot_response(conn, rapsbackend.PLAYER_DASHBOARD,
+                                           {'PlayerID': 1000000 + i, 'Season': LAST_SEASON},
+                                           rapsbackend.frames_response(OverallPlayerDashboard=dashboard))
+    conn.commit()
+    conn.close()
+
+    rapsbackend.use(path)
+    try:
+        return sample(lambda i: rapsnba.fetch_season_stats(1000000 + i % ctx.log_players, LAST_SEASON),
+                      ctx.samples)
+    finally:
+        rapsbackend.use(rapsbackend.LIVE)
+
+@case('stats.season_averages', 'log rows')
+def bench_season_averages(ctx):
+    import rapsstats
+
+    logs = rapsstats.load_game_logs(LAST_SEASON)
+    start = time.perf_counter()
+    for _ in range(5):
+        rapsstats.season_averages(logs)
+        rapsstats.split_averages(logs, 'month')
+    ctx.clock = time.perf_counter() - start
+    return 5 * len(logs), None
+
+def summarize(operations, latencies, elapsed):
+    result = {'operations': operations, 'seconds': round(elapsed, 4),
+              'ops_per_sec': round(operations / elapsed, 1) if elapsed else None}
+    if latencies:
+        latencies = sorted(latencies)
+        result['p50_ms'] = round(latencies[len(latencies) // 2] * 1000, 4)
+        result['p95_ms'] = round(latencies[int(len(latencies) * 0.95)] * 1000, 4)
+    return result
+
+def run(scale_name, selected):
+    scale = SCALES[scale_name]
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        rapsdb.configure(os.path.join(directory, 'bench.db'))
+        rapsdb.migrate()
+        ctx = Context(directory, scale)
+        # Cases build on each other's data, so they always run (in order);
+        # --case only chooses which are reported
+        for name, unit, func in CASES:
+            ctx.clock = 0.0
+            operations, latencies = func(ctx)
+            elapsed = sum(latencies) if latencies else ctx.clock
+            results[name] = dict(summarize(operations, latencies, elapsed), unit=unit)
+        rapsdb.close_connections()
+    return {name: result for name, result in results.items() if name.startswith(selected)}
+
+# Slowdown of a case against its baseline, > 0 meaning slower: the worse of
+# throughput and p95 latency
+def slowdown(result, base):
+    ratios = []
+    if result.get('ops_per_sec') and base.get('ops_per_sec'):
+        ratios.append(base['ops_per_sec'] / result['ops_per_sec'] - 1)
+    if result.get('p95_ms') and base.get('p95_ms', 0) >= MIN_COMPARED_MS:
+        ratios.append(result['p95_ms'] / base['p95_ms'] - 1)
+    return max(ratios) if ratios else None
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suite over synthetic data")
+    parser.add_argument('--scale', choices=list(SCALES), default='small')
+    parser.add_argument('--case', default='', help="only report cases whose name starts with this")
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help="store these results as the baseline")
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help="allowed slowdown as a fraction (default: %(default)s)")
+    parser.add_argument('--json', help="also write the results to this file")
+    args = parser.parse_args()
+
+    scale = SCALES[args.scale]
+    print(f"scale {args.scale}: {scale['players']:,} players, {scale['seasons']} seasons "
+          f"({scale['seasons'] * len(synthetic.TEAMS) * synthetic.GAMES_PER_TEAM:,} games), "
+          f"{scale['lines']:,} schedule lines")
+    results = run(args.scale, args.case)
+
+    baselines = load_baseline(args.baseline)
+    baseline = baselines.get(args.scale, {})
+    regressions = []
+    print(f"  {'case':<30} {'ops/s':>12} {'unit':<9} {'p50 ms':>9} {'p95 ms':>9} {'vs baseline':>12}")
+    for name, result in results.items():
+        change = slowdown(result, baseline[name]) if name in baseline else None
+        verdict = '-' if change is None else f'{change:+.0%}'
+        if change is not None and change > args.threshold:
+            regressions.append(name)
+            verdict += ' SLOWER'
+        print(f"  {name:<30} {result['ops_per_sec']:>12,.0f} {result['unit']:<9} "
+              f"{result.get('p50_ms', ''):>9} {result.get('p95_ms', ''):>9} {verdict:>12}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump({'scale': args.scale, 'results': results}, file, indent=2)
+
+    if args.save_baseline:
+        baselines[args.scale] = {**baseline, **results}
+        with open(args.baseline, 'w', encoding='utf-8') as file:
+            json.dump(baselines, file, indent=2, sort_keys=True)
+            file.write('\n')
+        print(f"Baseline for {args.scale} saved to {args.baseline}")
+    elif regressions:
+        print(f"{len(regressions)} regressions over {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,122 @@
+# Deterministic synthetic data for the benchmarks: roster rows, multi-decade
+# league schedules, schedule text files and stand-ins for the NBA API frames,
+# so everything can run offline at any size. The same seed always gives the
+# same data.
+import random
+from collections import namedtuple
+from datetime import date, timedelta
+import rapsdb
+
+FIRST_NAMES = ['Scottie', 'RJ', 'Immanuel', 'Jakob', 'Gradey', 'Ochai', 'Chris', 'Bruce', 'Kelly',
+               'Jamal', 'Garrett', 'Davion', 'Ulrich', 'Jonathan', 'Bruno', 'Jared', 'Jamison', "Ja'Kobe"]
+LAST_NAMES = ['Barnes', 'Barrett', 'Quickley', 'Poeltl', 'Dick', 'Agbaji', 'Boucher', 'Brown',
+              'Olynyk', 'Shead', 'Temple', 'Mitchell', 'Chomche', 'Mogbo', 'Fernando', 'Rhoden', 'Battle']
+POSITIONS = ['PG', 'SG', 'SF', 'PF', 'C', 'G', 'F']
+
+# (full name, abbreviation) for the 30 teams, as the NBA API names them
+TEAMS = [
+    ('Atlanta Hawks', 'ATL'), ('Boston Celtics', 'BOS'), ('Brooklyn Nets', 'BKN'),
+    ('Charlotte Hornets', 'CHA'), ('Chicago Bulls', 'CHI'), ('Cleveland Cavaliers', 'CLE'),
+    ('Dallas Mavericks', 'DAL'), ('Denver Nuggets', 'DEN'), ('Detroit Pistons', 'DET'),
+    ('Golden State Warriors', 'GSW'), ('Houston Rockets', 'HOU'), ('Indiana Pacers', 'IND'),
+    ('LA Clippers', 'LAC'), ('Los Angeles Lakers', 'LAL'), ('Memphis Grizzlies', 'MEM'),
+    ('Miami Heat', 'MIA'), ('Milwaukee Bucks', 'MIL'), ('Minnesota Timberwolves', 'MIN'),
+    ('New Orleans Pelicans', 'NOP'), ('New York Knicks', 'NYK'), ('Oklahoma City Thunder', 'OKC'),
+    ('Orlando Magic', 'ORL'), ('Philadelphia 76ers', 'PHI'), ('Phoenix Suns', 'PHX'),
+    ('Portland Trail Blazers', 'POR'), ('Sacramento Kings', 'SAC'), ('San Antonio Spurs', 'SAS'),
+    ('Toronto Raptors', 'TOR'), ('Utah Jazz', 'UTA'), ('Washington Wizards', 'WAS')
+]
+TIMES = ['7:00PM EST', '7:30PM EST', '8:00PM EST', '10:30PM EST', '1:00PM EST', 'TBD']
+GAMES_PER_TEAM = 82
+
+# Same fields rapsdb.import_schedule_records reads from rapsparse.ScheduleRecord
+SyntheticGame = namedtuple('SyntheticGame', ['game_date', 'opponent', 'location', 'game_time', 'time_zone', 'team'])
+
+def player_name(i):
+    return f'{FIRST_NAMES[i % len(FIRST_NAMES)]} {LAST_NAMES[i * 7 % len(LAST_NAMES)]} {i}'
+
+# Rows for rapsdb.import_players: (id, name, position, age, height_in,
+# weight_lb, salary_cents, nba_id); the NBA ID of player i is 1000000 + i
+def roster_rows(count, seed=1):
+    rng = random.Random(seed)
+    for i in range(count):
+        yield (None, player_name(i), rng.choice(POSITIONS), rng.randint(19, 40), rng.randint(70, 88),
+               rng.randint(170, 290), rng.randint(1_100_000, 55_000_000) * 100, 1000000 + i)
+
+# Rows for rapsdb.save_nba_players so names resolve without nba_api
+def nba_player_rows(count, normalize):
+    return ((normalize(player_name(i)), 1000000 + i, player_name(i)) for i in range(count))
+
+# Every team's regular season for `seasons` seasons ending with `last_season`
+# (e.g. '2024-25'); a round-robin of home and away games from late October
+def schedule_records(seasons, last_season='2024-25', seed=2):
+    rng = random.Random(seed)
+    last_year = int(last_season[:4])
+    for start_year in range(last_year - seasons + 1, last_year + 1):
+        opening = date(start_year, 10, 22)
+        for number, (team, _) in enumerate(TEAMS):
+            for game in range(GAMES_PER_TEAM):
+                opponent = TEAMS[(number + 1 + game % (len(TEAMS) - 1)) % len(TEAMS)][0]
+                day = opening + timedelta(days=game * 2 + (number + game) % 2)
+                game_time, time_zone = rapsdb.parse_game_time(rng.choice(TIMES))
+                yield SyntheticGame(day.isoformat(), opponent, 'Home' if (number + game) % 2 else 'Away',
+                                    game_time, time_zone, team)
+
+# Schedule text file in the upload format, `lines` games long
+def write_schedule_file(path, lines):
+    start = date(1950, 10, 1)
+    with open(path, 'w', encoding='utf-8') as file:
+        for i in range(lines):
+            day = start + timedelta(days=i // len(TEAMS))
+            file.write(f"{day.isoformat()}, {TEAMS[i % len(TEAMS)][0]}, {'Home' if i % 2 else 'Away'}, "
+                       f"{TIMES[i % len(TIMES)]}\n")
+
+# LeagueGameLog-shaped frame: every one of `players` players (NBA IDs from
+# 1000000) in `games` games of the season
+def league_game_log_frame(season, players, games=GAMES_PER_TEAM, seed=3):
+    import pandas as pd
+
+    rng = random.Random(seed)
+    start_year = int(season[:4])
+    rows = []
+    for i in range(players):
+        team = TEAMS[i % len(TEAMS)][1]
+        for game in range(games):
+            opponent = TEAMS[(i + game + 1) % len(TEAMS)][1]
+            fga, fg3a, fta = rng.randint(3, 25), rng.randint(0, 12), rng.randint(0, 10)
+            fgm, fg3m, ftm = rng.randint(0, fga), rng.randint(0, fg3a), rng.randint(0, fta)
+            fg3m = min(fg3m, fgm)
+            oreb, dreb = rng.randint(0, 5), rng.randint(0, 10)
+            rows.append({
+                'PLAYER_ID': 1000000 + i, 'GAME_ID': f'002{start_year % 100:02d}{game:05d}',
+                'GAME_DATE': (date(start_year, 10, 22) + timedelta(days=game * 2)).isoformat(),
+                'TEAM_ABBREVIATION': team,
+                'MATCHUP': f"{team} {'vs.' if game % 2 else '@'} {opponent}",
+                'WL': rng.choice('WL'), 'MIN': rng.randint(8, 42),
+                'FGM': fgm, 'FGA': fga, 'FG3M': fg3m, 'FG3A': fg3a, 'FTM': ftm, 'FTA': fta,
+                'OREB': oreb, 'DREB': dreb, 'REB': oreb + dreb, 'AST': rng.randint(0, 12),
+                'STL': rng.randint(0, 4), 'BLK': rng.randint(0, 4), 'TOV': rng.randint(0, 6),
+                'PF': rng.randint(0, 6), 'PTS': 2 * fgm + fg3m + ftm, 'PLUS_MINUS': rng.randint(-25, 25)
+            })
+    return pd.DataFrame(rows)
+
+# LeagueGameFinder-shaped frame of a team's played games, for
+# rapsnba.sync_team_results(fetch=...)
+def team_games_frame(games, seed=4):
+    import pandas as pd
+
+    rng = random.Random(seed)
+    rows = []
+    for game in games:
+        team_score, opponent_score = rng.randint(85, 140), rng.randint(85, 140)
+        if team_score == opponent_score:
+            team_score += 1
+        abbreviation = dict(TEAMS)[game.opponent]
+        rows.append({
+            'GAME_ID': f'002{game.game_date[2:4]}{rng.randint(0, 99999):05d}',
+            'GAME_DATE': game.game_date,
+            'MATCHUP': f"TOR {'vs.' if game.location == 'Home' else '@'} {abbreviation}",
+            'WL': 'W' if team_score > opponent_score else 'L',
+            'PTS': team_score, 'PLUS_MINUS': team_score - opponent_score
+        })
+    return pd.DataFrame(rows)
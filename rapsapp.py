@@ -1,284 +1,680 @@
+import os
+import time
+import string
+import logging
+STARTUP_T0 = time.perf_counter()
+
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-from datetime import datetime
-from nba_api.stats.static import teams
-from nba_api.stats.endpoints import leaguegamefinder
-from nba_api.stats.static import players, teams
-from nba_api.stats.endpoints import PlayerDashboardByLastNGames
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+import rapsmetrics
+import rapsviewmodel
 from rapsdb import *
-import sqlite3
+from rapsnba import sync_team_results
+from rapsparse import ParseReport
+from rapsio import import_roster, export_roster, import_schedule, export_schedule
+from rapscalendar import WEEKDAYS
+from rapsviewmodel import roster_row_values
+
+# Main window, content frame and worker threads, created by main() so the
+# module can be imported (e.g. by the command-line tools) without a display
+root = None
+main_frame = None
+executor = None
+
+log = logging.getLogger('rapsapp')
 
-# Create the main window first
-root = tk.Tk()
-root.title("Raptors Roster App")
+STATS_POLL_MS = 50
 
-# Get the screen width and height
-screen_width = root.winfo_screenwidth()
-screen_height = root.winfo_screenheight()
+# Refresh rate of the timing overlay shown when RAPTORS_METRICS is set
+METRICS_OVERLAY_MS = 1000
 
-# Set the window size to a fraction of the screen size, for example, 80% of the screen size
-window_width = int(screen_width * 0.8)
-window_height = int(screen_height * 0.8)
+# Bumped whenever the main frame shows a new page (see start_page), and the
+# futures still building views for the current one
+page_request = 0
+page_futures = []
 
-# Set the window size
-root.geometry(f"{window_width}x{window_height}")
+# Seasons shown on the player profile: (season, title) for the season under
+# way on `today` and the one before it
+def profile_seasons(today):
+    year = int(season_for_date(today)[:4])
+    return [(season_for_date(date(start, 10, 1)), f"{start}-{start + 1} Season Stats")
+            for start in (year, year - 1)]
 
-# Initialize the database
-create_database()
-create_schedule_table()  # Ensure the schedule table is created
-ensure_time_column_exists()  # Ensure the time column exists
+PROFILE_SEASONS = profile_seasons(date.today())
 
-# Load schedule from a text file
-def load_schedule_from_file(filename):
+# Season whose averages appear as roster columns
+ROSTER_STATS_SEASON = PROFILE_SEASONS[0][0]
+
+# File types offered by the import and export dialogs
+SCHEDULE_FILETYPES = [("Schedule Files", "*.txt *.csv *.jsonl *.ics"), ("All Files", "*.*")]
+ROSTER_FILETYPES = [("CSV Files", "*.csv"), ("JSON Lines Files", "*.jsonl")]
+
+# Load schedule from a text, CSV, JSON Lines or iCalendar file
+def load_schedule_from_file(filename, team=DEFAULT_TEAM):
     try:
-        # Connect to the database
-        conn = sqlite3.connect('raptors.db')
-        cursor = conn.cursor()
-
-        # Read the file and process each line
-        with open(filename, 'r') as file:
-            new_games_added = 0
-            duplicate_games = 0
-
-            for line in file:
-                # Split the line into components
-                game_date, opponent, location, time = line.strip().split(', ')
-
-                # Check if this exact game already exists in the database
-                cursor.execute('''
-                    SELECT COUNT(*) FROM schedule 
-                    WHERE game_date = ? AND opponent = ? AND location = ? AND time = ?
-                ''', (game_date, opponent, location, time))
-                
-                # If the game doesn't exist, add it
-                if cursor.fetchone()[0] == 0:
-                    add_game(game_date, opponent, location, time)
-                    new_games_added += 1
-                else:
-                    duplicate_games += 1
-
-        # Commit changes and close connection
-        conn.commit()
-        conn.close()
+        # Insert every valid game in one transaction, skipping ones already stored
+        report = ParseReport()
+        new_games_added, duplicate_games = import_schedule(filename, report=report, team=team)
 
         # Show a summary message
         message = f"Schedule upload complete.\n"
         message += f"New games added: {new_games_added}\n"
         message += f"Duplicate games skipped: {duplicate_games}"
+        if report.error_count:
+            message += f"\nLines skipped: {report.error_count}\n\n{report.summary()}"
         
         messagebox.showinfo("Schedule Upload", message)
         
         # Refresh the schedule view
-        show_schedule()
+        show_schedule(team=team)
 
     except Exception as e:
         messagebox.showerror("Error", f"Failed to load schedule: {e}")
 
-# Function to get full Raptors schedule
-def get_full_raptors_schedule():
-    raptors_id = [team for team in teams.get_teams() if team['full_name'] == 'Toronto Raptors'][0]['id']
-    gamefinder = leaguegamefinder.LeagueGameFinder(team_id_nullable=raptors_id, season_nullable="2024-25")
-    games = gamefinder.get_data_frames()[0]
-    
-    schedule = {}
-    for _, game in games.iterrows():
-        date = datetime.strptime(game['GAME_DATE'], '%Y-%m-%d').strftime('%b %d, %Y')
-        opponent = game['MATCHUP'].split()[-1]
-        home_away = 'vs' if game['MATCHUP'].startswith('TOR') else '@'
-        schedule.setdefault(date, []).append(f"{home_away} {opponent}")
-    
-    return schedule
-
-
-from nba_api.stats.static import players
-from nba_api.stats.endpoints import PlayerDashboardByLastNGames
+# Save the shown season's games as CSV, JSON Lines or iCalendar
+def save_schedule_to_file(season=None, team=DEFAULT_TEAM):
+    filename = filedialog.asksaveasfilename(title="Export Schedule", defaultextension=".ics",
+                                            filetypes=[("iCalendar Files", "*.ics"), ("CSV Files", "*.csv"),
+                                                       ("JSON Lines Files", "*.jsonl")])
+    if filename:
+        try:
+            count = export_schedule(filename, season=season, team=team)
+            messagebox.showinfo("Schedule Export", f"Exported {count} games.")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to export schedule: {e}")
 
-def get_player_season_stats(player_name, season):
+# Add or update players from a CSV or JSON Lines file
+def load_roster_from_file():
+    filename = filedialog.askopenfilename(title="Select Roster File", filetypes=ROSTER_FILETYPES)
+    if not filename:
+        return
     try:
-        # Find the NBA player ID based on the name
-        nba_player = [p for p in players.get_players() if p['full_name'].lower() == player_name.lower()]
-        
-        if not nba_player:
-            print(f"No NBA player found for name: {player_name}")
-            return None
-
-        nba_player_id = nba_player[0]['id']
-
-        # Get stats for the specified season
-        player_stats = PlayerDashboardByLastNGames(
-            player_id=nba_player_id, 
-            season=season,
-            last_n_games=82  # Full season
-        )
-        
-        # Extract the overall season averages
-        season_stats = player_stats.get_data_frames()[0]
-        
-        # Calculate per-game averages
-        games_played = season_stats['GP'].iloc[0]
-        
-        return {
-            'PPG': round(season_stats['PTS'].iloc[0] / games_played, 1) if games_played > 0 else 0,
-            'RPG': round(season_stats['REB'].iloc[0] / games_played, 1) if games_played > 0 else 0,
-            'APG': round(season_stats['AST'].iloc[0] / games_played, 1) if games_played > 0 else 0,
-            'FG_PCT': f"{round(season_stats['FG_PCT'].iloc[0] * 100, 1)}%",
-            '3PT_PCT': f"{round(season_stats['FG3_PCT'].iloc[0] * 100, 1)}%",
-            'GP': games_played
-        }
+        report = ParseReport()
+        players_written = import_roster(filename, report=report)
+
+        message = f"Roster import complete.\nPlayers added or updated: {players_written}"
+        if report.error_count:
+            message += f"\nRows skipped: {report.error_count}\n\n{report.summary()}"
+        messagebox.showinfo("Roster Import", message)
+        display_roster()
     except Exception as e:
-        print(f"Error retrieving stats for {player_name}: {e}")
-        return None
+        messagebox.showerror("Error", f"Failed to import roster: {e}")
 
+def save_roster_to_file():
+    filename = filedialog.asksaveasfilename(title="Export Roster", defaultextension=".csv",
+                                            filetypes=ROSTER_FILETYPES)
+    if filename:
+        try:
+            count = export_roster(filename)
+            messagebox.showinfo("Roster Export", f"Exported {count} players.")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to export roster: {e}")
+
+@rapsmetrics.timed('ui.view_player_profile')
 def view_player_profile(player_id):
-    # Clear existing content
-    for widget in main_frame.winfo_children():
-        widget.destroy()
-    
-    # Fetch the full player details
-    player = get_player_by_id(player_id)
-    
+    start_page()
+
     # Create a frame for the profile details
     profile_frame = tk.Frame(main_frame)
     profile_frame.pack(padx=20, pady=20, fill=tk.BOTH, expand=True)
-    
-    # Profile Title
-    title_label = tk.Label(profile_frame, text=player[1], font=('Arial', 18, 'bold'))
-    title_label.pack(pady=(0, 20))
-    
-    # Create labels for basic player information
-    details = [
-        ("Position", player[2]),
-        ("Age", player[3]),
-        ("Height", player[4]),
-        ("Weight", player[5]),
-        ("Salary", f"${float(player[6]):,.2f}")
-    ]
-    
-    for label, value in details:
-        detail_frame = tk.Frame(profile_frame)
-        detail_frame.pack(fill=tk.X, pady=5)
-        
-        label_widget = tk.Label(detail_frame, text=f"{label}:", font=('Arial', 14, 'bold'), anchor='w')
-        label_widget.pack(side=tk.LEFT)
-        
-        value_widget = tk.Label(detail_frame, text=value, font=('Arial', 14), anchor='w')
-        value_widget.pack(side=tk.LEFT)
-    
-    # Retrieve and display current season stats
-    current_nba_stats = get_player_season_stats(player[1], '2024-25')
-    last_nba_stats = get_player_season_stats(player[1], '2023-24')
-    
-    # Display current season stats
-    if current_nba_stats:
+
+    details_frame = tk.Frame(profile_frame)
+    details_frame.pack(fill=tk.X)
+
+    # Stats are fetched in the background; show placeholders until they arrive
+    for season, title in PROFILE_SEASONS:
         # Stats Title
-        stats_title_label = tk.Label(profile_frame, text="2024-2025 Season Stats", font=('Arial', 16, 'bold'))
+        stats_title_label = tk.Label(profile_frame, text=title, font=('Arial', 16, 'bold'))
         stats_title_label.pack(pady=(20, 10))
-        
-        # Create a frame for the current season stats table
+
+        # Create a frame for the season stats table
         stats_table_frame = tk.Frame(profile_frame)
         stats_table_frame.pack(fill=tk.X, pady=10)
 
-        # Create table headers for current season
-        headers = ["Points Per Game", "Rebounds Per Game", "Assists Per Game", "Field Goal %", "3-Point %"]
-        for col, header in enumerate(headers):
-            header_label = tk.Label(stats_table_frame, text=header, font=('Arial', 14, 'bold'))
-            header_label.grid(row=0, column=col, padx=10, pady=5)
-
-        # Populate current season stats
-        values = [
-            current_nba_stats['PPG'],
-            current_nba_stats['RPG'],
-            current_nba_stats['APG'],
-            current_nba_stats['FG_PCT'],
-            current_nba_stats['3PT_PCT']
-        ]
-        
-        for col, value in enumerate(values):
-            value_label = tk.Label(stats_table_frame, text=value, font=('Arial', 12))
-            value_label.grid(row=1, column=col, padx=10, pady=5)
+        loading_label = tk.Label(stats_table_frame, text="Loading stats...", font=('Arial', 12, 'italic'))
+        loading_label.grid(row=0, column=0, padx=10, pady=5)
 
-    # Display last season stats
-    if last_nba_stats:
-        # Stats Title
-        last_stats_title_label = tk.Label(profile_frame, text="2023-2024 Season Stats", font=('Arial', 16, 'bold'))
-        last_stats_title_label.pack(pady=(20, 10))
-        
-        # Create a frame for the last season stats table
-        last_stats_table_frame = tk.Frame(profile_frame)
-        last_stats_table_frame.pack(fill=tk.X, pady=10)
-
-        # Create table headers for last season
-        for col, header in enumerate(headers):
-            header_label = tk.Label(last_stats_table_frame, text=header, font=('Arial', 14, 'bold'))
-            header_label.grid(row=0, column=col, padx=10, pady=5)
-
-        # Populate last season stats
-        last_values = [
-            last_nba_stats['PPG'],
-            last_nba_stats['RPG'],
-            last_nba_stats['APG'],
-            last_nba_stats['FG_PCT'],
-            last_nba_stats['3PT_PCT']
-        ]
-        
-        for col, value in enumerate(last_values):
-            last_value_label = tk.Label(last_stats_table_frame, text=value, font=('Arial', 12))
-            last_value_label.grid(row=1, column=col, padx=10, pady=5)
+        load_view(lambda stats, title_label=stats_title_label, table_frame=stats_table_frame:
+                      show_season_stats(title_label, table_frame, stats),
+                  rapsviewmodel.profile_stats, player_id, season)
+
+    load_view(lambda profile: show_profile_details(details_frame, profile), rapsviewmodel.player_profile, player_id)
 
     # Add a button to go back to the player list
-    back_button = tk.Button(profile_frame, text="Back to Player List", command=lambda: display_roster())
+    back_button = tk.Button(profile_frame, text="Back to Player List", command=display_roster)
     back_button.pack(pady=(20, 0))
-    
-def display_roster():
-    # Clear existing content
+
+# Fill in the player's name and details from a PlayerProfile
+def show_profile_details(details_frame, profile):
+    if profile is None:
+        tk.Label(details_frame, text="Player not found.", font=('Arial', 14)).pack()
+        return
+
+    # Profile Title
+    title_label = tk.Label(details_frame, text=profile.name, font=('Arial', 18, 'bold'))
+    title_label.pack(pady=(0, 20))
+
+    for label, value in profile.details:
+        detail_frame = tk.Frame(details_frame)
+        detail_frame.pack(fill=tk.X, pady=5)
+
+        label_widget = tk.Label(detail_frame, text=f"{label}:", font=('Arial', 14, 'bold'), anchor='w')
+        label_widget.pack(side=tk.LEFT)
+
+        value_widget = tk.Label(detail_frame, text=value, font=('Arial', 14), anchor='w')
+        value_widget.pack(side=tk.LEFT)
+
+# Fill in a season stats table from its ProfileStats once it has been fetched
+def show_season_stats(stats_title_label, stats_table_frame, stats):
+    for widget in stats_table_frame.winfo_children():
+        widget.destroy()
+
+    # No stats for this season, leave the section out
+    if stats is None:
+        stats_title_label.destroy()
+        stats_table_frame.destroy()
+        return
+
+    # Create table headers
+    for col, header in enumerate(stats.headers):
+        header_label = tk.Label(stats_table_frame, text=header, font=('Arial', 14, 'bold'))
+        header_label.grid(row=0, column=col, padx=10, pady=5)
+
+    # Populate season stats
+    for col, value in enumerate(stats.values):
+        value_label = tk.Label(stats_table_frame, text=value, font=('Arial', 12))
+        value_label.grid(row=1, column=col, padx=10, pady=5)
+
+# Clear the main frame for a new page. Views for the old page still queued on
+# the worker pool are cancelled; those already running are dropped when they
+# arrive.
+def start_page():
+    global page_request
+    page_request += 1
+    for future in page_futures:
+        future.cancel()
+    page_futures.clear()
     for widget in main_frame.winfo_children():
         widget.destroy()
 
+# Run func on the worker pool and hand its future to callback on the Tk thread;
+# returns the future
+def run_in_background(callback, func, *args):
+    future = executor.submit(func, *args)
+
+    def check():
+        if future.done():
+            callback(future)
+        else:
+            root.after(STATS_POLL_MS, check)
+
+    root.after(STATS_POLL_MS, check)
+    return future
+
+# Render the model `build(*args)` (a rapsviewmodel builder): at once if it is
+# cached and current, otherwise once a worker has built it, as long as the
+# page it was asked for is still showing
+def load_view(render, build, *args):
+    model = build.peek(*args)
+    if model is not None:
+        render(model)
+        return
+
+    request_id = page_request
+
+    def done(future):
+        if request_id != page_request:
+            return
+        page_futures.remove(future)
+        try:
+            model = future.result()
+        except Exception as e:
+            log.warning("Failed to build %s: %s", build.__name__, e)
+            messagebox.showerror("Error", f"Failed to load page: {e}")
+            return
+        render(model)
+
+    page_futures.append(run_in_background(done, build, *args))
+
+# Roster table columns: (PlayerRow field, heading, width)
+ROSTER_COLUMNS = [
+    ('name', "Name", 180),
+    ('position', "Position", 80),
+    ('age', "Age", 60),
+    ('height_in', "Height", 80),
+    ('weight_lb', "Weight", 90),
+    ('salary_cents', "Salary", 120),
+    ('ppg', "PPG", 60),
+    ('rpg', "RPG", 60),
+    ('apg', "APG", 60)
+]
+
+# Rows fetched from the database at a time as the user scrolls, and pages
+# kept as tree items; pages scrolled further away are dropped and fetched
+# again (by keyset) if the user scrolls back
+ROSTER_PAGE_SIZE = 100
+ROSTER_WINDOW_PAGES = 3
+
+# How often the roster checks the change journal for edits made elsewhere
+# (another window, the command line, an undo), and how many changed rows are
+# patched in place before it is cheaper to reload the page
+ROSTER_POLL_MS = 1000
+ROSTER_PATCH_LIMIT = 50
+
+# SQLite's NOCASE collation, for comparing names the way the database does
+NOCASE_FOLD = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+# Treeview-backed roster table. Only a window of rows around the visible ones
+# exists as tree items: pages come from rapsviewmodel.roster_page (sorted by
+# the database) as they scroll into view, and pages far off-screen are
+# dropped. Single players can be inserted, updated or removed in place
+# without rebuilding the table. Pages and changed rows are read on the worker
+# pool and applied on the Tk thread; results for an earlier sort order or
+# window are dropped.
+class RosterTable:
+    def __init__(self, parent, filters=None):
+        self.filters = filters or {}
+        self.rows = []
+        self.at_start = True
+        self.exhausted = False
+        self.order_by = 'id'
+        self.descending = False
+        # Bumped on every reload, so pages asked for before it are dropped
+        self.generation = 0
+        self.loading = None
+        self.syncing = None
+
+        self.tree = ttk.Treeview(parent, columns=[field for field, _, _ in ROSTER_COLUMNS],
+                                 show='headings', selectmode='browse')
+        for field, heading, width in ROSTER_COLUMNS:
+            self.tree.heading(field, text=heading, command=lambda f=field: self.sort_by(f))
+            self.tree.column(field, width=width, anchor='w')
+
+        self.scrollbar = ttk.Scrollbar(parent, orient='vertical', command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self.on_scroll)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        # Double-click or Enter opens the player's profile
+        self.tree.bind('<Double-1>', lambda e: self.open_selected())
+        self.tree.bind('<Return>', lambda e: self.open_selected())
+
+        # Journal version the rows reflect, taken before they are read
+        self.version = get_roster_version()
+        self.load_more()
+
+        # The poll timer lives on root, and is cancelled with the tree: a
+        # timer on the tree itself would outlive its Tcl callback
+        self.watch_id = root.after(ROSTER_POLL_MS, self.watch)
+        self.tree.bind('<Destroy>', lambda e: self.stop_watching(), add='+')
+
+    def exists(self):
+        return self.tree.winfo_exists()
+
+    def selected_id(self):
+        selection = self.tree.selection()
+        return int(selection[0]) if selection else None
+
+    def open_selected(self):
+        player_id = self.selected_id()
+        if player_id is not None:
+            view_player_profile(player_id)
+
+    # Run func(*args) on the worker pool and pass its result to apply, unless
+    # the table was destroyed or reloaded in the meantime; returns the future
+    def in_background(self, apply, func, *args):
+        generation = self.generation
+
+        def done(future):
+            if future in page_futures:
+                page_futures.remove(future)
+            if generation != self.generation or not self.exists():
+                return
+            try:
+                result = future.result()
+            except Exception as e:
+                log.warning("Failed to load roster rows: %s", e)
+                return
+            apply(result)
+
+        future = run_in_background(done, func, *args)
+        page_futures.append(future)
+        return future
+
+    def busy(self, future):
+        return future is not None and not future.done()
+
+    # Fetch the page after (or, descending, before) the `after` row and apply
+    # it: at once if the page is cached and current, otherwise once a worker
+    # has read it. One page is fetched at a time.
+    def fetch_page(self, apply, descending, after):
+        if self.busy(self.loading):
+            return
+        args = (self.order_by, descending, after, tuple(sorted(self.filters.items())),
+                ROSTER_STATS_SEASON, ROSTER_PAGE_SIZE)
+        page = rapsviewmodel.roster_page.peek(*args)
+        if page is not None:
+            apply(page)
+        else:
+            self.loading = self.in_background(apply, rapsviewmodel.roster_page, *args)
+
+    # Index of the first visible row
+    def top_index(self):
+        return round(self.tree.yview()[0] * len(self.rows))
+
+    # Players of a page that are not in the tree yet (a sync may have placed
+    # some of them while the page was read)
+    def new_rows(self, page):
+        return [(player, values) for player, values in zip(page.players, page.values)
+                if not self.tree.exists(str(player.id))]
+
+    # Fetch and materialize the next page of rows after the last loaded one,
+    # dropping the first page if the window is full
+    def load_more(self):
+        if self.exhausted:
+            return
+        after = self.rows[-1] if self.rows else None
+        self.fetch_page(lambda page: self.append_page(page, after), self.descending, after)
+
+    def append_page(self, page, after):
+        # The window moved on while the page was read; look again from where
+        # it is now
+        if (self.rows[-1] if self.rows else None) is not after:
+            self.on_scroll(*self.tree.yview())
+            return
+        rows = self.new_rows(page)
+        for player, values in rows:
+            self.tree.insert('', 'end', iid=str(player.id), values=values)
+        self.rows.extend(player for player, _ in rows)
+        self.exhausted = page.exhausted
+
+        excess = len(self.rows) - ROSTER_WINDOW_PAGES * ROSTER_PAGE_SIZE
+        if excess > 0:
+            top = self.top_index()
+            self.tree.delete(*(str(player.id) for player in self.rows[:excess]))
+            del self.rows[:excess]
+            self.at_start = False
+            self.tree.yview_moveto(max(top - excess, 0) / len(self.rows))
+
+    # Fetch the page before the first loaded row (the same keyset query in the
+    # opposite direction), dropping the last page if the window is full
+    def load_previous(self):
+        if self.at_start or not self.rows:
+            return
+        before = self.rows[0]
+        self.fetch_page(lambda page: self.prepend_page(page, before), not self.descending, before)
+
+    def prepend_page(self, page, before):
+        if not self.rows or self.rows[0] is not before:
+            self.on_scroll(*self.tree.yview())
+            return
+        top = self.top_index()
+        rows = self.new_rows(page)
+        for player, values in rows:
+            self.tree.insert('', 0, iid=str(player.id), values=values)
+        self.rows[:0] = reversed([player for player, _ in rows])
+        self.at_start = page.exhausted
+
+        excess = len(self.rows) - ROSTER_WINDOW_PAGES * ROSTER_PAGE_SIZE
+        if excess > 0:
+            self.tree.delete(*(str(player.id) for player in self.rows[-excess:]))
+            del self.rows[-excess:]
+            self.exhausted = False
+        self.tree.yview_moveto((top + len(rows)) / len(self.rows))
+
+    def on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if float(last) > 0.9:
+            self.load_more()
+        elif float(first) < 0.1:
+            self.load_previous()
+
+    # Start over from the first page, e.g. after the sort order changed
+    def reload(self):
+        self.generation += 1
+        if self.loading is not None:
+            self.loading.cancel()
+            self.loading = None
+        self.tree.delete(*self.tree.get_children())
+        self.rows = []
+        self.at_start = True
+        self.exhausted = False
+        self.load_more()
+
+    # Sort on a column; clicking the same heading again reverses the order
+    def sort_by(self, field):
+        self.descending = not self.descending if self.order_by == field else False
+        self.order_by = field
+        self.reload()
+
+    # Python equivalent of the database ordering, for placing single rows.
+    # Only names sort COLLATE NOCASE, which folds ASCII letters alone.
+    def sort_key(self, player):
+        value = player_sort_value(player, self.order_by)
+        if self.order_by == 'name':
+            value = value.translate(NOCASE_FOLD)
+        return (isinstance(value, str), value, player.id)
+
+    def comes_before(self, player, other):
+        if self.descending:
+            return self.sort_key(player) > self.sort_key(other)
+        return self.sort_key(player) < self.sort_key(other)
+
+    def position_of(self, player_id):
+        for position, player in enumerate(self.rows):
+            if player.id == player_id:
+                return position
+        return None
+
+    # Insert, move or refresh a single player row in place
+    def upsert(self, player):
+        position = self.position_of(player.id)
+        if position is not None:
+            del self.rows[position]
+            self.tree.delete(str(player.id))
+
+        # Rows outside the loaded window will arrive with the page they belong to
+        if self.rows and not self.exhausted and not self.comes_before(player, self.rows[-1]):
+            return
+        if self.rows and not self.at_start and self.comes_before(player, self.rows[0]):
+            return
+
+        position = len(self.rows)
+        for i, other in enumerate(self.rows):
+            if self.comes_before(player, other):
+                position = i
+                break
+        self.rows.insert(position, player)
+        self.tree.insert('', position, iid=str(player.id), values=roster_row_values(player))
+
+    def remove(self, player_id):
+        position = self.position_of(player_id)
+        if position is not None:
+            del self.rows[position]
+            self.tree.delete(str(player_id))
+
+    # Place a player read with get_player_with_stats, None for a deleted one
+    def refresh(self, player_id, player):
+        if player is None:
+            self.remove(player_id)
+        else:
+            self.upsert(player)
+
+    # Patch only the rows changed since the last sync. The changes are read on
+    # the worker pool; a sync already running covers this one.
+    def sync(self):
+        if not self.busy(self.syncing):
+            self.syncing = self.in_background(self.apply_changes, read_roster_changes, self.version)
+
+    def apply_changes(self, changed):
+        version, players = changed
+        if version == self.version:
+            return
+        self.version = version
+        if players is None:
+            self.reload()
+            return
+        for player_id, player in players.items():
+            self.refresh(player_id, player)
+
+    def watch(self):
+        self.watch_id = None
+        if self.exists():
+            self.sync()
+            self.watch_id = root.after(ROSTER_POLL_MS, self.watch)
+
+    def stop_watching(self):
+        if self.watch_id is not None:
+            root.after_cancel(self.watch_id)
+            self.watch_id = None
+
+roster_table = None
+
+# Roster changes since journal `version`, read for RosterTable.sync: the new
+# version and the changed players by ID (None for deleted ones), or no players
+# if there are too many changes to patch and the table should reload
+def read_roster_changes(version):
+    changes = get_roster_changes(version, ROSTER_PATCH_LIMIT + 1)
+    if not changes:
+        return version, {}
+    if len(changes) > ROSTER_PATCH_LIMIT:
+        return get_roster_version(), None
+    players = {player_id: get_player_with_stats(player_id, ROSTER_STATS_SEASON)
+               for player_id in dict.fromkeys(change.player_id for change in changes)}
+    return changes[-1].version, players
+
+# Search box: wait this long after the last keystroke before querying
+SEARCH_DEBOUNCE_MS = 150
+SEARCH_RESULTS = 20
+
+# Players and games matching a search box query
+def search_all(text):
+    return search_players(text, SEARCH_RESULTS, ROSTER_STATS_SEASON), search_games(text, SEARCH_RESULTS)
+
+# Search-as-you-type over player names/positions and schedule opponents.
+# Queries are debounced and run on the worker pool; only the results of the
+# latest query are shown. Double-click or Enter on a result opens it.
+class SearchBox:
+    def __init__(self, parent):
+        self.pending = None
+        self.query = 0
+        self.actions = []
+
+        entry_frame = tk.Frame(parent)
+        entry_frame.pack(pady=(10, 0))
+        tk.Label(entry_frame, text="Search:").pack(side=tk.LEFT)
+        self.entry = tk.Entry(entry_frame, width=40)
+        self.entry.pack(side=tk.LEFT, padx=5)
+
+        self.results = tk.Listbox(parent, width=70, height=10)
+        self.results.pack(pady=5)
+
+        self.entry.bind('<KeyRelease>', self.schedule)
+        self.entry.bind('<Return>', lambda e: self.open_selected(0))
+        self.results.bind('<Double-1>', lambda e: self.open_selected())
+        self.results.bind('<Return>', lambda e: self.open_selected())
+
+    # Restart the debounce timer on every keystroke
+    def schedule(self, event=None):
+        if self.pending is not None:
+            root.after_cancel(self.pending)
+        self.pending = root.after(SEARCH_DEBOUNCE_MS, self.run)
+
+    def run(self):
+        self.pending = None
+        if not self.results.winfo_exists():
+            return
+
+        self.query += 1
+        query = self.query
+
+        def done(future):
+            if query != self.query or not self.results.winfo_exists():
+                return
+            try:
+                players, games = future.result()
+            except Exception as e:
+                log.warning("Search failed: %s", e)
+                return
+            self.show(players, games)
+
+        run_in_background(done, search_all, self.entry.get())
+
+    def show(self, players, games):
+        self.results.delete(0, tk.END)
+        self.actions = []
+        for player in players:
+            self.results.insert(tk.END, f"Player: {player.name} ({player.position.strip()})")
+            self.actions.append(lambda player_id=player.id: view_player_profile(player_id))
+        for game in games:
+            separator = 'vs' if game.location == 'Home' else '@'
+            self.results.insert(tk.END, f"Game: {game.game_date} {separator} {game.opponent}, {game.time}")
+            self.actions.append(lambda game=game: show_schedule(game.season, game.team))
+
+    def open_selected(self, index=None):
+        if index is None:
+            selection = self.results.curselection()
+            if not selection:
+                return
+            index = selection[0]
+        if index < len(self.actions):
+            self.actions[index]()
+
+# Undo or redo the last roster edit (an import counts as one edit)
+def undo_roster():
+    if undo_roster_change() is None:
+        messagebox.showinfo("Undo", "Nothing to undo.")
+    elif roster_table is not None and roster_table.exists():
+        roster_table.sync()
+
+def redo_roster():
+    if redo_roster_change() is None:
+        messagebox.showinfo("Redo", "Nothing to redo.")
+    elif roster_table is not None and roster_table.exists():
+        roster_table.sync()
+
+# Refresh one player's row if the roster is on screen
+def refresh_roster_row(player_id):
+    table = roster_table
+    if table is not None and table.exists():
+        table.in_background(lambda player: table.refresh(player_id, player),
+                            get_player_with_stats, player_id, ROSTER_STATS_SEASON)
+
+@rapsmetrics.timed('ui.display_roster')
+def display_roster():
+    global roster_table
+
+    start_page()
+
     # Create a frame for the roster
     roster_frame = tk.Frame(main_frame)
     roster_frame.pack(fill=tk.BOTH, expand=True)
 
-    # Create headers
-    headers = ["Name", "Position", "Age", "Height", "Weight", "Salary", "Actions"]
-    for col, header in enumerate(headers):
-        header_label = tk.Label(roster_frame, text=header, font=('bold', 12))
-        header_label.grid(row=0, column=col, padx=5, pady=5, sticky='w')
+    roster_table = RosterTable(roster_frame)
 
-    players = get_all_players()
-    
-    for row, player in enumerate(players, start=1):
-        # Convert salary to float, handling potential errors
-        try:
-            salary = float(player[6])
-        except (ValueError, TypeError):
-            salary = 0.0
-
-        # Display player information
-        player_info = [
-            player[1],  # Name
-            player[2],  # Position
-            player[3],  # Age
-            player[4],  # Height
-            player[5],  # Weight
-            f"${salary:,.2f}"  # Formatted salary
-        ]
-        
-        for col, info in enumerate(player_info):
-            if col == 0:  # Name column
-                # Make the name clickable and blue
-                name_label = tk.Label(roster_frame, text=info, fg='blue', cursor='hand2')
-                name_label.grid(row=row, column=col, padx=5, pady=5, sticky='w')
-                # Bind click event to open player profile
-                name_label.bind('<Button-1>', lambda e, pid=player[0]: view_player_profile(pid))
-            else:
-                player_label = tk.Label(roster_frame, text=info)
-                player_label.grid(row=row, column=col, padx=5, pady=5, sticky='w')
-        
-        edit_button = tk.Button(roster_frame, text="Edit", command=lambda id=player[0]: edit_player(id))
-        edit_button.grid(row=row, column=len(player_info), padx=5, pady=5)
+    # Actions apply to the selected row
+    actions_frame = tk.Frame(main_frame)
+    actions_frame.pack(pady=10)
 
-        delete_button = tk.Button(roster_frame, text="Delete", command=lambda id=player[0]: delete_player(id))
-        delete_button.grid(row=row, column=len(player_info)+1, padx=5, pady=5)
+    profile_button = tk.Button(actions_frame, text="View Profile", command=roster_table.open_selected)
+    profile_button.pack(side=tk.LEFT, padx=5)
+
+    edit_button = tk.Button(actions_frame, text="Edit", command=lambda: with_selected_player(edit_player))
+    edit_button.pack(side=tk.LEFT, padx=5)
+
+    delete_button = tk.Button(actions_frame, text="Delete", command=lambda: with_selected_player(delete_player))
+    delete_button.pack(side=tk.LEFT, padx=5)
+
+    undo_button = tk.Button(actions_frame, text="Undo", command=undo_roster)
+    undo_button.pack(side=tk.LEFT, padx=5)
+
+    redo_button = tk.Button(actions_frame, text="Redo", command=redo_roster)
+    redo_button.pack(side=tk.LEFT, padx=5)
+
+    roster_table.tree.bind('<Control-z>', lambda e: undo_roster())
+    roster_table.tree.bind('<Control-y>', lambda e: redo_roster())
 
     # Add 'Back to Home' button
     back_button = tk.Button(main_frame, text="Back to Home Page", command=show_home)
@@ -288,12 +684,60 @@ def display_roster():
     add_player_button = tk.Button(main_frame, text="Add Player", command=add_player_window)
     add_player_button.pack(pady=10)
 
+    # Add 'Prefetch Stats' button
+    prefetch_button = tk.Button(main_frame, text="Prefetch Roster Stats", command=prefetch_stats)
+    prefetch_button.pack(pady=10)
+
+    # Bulk import and export
+    file_frame = tk.Frame(main_frame)
+    file_frame.pack(pady=10)
+
+    import_button = tk.Button(file_frame, text="Import Roster", command=load_roster_from_file)
+    import_button.pack(side=tk.LEFT, padx=5)
+
+    export_button = tk.Button(file_frame, text="Export Roster", command=save_roster_to_file)
+    export_button.pack(side=tk.LEFT, padx=5)
+
+# Function to pull stats for the whole roster in the background
+def prefetch_stats():
+    seasons = [season for season, _ in PROFILE_SEASONS]
+
+    def done(future):
+        try:
+            summary = future.result()
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to prefetch stats: {e}")
+            return
+
+        message = f"Seasons fetched: {len(summary['fetched'])}\n"
+        message += f"Seasons already stored: {len(summary['cached'])}\n"
+        message += f"Failed: {len(summary['failed'])}\n"
+        message += f"Players with stats: {summary['players']}\n"
+        message += f"Players not found: {len(summary['unresolved'])}"
+        messagebox.showinfo("Prefetch Stats", message)
+        display_roster()
+
+    def refresh():
+        # pandas is only loaded once stats are needed
+        from rapsstats import refresh_season_stats
+        return refresh_season_stats(seasons)
+
+    run_in_background(done, refresh)
+
+# Run an action on the player selected in the roster table
+def with_selected_player(action):
+    player_id = roster_table.selected_id()
+    if player_id is None:
+        messagebox.showinfo("No Player Selected", "Select a player in the roster first.")
+        return
+    action(player_id)
+
 # Function to delete a player
 def delete_player(player_id):
     confirm = messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this player?")
     if confirm:
         delete_player_from_db(player_id)
-        display_roster()
+        refresh_roster_row(player_id)
 
 # Function to edit a player
 def edit_player(player_id):
@@ -306,27 +750,27 @@ def edit_player(player_id):
     
     # Create entry fields for each piece of information
     name_entry = tk.Entry(edit_window)
-    name_entry.insert(0, player[1])
+    name_entry.insert(0, player.name)
     name_entry.pack(pady=5)
     
     position_entry = tk.Entry(edit_window)
-    position_entry.insert(0, player[2])
+    position_entry.insert(0, player.position)
     position_entry.pack(pady=5)
     
     age_entry = tk.Entry(edit_window)
-    age_entry.insert(0, player[3])
+    age_entry.insert(0, player.age)
     age_entry.pack(pady=5)
 
     height_entry = tk.Entry(edit_window)
-    height_entry.insert(0, player[4])
+    height_entry.insert(0, player.height)
     height_entry.pack(pady=5)
 
     weight_entry = tk.Entry(edit_window)
-    weight_entry.insert(0, player[5])
+    weight_entry.insert(0, player.weight)
     weight_entry.pack(pady=5)
 
     salary_entry = tk.Entry(edit_window)
-    salary_entry.insert(0, player[6])
+    salary_entry.insert(0, f"{player.salary_cents / 100:.2f}")
     salary_entry.pack(pady=5)
     
     def save_changes():
@@ -341,9 +785,9 @@ def edit_player(player_id):
         # Update the database
         update_player(player_id, updated_name, updated_position, updated_age, updated_height, updated_weight, updated_salary)
         
-        # Close the edit window and refresh the roster display
+        # Close the edit window and refresh the player's row
         edit_window.destroy()
-        display_roster()
+        refresh_roster_row(player_id)
     
     save_button = tk.Button(edit_window, text="Save Changes", command=save_changes)
     save_button.pack(pady=5)
@@ -386,138 +830,112 @@ def add_player_window():
         weight = weight_entry.get()
         salary = salary_entry.get()
 
-        add_player(name, position, age, height, weight, salary)
+        player_id = add_player(name, position, age, height, weight, salary)
         add_window.destroy()
-        display_roster()
+        refresh_roster_row(player_id)
 
     add_button = tk.Button(add_window, text="Add Player", command=save_new_player)
     add_button.pack(pady=5)
     
-def show_schedule():
-    # Clear existing content
-    for widget in main_frame.winfo_children():
-        widget.destroy()
+# Build the calendar grid for one month tab
+@rapsmetrics.timed('ui.build_month_tab')
+def build_month_tab(month_frame, schedule_month):
+    # Add weekday headers
+    for i, day in enumerate(WEEKDAYS):
+        label = tk.Label(month_frame, text=day, font=('Arial', 10, 'bold'))
+        label.grid(row=0, column=i, padx=5, pady=5)
+
+    # Add calendar days
+    for row, week in enumerate(schedule_month.weeks, start=1):
+        for col, day in enumerate(week):
+            if day is None:
+                continue
+
+            date_frame = tk.Frame(month_frame, width=100, height=80, relief='solid', borderwidth=1)
+            date_frame.grid(row=row, column=col, padx=2, pady=2, sticky='nsew')
+            date_frame.grid_propagate(False)
+
+            # Date number
+            date_label = tk.Label(date_frame, text=str(day.day), anchor='nw')
+            date_label.grid(row=0, column=0, padx=5, pady=2, sticky='nw')
+
+            # If there are games on this date, display them
+            if day.games:
+                games_info = "\n".join(day.games)
+                games_label = tk.Label(date_frame, text=games_info, anchor='nw', justify='left', font=('Arial', 8))
+                games_label.grid(row=1, column=0, padx=5, pady=2, sticky='nw')
+
+    # Configure grid weights
+    for i in range(7):
+        month_frame.grid_columnconfigure(i, weight=1)
+
+def show_schedule(season=None, team=DEFAULT_TEAM):
+    start_page()
+    load_view(render_schedule, rapsviewmodel.schedule, season, team)
+
+# Build the schedule page from a rapsviewmodel.Schedule
+@rapsmetrics.timed('ui.show_schedule')
+def render_schedule(schedule):
+    season, team = schedule.season, schedule.team
+    log.debug("Showing %d months of %s games for %s", len(schedule.months), season, team)
+
+    # Season and team pickers
+    picker_frame = tk.Frame(main_frame)
+    picker_frame.pack(pady=(10, 0))
+
+    tk.Label(picker_frame, text="Season:").pack(side=tk.LEFT)
+    season_picker = ttk.Combobox(picker_frame, values=list(schedule.seasons), state='readonly', width=10)
+    season_picker.set(season)
+    season_picker.pack(side=tk.LEFT, padx=(5, 15))
+
+    tk.Label(picker_frame, text="Team:").pack(side=tk.LEFT)
+    team_picker = ttk.Combobox(picker_frame, values=list(schedule.teams), state='readonly', width=25)
+    team_picker.set(team)
+    team_picker.pack(side=tk.LEFT, padx=5)
+
+    season_picker.bind('<<ComboboxSelected>>', lambda e: show_schedule(season_picker.get(), team_picker.get()))
+    team_picker.bind('<<ComboboxSelected>>', lambda e: show_schedule(None, team_picker.get()))
 
     # Create a notebook for tabs
     notebook = ttk.Notebook(main_frame)
     notebook.pack(fill='both', expand=True, padx=10, pady=10)
 
-    # Define months and their details
-    months = [
-        ('October 2024', range(1, 32)),
-        ('November 2024', range(1, 31)),
-        ('December 2024', range(1, 32)),
-        ('January 2025', range(1, 32)),
-        ('February 2025', range(1, 29)),
-        ('March 2025', range(1, 32)),
-        ('April 2025', range(1, 31)),
-        ('May 2025', range(1, 32)),
-        ('June 2025', range(1, 31))
-    ]
-
-    # Calendar headers
-    weekdays = ['Sun', 'Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat']
-
-    # Retrieve games from the database
-    conn = sqlite3.connect('raptors.db')
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM schedule ORDER BY game_date')
-    games = cursor.fetchall()
-    conn.close()
-
-    # Organize games by date
-    schedule_dict = {}
-    for game in games:
-        try:
-            # Try multiple date formats
-            try:
-                # First try the standard format
-                game_date = datetime.strptime(game[1], '%Y-%m-%d')
-            except ValueError:
-                try:
-                    # Try alternative formats
-                    game_date = datetime.strptime(game[1], '%m-%d-%Y')
-                except ValueError:
-                    # If all parsing fails, skip this game
-                    print(f"Could not parse date: {game[1]}")
-                    continue
-
-            # Ensure we're using the correct year for 2024 games
-            if game_date.year < 2024:
-                game_date = game_date.replace(year=2024)
-
-            formatted_date = game_date.strftime('%b %d, %Y')
-            
-            opponent = game[2]
-            location = game[3]
-            time = game[4] if len(game) > 4 else "Time Not Specified"
-
-            # Debug print
-            print(f"Processed game: {formatted_date}, {opponent}, {location}, {time}")
-
-            schedule_dict.setdefault(formatted_date, []).append(f"{opponent} ({location}, {time})")
-        except Exception as e:
-            print(f"Error processing game: {game}, Error: {e}")
-
     # Function to upload a schedule file
     def upload_schedule_file():
-        filename = filedialog.askopenfilename(title="Select Schedule File", filetypes=[("Text Files", "*.txt")])
+        filename = filedialog.askopenfilename(title="Select Schedule File", filetypes=SCHEDULE_FILETYPES)
         if filename:
-            load_schedule_from_file(filename)
+            load_schedule_from_file(filename, team)
             messagebox.showinfo("Success", "Schedule loaded successfully!")
             # Refresh the calendar to reflect the new schedule
-            show_schedule()
+            show_schedule(season, team)
 
-    for month_name, days in months:
-        # Create frame for each month
+    # Month tabs start empty and are filled in the first time they are selected
+    pending_tabs = {}
+    for schedule_month in schedule.months:
         month_frame = ttk.Frame(notebook)
-        notebook.add(month_frame, text=month_name)
-
-        # Add weekday headers
-        for i, day in enumerate(weekdays):
-            label = tk.Label(month_frame, text=day, font=('Arial', 10, 'bold'))
-            label.grid(row=0, column=i, padx=5, pady=5)
-
-        # Calculate first day of month
-        first_day = datetime.strptime(f'1 {month_name}', '%d %B %Y').weekday()
-        first_day = (first_day + 1) % 7  # Adjust to start with Sunday
-
-        # Add calendar days
-        row = 1
-        col = first_day
-
-        for day in days:
-            # Create the date string for this specific day
-            current_date = datetime.strptime(f'{month_name.split()[0]} {day} {month_name.split()[1]}', '%B %d %Y')
-            formatted_date = current_date.strftime('%b %d, %Y')
-            
-            date_frame = tk.Frame(month_frame, width=100, height=80, relief='solid', borderwidth=1)
-            date_frame.grid(row=row, column=col, padx=2, pady=2, sticky='nsew')
-            date_frame.grid_propagate(False)
-
-            # Date number
-            date_label = tk.Label(date_frame, text=str(day), anchor='nw')
-            date_label.grid(row=0, column=0, padx=5, pady=2, sticky='nw')
+        notebook.add(month_frame, text=schedule_month.title)
+        pending_tabs[str(month_frame)] = (month_frame, schedule_month)
 
-            # If there are games on this date, display them
-            if formatted_date in schedule_dict:
-                games_info = "\n".join(schedule_dict[formatted_date])
-                games_label = tk.Label(date_frame, text=games_info, anchor='nw', justify='left', font=('Arial', 8))
-                games_label.grid(row=1, column=0, padx=5, pady=2, sticky='nw')
+    def build_selected_tab(event=None):
+        selected = str(notebook.select())
+        if selected in pending_tabs:
+            build_month_tab(*pending_tabs.pop(selected))
 
-            col += 1
-            if col > 6:
-                col = 0
-                row += 1
-
-        # Configure grid weights
-        for i in range(7):
-            month_frame.grid_columnconfigure(i, weight=1)
+    notebook.bind('<<NotebookTabChanged>>', build_selected_tab)
+    build_selected_tab()
 
     # Add 'Upload Schedule File' button
     upload_button = tk.Button(main_frame, text="Upload Schedule File", command=upload_schedule_file)
     upload_button.pack(pady=10)
 
+    # Add 'Sync Results' button
+    sync_button = tk.Button(main_frame, text="Sync Results", command=lambda: sync_results(season, team))
+    sync_button.pack(pady=10)
+
+    # Add 'Export Schedule' button
+    export_button = tk.Button(main_frame, text="Export Schedule", command=lambda: save_schedule_to_file(season, team))
+    export_button.pack(pady=10)
+
     # Add 'Clear Schedule' button
     clear_schedule_button = tk.Button(main_frame, text="Clear All Schedules", 
                                       command=clear_schedule_confirmation)
@@ -527,6 +945,23 @@ def show_schedule():
     back_button = tk.Button(main_frame, text="Back to Home Page", command=show_home)
     back_button.pack(pady=10)
 
+# Pull scores played since the last sync in the background, then redraw
+def sync_results(season, team):
+    def done(future):
+        try:
+            changes = future.result()
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to sync results: {e}")
+            return
+
+        message = f"Results added: {len(changes['added'])}\n"
+        message += f"Results updated: {len(changes['updated'])}\n"
+        message += f"Unchanged: {changes['unchanged']}"
+        messagebox.showinfo("Sync Results", message)
+        show_schedule(season, team)
+
+    run_in_background(done, sync_team_results, team, season)
+
 # Add this new function
 def clear_schedule_confirmation():
     # Show a confirmation dialog
@@ -544,9 +979,8 @@ def clear_schedule_confirmation():
         
 # Function to show the home page
 def show_home():
-    for widget in main_frame.winfo_children():
-        widget.destroy()
-    
+    start_page()
+
     home_label = tk.Label(main_frame, text="Welcome to the Raptors Roster App", font=('Arial', 16))
     home_label.pack(pady=20)
 
@@ -556,12 +990,70 @@ def show_home():
     roster_button = tk.Button(main_frame, text="View Roster", command=display_roster)
     roster_button.pack(pady=10)
 
-# Main frame for content
-main_frame = tk.Frame(root)
-main_frame.pack(fill=tk.BOTH, expand=True)
+    SearchBox(main_frame)
+
+# Timing summary along the bottom of the window, refreshed while the app runs
+def show_metrics_overlay():
+    overlay = tk.Label(root, anchor='w', font=('Courier', 9), fg='#555555')
+    overlay.pack(side=tk.BOTTOM, fill=tk.X)
+
+    def refresh():
+        overlay.config(text=rapsmetrics.summary_line())
+        root.after(METRICS_OVERLAY_MS, refresh)
+    refresh()
+
+# Build the main window and run the app until it is closed
+def main():
+    global root, main_frame, executor
+
+    # Create the main window first
+    root = tk.Tk()
+    root.title("Raptors Roster App")
+
+    # Get the screen width and height
+    screen_width = root.winfo_screenwidth()
+    screen_height = root.winfo_screenheight()
+
+    # Set the window size to a fraction of the screen size, for example, 80% of the screen size
+    window_width = int(screen_width * 0.8)
+    window_height = int(screen_height * 0.8)
+
+    # Set the window size
+    root.geometry(f"{window_width}x{window_height}")
+
+    # Worker threads for NBA API calls so the window never freezes on network
+    executor = ThreadPoolExecutor(max_workers=4)
+
+    rapsmetrics.configure_logging()
+
+    # Slowest database, network and view timings along the bottom of the window
+    if rapsmetrics.ENABLED:
+        show_metrics_overlay()
+
+    # Main frame for content
+    main_frame = tk.Frame(root)
+    main_frame.pack(fill=tk.BOTH, expand=True)
+
+    # Show the home page initially
+    show_home()
+
+    # Startup benchmark hook (see benchmarks/bench_startup.py): report the time to
+    # the first drawn frame and exit
+    if os.environ.get('RAPTORS_STARTUP_BENCH'):
+        def report_first_frame():
+            root.update_idletasks()
+            print(f"first_frame {time.perf_counter() - STARTUP_T0:.4f}", flush=True)
+            root.destroy()
+        root.after_idle(report_first_frame)
+
+    # Bring the database schema up to date once the window is on screen
+    root.after_idle(migrate)
+
+    # Start the application
+    root.mainloop()
 
-# Show the home page initially
-show_home()
+    # Don't wait on stats requests nobody will see
+    executor.shutdown(wait=False, cancel_futures=True)
 
-# Start the application
-root.mainloop()
+if __name__ == '__main__':
+    main()
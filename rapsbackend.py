@@ -0,0 +1,320 @@
+# Where NBA data comes from. rapsnba and rapsstats ask the active backend for
+# stats.nba.com responses by endpoint name and parameters, so the same code
+# runs against:
+#
+#   live           nba_api and stats.nba.com (the default)
+#   a snapshot     a compact SQLite file of recorded responses, read through a
+#                  memory map; no network and no nba_api needed
+#   http://host:port   a local stand-in server (rapsstandin) speaking the
+#                  stats.nba.com protocol, reached through nba_api itself
+#
+# Chosen with RAPTORS_NBA=live|<snapshot file>|<url>, `raptors --nba ...` or
+# use(). Every request goes through rapsclient (coalescing, and for network
+# backends rate limiting, timeouts and retries). Responses are the
+# stats.nba.com JSON: {"resultSets": [{"name", "headers", "rowSet"}, ...]}.
+import os
+import json
+import zlib
+import sqlite3
+import threading
+from datetime import datetime
+import rapsclient
+
+LIVE = 'live'
+
+# Endpoint names as nba_api sends them (lower case) and the parameters that
+# identify one stored response; anything else is a filter applied on read
+PLAYER_DASHBOARD = 'playerdashboardbylastngames'
+TEAM_GAMES = 'leaguegamefinder'
+LEAGUE_GAME_LOG = 'leaguegamelog'
+
+SNAPSHOT_KEYS = {
+    PLAYER_DASHBOARD: ('PlayerID', 'Season'),
+    TEAM_GAMES: ('TeamID', 'Season'),
+    LEAGUE_GAME_LOG: ('Season',)
+}
+
+# Where nba_api sends requests unless a stand-in is in use
+STATS_BASE_URL = 'https://stats.nba.com/stats/{endpoint}'
+
+# Snapshots are read through a memory map up to this size
+SNAPSHOT_MMAP_BYTES = 256 * 1024 * 1024
+
+class BackendError(Exception):
+    pass
+
+class MissingData(BackendError):
+    pass
+
+# Throttled (HTTP 429) or a server error; rapsclient tries again
+class RetryableError(BackendError):
+    pass
+
+# First result set of a response as a DataFrame, like nba_api's
+# get_data_frames()[0]
+def result_frame(response, index=0):
+    import pandas as pd
+
+    result = response['resultSets'][index]
+    return pd.DataFrame(result['rowSet'], columns=result['headers'])
+
+# A stats.nba.com response holding DataFrames as result sets, e.g. to write
+# made-up data into a snapshot: frames_response(LeagueGameLog=frame)
+def frames_response(**frames):
+    return {'resultSets': [{'name': name, 'headers': list(frame.columns),
+                            'rowSet': frame.astype(object).where(frame.notna(), None).values.tolist()}
+                           for name, frame in frames.items()]}
+
+# DateFrom as the endpoint takes it (MM/DD/YYYY) -> ISO
+def _iso_date(text):
+    return datetime.strptime(text, '%m/%d/%Y').strftime('%Y-%m-%d') if text else None
+
+class LiveBackend:
+    name = LIVE
+    # Requests cross the network: rate limit them and retry transient errors
+    remote = True
+    throttled = True
+
+    # The nba_api endpoint for a request, not yet sent; it fills in the
+    # parameters stats.nba.com requires
+    def _endpoint(self, endpoint, params):
+        from nba_api.stats import endpoints
+
+        if endpoint == PLAYER_DASHBOARD:
+            return endpoints.PlayerDashboardByLastNGames(player_id=params['PlayerID'], season=params['Season'],
+                                                         last_n_games=82, timeout=rapsclient.REQUEST_TIMEOUT,
+                                                         get_request=False)
+        if endpoint == TEAM_GAMES:
+            return endpoints.LeagueGameFinder(team_id_nullable=params['TeamID'], season_nullable=params['Season'],
+                                              league_id_nullable='00', date_from_nullable=params.get('DateFrom', ''),
+                                              timeout=rapsclient.REQUEST_TIMEOUT, get_request=False)
+        if endpoint == LEAGUE_GAME_LOG:
+            return endpoints.LeagueGameLog(season=params['Season'], player_or_team_abbreviation='P',
+                                           timeout=rapsclient.REQUEST_TIMEOUT, get_request=False)
+        raise BackendError(f"Unsupported endpoint: {endpoint}")
+
+    # Sent through nba_api's HTTP layer but returned raw, so every backend
+    # hands back the same JSON and errors aren't lost in nba_api's parsing
+    def get(self, endpoint, params):
+        from nba_api.stats.library.http import NBAStatsHTTP
+
+        request = self._endpoint(endpoint, params)
+        response = NBAStatsHTTP().send_api_request(endpoint=request.endpoint, parameters=request.parameters,
+                                                   proxy=request.proxy, headers=getattr(request, 'headers', None),
+                                                   timeout=request.timeout)
+        if response._status_code == 404:
+            raise MissingData(f"{endpoint} {snapshot_key(endpoint, params)} not found at {self.name}")
+        if response._status_code == 429 or response._status_code >= 500:
+            raise RetryableError(f"{endpoint} request failed with HTTP {response._status_code}")
+        if response._status_code != 200 or not response.valid_json():
+            raise BackendError(f"{endpoint} request failed with HTTP {response._status_code}")
+        return response.get_dict()
+
+    def players(self):
+        from nba_api.stats.static import players
+
+        return players.get_players()
+
+    def teams(self):
+        from nba_api.stats.static import teams
+
+        return teams.get_teams()
+
+    def activate(self):
+        from nba_api.stats.library.http import NBAStatsHTTP
+
+        rapsclient.install_session()
+        NBAStatsHTTP.base_url = STATS_BASE_URL
+
+    def close(self):
+        pass
+
+# nba_api pointed at a stand-in server; players and teams come from the
+# server too, so the stand-in's snapshot decides who exists
+class StandInBackend(LiveBackend):
+    # A local server answers at once, retries are still worth it
+    throttled = False
+
+    def __init__(self, url):
+        self.name = url.rstrip('/')
+
+    def _static(self, kind):
+        from nba_api.stats.library.http import NBAStatsHTTP
+
+        response = NBAStatsHTTP.get_session().get(f'{self.name}/static/{kind}', timeout=rapsclient.REQUEST_TIMEOUT)
+        response.raise_for_status()
+        return response.json()
+
+    def players(self):
+        return self._static('players')
+
+    def teams(self):
+        return self._static('teams')
+
+    def activate(self):
+        from nba_api.stats.library.http import NBAStatsHTTP
+
+        rapsclient.install_session()
+        NBAStatsHTTP.base_url = self.name + '/stats/{endpoint}'
+
+# Recorded responses in one SQLite file (see build_snapshot): players, teams
+# and zlib-compressed JSON responses keyed by endpoint and SNAPSHOT_KEYS
+class SnapshotBackend:
+    remote = False
+    throttled = False
+
+    def __init__(self, path):
+        if not os.path.exists(path):
+            raise BackendError(f"No NBA snapshot at {path}")
+        self.name = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True, check_same_thread=False)
+        self.conn.execute(f'PRAGMA mmap_size = {SNAPSHOT_MMAP_BYTES}')
+        self._players = None
+        self._teams = None
+
+    def _query(self, sql, params=()):
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def get(self, endpoint, params):
+        keys = SNAPSHOT_KEYS.get(endpoint)
+        if keys is None:
+            raise BackendError(f"Unsupported endpoint: {endpoint}")
+        key = snapshot_key(endpoint, params)
+        rows = self._query('SELECT payload FROM responses WHERE endpoint = ? AND key = ?', (endpoint, key))
+        if not rows:
+            raise MissingData(f"{endpoint} {key} is not in the snapshot {self.name}")
+        response = json.loads(zlib.decompress(rows[0][0]))
+
+        # The season's games are stored once; a DateFrom request gets the tail
+        date_from = _iso_date(params.get('DateFrom')) if endpoint == TEAM_GAMES else None
+        if date_from:
+            for result in response['resultSets']:
+                column = result['headers'].index('GAME_DATE')
+                result['rowSet'] = [row for row in result['rowSet'] if row[column][:10] >= date_from]
+        return response
+
+    def players(self):
+        if self._players is None:
+            self._players = [{'id': nba_id, 'full_name': full_name, 'is_active': bool(is_active)}
+                             for nba_id, full_name, is_active in
+                             self._query('SELECT id, full_name, is_active FROM players')]
+        return self._players
+
+    def teams(self):
+        if self._teams is None:
+            self._teams = [{'id': team_id, 'full_name': full_name, 'abbreviation': abbreviation}
+                           for team_id, full_name, abbreviation in
+                           self._query('SELECT id, full_name, abbreviation FROM teams')]
+        return self._teams
+
+    def activate(self):
+        pass
+
+    def close(self):
+        self.conn.close()
+
+def snapshot_key(endpoint, params):
+    return '/'.join(str(params.get(name, '')) for name in SNAPSHOT_KEYS[endpoint])
+
+def create_snapshot(path):
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE IF NOT EXISTS players (id INTEGER PRIMARY KEY, full_name TEXT NOT NULL, is_active INTEGER NOT NULL);
+        CREATE TABLE IF NOT EXISTS teams (id INTEGER PRIMARY KEY, full_name TEXT NOT NULL, abbreviation TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS responses (
+            endpoint TEXT NOT NULL,
+            key TEXT NOT NULL,
+            payload BLOB NOT NULL,
+            PRIMARY KEY (endpoint, key)
+        ) WITHOUT ROWID;
+    ''')
+    return conn
+
+def save_snapshot_response(conn, endpoint, params, response):
+    conn.execute('INSERT OR REPLACE INTO responses (endpoint, key, payload) VALUES (?, ?, ?)',
+                 (endpoint, snapshot_key(endpoint, params), zlib.compress(json.dumps(response).encode('utf-8'))))
+
+def save_snapshot_people(conn, players, teams):
+    conn.executemany('INSERT OR REPLACE INTO players (id, full_name, is_active) VALUES (?, ?, ?)',
+                     ((p['id'], p['full_name'], int(bool(p['is_active']))) for p in players))
+    conn.executemany('INSERT OR REPLACE INTO teams (id, full_name, abbreviation) VALUES (?, ?, ?)',
+                     ((t['id'], t['full_name'], t['abbreviation']) for t in teams))
+
+# Record what the app needs for some seasons from `source` (default: live)
+# into a snapshot file: every player and team, the league game logs, each
+# team's games and the dashboards of `nba_player_ids`. Adds to an existing
+# file. Returns {'responses': n, 'failed': [(endpoint, key, error)]}.
+def build_snapshot(path, seasons, nba_player_ids=(), team_names=None, source=None):
+    source = source or LiveBackend()
+    source.activate()
+    summary = {'responses': 0, 'failed': []}
+
+    conn = create_snapshot(path)
+    try:
+        teams = source.teams()
+        save_snapshot_people(conn, source.players(), teams)
+        team_ids = [team['id'] for team in teams if team_names is None or team['full_name'] in team_names]
+
+        calls = []
+        for season in seasons:
+            calls.append((LEAGUE_GAME_LOG, {'Season': season}))
+            calls.extend((TEAM_GAMES, {'TeamID': team_id, 'Season': season}) for team_id in team_ids)
+            calls.extend((PLAYER_DASHBOARD, {'PlayerID': nba_player_id, 'Season': season})
+                         for nba_player_id in nba_player_ids)
+
+        for endpoint, params in calls:
+            try:
+                save_snapshot_response(conn, endpoint, params, source.get(endpoint, params))
+            except Exception as e:
+                summary['failed'].append((endpoint, snapshot_key(endpoint, params), str(e)))
+                continue
+            summary['responses'] += 1
+            conn.commit()
+    finally:
+        conn.commit()
+        conn.close()
+    return summary
+
+_backend = None
+_backend_lock = threading.Lock()
+
+# Backend for a RAPTORS_NBA / --nba setting
+def open_backend(spec):
+    spec = (spec or LIVE).strip()
+    if spec == LIVE:
+        return LiveBackend()
+    if spec.startswith(('http://', 'https://')):
+        return StandInBackend(spec)
+    return SnapshotBackend(spec)
+
+# Switch every later request to a backend, given as one or a setting
+def use(spec_or_backend):
+    global _backend
+    backend = open_backend(spec_or_backend) if isinstance(spec_or_backend, (str, type(None))) else spec_or_backend
+    with _backend_lock:
+        previous, _backend = _backend, backend
+        backend.activate()
+    if previous is not None and previous is not backend:
+        previous.close()
+    return backend
+
+def get_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = open_backend(os.environ.get('RAPTORS_NBA'))
+            _backend.activate()
+        return _backend
+
+# The stats.nba.com response for an endpoint from the active backend; callers
+# asking for the same thing at the same time share one request
+def fetch(endpoint, **params):
+    backend = get_backend()
+    key = (backend.name, endpoint, tuple(sorted((name, str(value)) for name, value in params.items())))
+    return rapsclient.get_client().request(key, lambda: backend.get(endpoint, params),
+                                           remote=backend.remote, throttled=backend.throttled)
+
+def fetch_frame(endpoint, **params):
+    return result_frame(fetch(endpoint, **params))
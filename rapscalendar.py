@@ -0,0 +1,63 @@
+import calendar
+from datetime import date
+from itertools import groupby
+import rapsdb
+
+# Calendar weeks start on Sunday like the schedule view
+WEEKDAYS = ['Sun', 'Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat']
+
+# Months shown for a season with no games stored yet (October through June)
+SEASON_START_MONTH = 10
+SEASON_END_MONTH = 6
+
+# Games grouped by month from one ordered query:
+# {(year, month): {day: ["Opponent (Location, Time or Score)", ...]}}
+def load_schedule_months(season=None, team=None):
+    months = {}
+    games = rapsdb.get_dated_games(season, team)
+    for month_key, month_games in groupby(games, key=lambda game: game[0][:7]):
+        days = months.setdefault((int(month_key[:4]), int(month_key[5:7])), {})
+        for game_date, opponent, location, game_time, time_zone, result, team_score, opponent_score in month_games:
+            # Played games show the final score instead of the start time
+            detail = (rapsdb.format_score(result, team_score, opponent_score) or
+                      rapsdb.format_game_time(game_time, time_zone))
+            days.setdefault(int(game_date[8:10]), []).append(f"{opponent} ({location}, {detail})")
+    return months
+
+# Every (year, month) from the first to the last game of a season
+def season_months(season, first_day=None, last_day=None):
+    start_year = int(season[:4])
+    year, month = (int(first_day[:4]), int(first_day[5:7])) if first_day else (start_year, SEASON_START_MONTH)
+    last = (int(last_day[:4]), int(last_day[5:7])) if last_day else (start_year + 1, SEASON_END_MONTH)
+
+    months = []
+    while (year, month) <= last:
+        months.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+# Seasons stored for a team as {season: [(year, month), ...]}, oldest first;
+# falls back to the current season when there are no games yet
+def load_seasons(team=None):
+    seasons = {season: season_months(season, first_day, last_day)
+               for season, first_day, last_day in rapsdb.get_schedule_seasons(team)}
+    if not seasons:
+        season = rapsdb.season_for_date(date.today())
+        seasons[season] = season_months(season)
+    return seasons
+
+# The current season if it has games, otherwise the most recent one
+def default_season(seasons):
+    current = rapsdb.season_for_date(date.today())
+    return current if current in seasons else list(seasons)[-1]
+
+# Weeks of a month as lists of 7 day numbers, 0 for days outside the month
+def month_weeks(year, month):
+    first_weekday, days_in_month = calendar.monthrange(year, month)
+    offset = (first_weekday + 1) % 7  # monthrange counts from Monday
+    cells = [0] * offset + list(range(1, days_in_month + 1))
+    cells += [0] * (-len(cells) % 7)
+    return [cells[i:i + 7] for i in range(0, len(cells), 7)]
+
+def month_title(year, month):
+    return f"{calendar.month_name[month]} {year}"
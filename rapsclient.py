@@ -0,0 +1,175 @@
+# Shared client for every NBA request (see rapsbackend.fetch). Requests that
+# are already in flight are not sent twice: concurrent callers asking for the
+# same endpoint and parameters (e.g. clicking back and forth between two
+# players) wait on the first caller's future. Requests to stats.nba.com share
+# one pooled keep-alive HTTP session, are paced by a token bucket, time out
+# and are retried with exponential backoff when the failure is transient.
+import time
+import random
+import logging
+import threading
+from concurrent.futures import Future
+import rapsmetrics
+
+log = logging.getLogger(__name__)
+
+# stats.nba.com throttles bursts; a profile view needs two requests at once
+RATE = 2.0  # requests per second
+BURST = 4
+
+# Seconds to wait for a response (nba_api's own default is 30)
+REQUEST_TIMEOUT = 10
+
+# Retries after the first attempt, waiting BACKOFF_BASE * 2^attempt seconds
+# (plus up to 50% jitter), at most BACKOFF_MAX
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+
+# Keep-alive connections kept open per host
+POOL_SIZE = 8
+
+COUNTERS = ('requests', 'issued', 'coalesced', 'retried', 'failed')
+
+# Token bucket: `rate` tokens a second, holding at most `capacity`; acquire()
+# blocks until a token is free and returns how long it waited
+class TokenBucket:
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.rate:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # Take the token now (possibly going negative) so later callers
+            # queue up behind this one
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+# Failures worth another attempt: timeouts, dropped connections, HTTP 429/5xx
+def is_transient(error):
+    import requests
+    from rapsbackend import RetryableError
+
+    return isinstance(error, (RetryableError, requests.Timeout, requests.ConnectionError))
+
+def backoff_delay(attempt):
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)
+    return delay * (1 + random.random() / 2)
+
+class NBAClient:
+    def __init__(self, rate=RATE, burst=BURST, retries=MAX_RETRIES):
+        self.bucket = TokenBucket(rate, burst)
+        self.retries = retries
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._counters = dict.fromkeys(COUNTERS, 0)
+        self._throttled = 0.0
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+        rapsmetrics.increment(f'nba.client.{name}')
+
+    # Result of func() for `key`, sharing one call among concurrent callers.
+    # `remote` requests are retried on transient errors, `throttled` ones
+    # wait for the token bucket.
+    def request(self, key, func, remote=True, throttled=True):
+        with self._lock:
+            self._counters['requests'] += 1
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+        rapsmetrics.increment('nba.client.requests')
+
+        if not owner:
+            self._count('coalesced')
+            return future.result()
+
+        try:
+            result = self._issue(func, remote, throttled)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def _issue(self, func, remote, throttled):
+        attempt = 0
+        while True:
+            if throttled:
+                waited = self.bucket.acquire()
+                with self._lock:
+                    self._throttled += waited
+            self._count('issued')
+            try:
+                return func()
+            except Exception as e:
+                if not remote or attempt >= self.retries or not is_transient(e):
+                    self._count('failed')
+                    raise
+                delay = backoff_delay(attempt)
+                log.info("NBA request failed (%s), retrying in %.1f s", e, delay)
+                self._count('retried')
+                time.sleep(delay)
+                attempt += 1
+
+    # Pace requests at `rate` a second from now on; returns the previous rate
+    def set_rate(self, rate):
+        with self._lock:
+            previous = self.bucket.rate
+            self.bucket = TokenBucket(rate, self.bucket.capacity)
+        return previous
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters, throttled_seconds=round(self._throttled, 3), in_flight=len(self._inflight))
+
+_client = NBAClient()
+
+def get_client():
+    return _client
+
+# Replace the shared client, e.g. with a different rate
+def set_client(client):
+    global _client
+    _client = client
+
+def get_stats():
+    return _client.stats()
+
+_session_lock = threading.Lock()
+_session = None
+
+# One requests session with a keep-alive connection pool for nba_api, so
+# requests reuse connections instead of opening one each
+def install_session():
+    global _session
+    from nba_api.stats.library.http import NBAStatsHTTP
+
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+            _session.mount('http://', adapter)
+            _session.mount('https://', adapter)
+        NBAStatsHTTP.set_session(_session)
+    return _session
@@ -1,10 +1,264 @@
+import re
+import json
 import sqlite3
+import threading
+import queue
+import logging
+from datetime import date, datetime
+from contextlib import contextmanager
+from itertools import islice
+from collections import namedtuple
+import rapsmetrics
 
-# Function to create the database and the roster table
-def create_database():
-    conn = sqlite3.connect('raptors.db')
-    cursor = conn.cursor()
-    cursor.execute('''
+log = logging.getLogger(__name__)
+
+DB_PATH = 'raptors.db'
+
+# Default connection settings; WAL lets readers run alongside a writer and
+# synchronous=NORMAL avoids an fsync on every commit in WAL mode
+JOURNAL_MODE = 'WAL'
+SYNCHRONOUS = 'NORMAL'
+POOL_SIZE = 4
+
+# Rows per executemany batch when bulk importing
+IMPORT_CHUNK_SIZE = 1000
+
+# Long-lived connection manager shared by every function in this module.
+# Each thread borrows one connection from a small pool for the duration of a
+# connection()/transaction() block; nested blocks on the same thread reuse it.
+class ConnectionManager:
+    def __init__(self, path=DB_PATH, pool_size=POOL_SIZE,
+                 journal_mode=JOURNAL_MODE, synchronous=SYNCHRONOUS):
+        self.path = path
+        self.pool_size = pool_size
+        self.journal_mode = journal_mode
+        self.synchronous = synchronous
+        self._pool = queue.LifoQueue()
+        self._all = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _open(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        if self.journal_mode:
+            conn.execute(f'PRAGMA journal_mode={self.journal_mode}')
+        if self.synchronous:
+            conn.execute(f'PRAGMA synchronous={self.synchronous}')
+        conn.execute('PRAGMA foreign_keys=ON')
+        return conn
+
+    def _acquire(self):
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self._all) < self.pool_size:
+                conn = self._open()
+                self._all.append(conn)
+                return conn
+        # Pool exhausted, wait for another thread to hand one back
+        return self._pool.get()
+
+    # Borrow this thread's connection (no transaction handling)
+    @contextmanager
+    def connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            yield conn
+            return
+        conn = self._acquire()
+        self._local.conn = conn
+        self._local.depth = 0
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._local.conn = None
+            self._pool.put(conn)
+
+    # Run a block in a single transaction; nested blocks join the outer one
+    @contextmanager
+    def transaction(self):
+        with self.connection() as conn:
+            if self._local.depth:
+                self._local.depth += 1
+                try:
+                    yield conn
+                finally:
+                    self._local.depth -= 1
+                return
+            self._local.depth = 1
+            try:
+                # Explicit BEGIN so schema changes are part of the transaction too
+                conn.execute('BEGIN IMMEDIATE')
+                yield conn
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            finally:
+                self._local.depth = 0
+
+    def close(self):
+        with self._lock:
+            for conn in self._all:
+                conn.close()
+            self._all = []
+            self._pool = queue.LifoQueue()
+
+_manager = None
+_manager_lock = threading.Lock()
+
+# Function to (re)configure the shared connection manager
+def configure(path=DB_PATH, pool_size=POOL_SIZE, journal_mode=JOURNAL_MODE, synchronous=SYNCHRONOUS):
+    global _manager
+    _flush_pending_writes()
+    with _manager_lock:
+        if _manager is not None:
+            _manager.close()
+        _manager = ConnectionManager(path, pool_size, journal_mode, synchronous)
+    return _manager
+
+def get_manager():
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = ConnectionManager()
+    return _manager
+
+def connection():
+    return get_manager().connection()
+
+def transaction():
+    return get_manager().transaction()
+
+def close_connections():
+    _flush_pending_writes()
+    if _manager is not None:
+        _manager.close()
+
+# Write batched stats cache hits (see get_cached_stats) before the database
+# they belong to is closed or swapped; losing them only costs LRU accuracy
+def _flush_pending_writes():
+    if _manager is None:
+        return
+    try:
+        flush_cache_accesses()
+    except sqlite3.Error as e:
+        log.warning("Could not record stats cache accesses: %s", e)
+
+# Value conversions between what users type and the typed columns
+
+# Height in inches from "6'6", "6' 7\"", "6-6", "6 ft 6 in", "78" or "7" (feet)
+def parse_height(height):
+    text = str(height).strip().lower()
+    match = re.match(r'''^(\d+)\s*(?:'|ft|feet|-)\s*(\d+)?\s*(?:"|''|in|inches)?$''', text)
+    if match:
+        return int(match.group(1)) * 12 + int(match.group(2) or 0)
+    match = re.match(r'^(\d+)\s*(?:"|in|inches)?$', text)
+    if match:
+        value = int(match.group(1))
+        return value * 12 if value <= 8 else value
+    return None
+
+def format_height(height_in):
+    if height_in is None:
+        return ''
+    return f"{height_in // 12}'{height_in % 12}"
+
+# Weight in pounds from "214 lbs", "214" or 214
+def parse_weight(weight):
+    match = re.search(r'\d+', str(weight))
+    return int(match.group()) if match else None
+
+def format_weight(weight_lb):
+    return '' if weight_lb is None else f"{weight_lb} lbs"
+
+# Salary in whole cents from "25794643", "$25,794,643.00" or a number; 0 if invalid
+def salary_to_cents(salary):
+    try:
+        return int(round(float(str(salary).replace('$', '').replace(',', '').strip()) * 100))
+    except (ValueError, OverflowError):
+        return 0
+
+def format_salary(salary_cents):
+    return f"${(salary_cents or 0) / 100:,.2f}"
+
+def parse_int(value, default=0):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+# Date formats accepted for game_date, first match wins
+GAME_DATE_FORMATS = ['%Y-%m-%d', '%m-%d-%Y']
+
+# Convert a game date to an ISO "YYYY-MM-DD" string, None if it can't be parsed
+def normalize_game_date(game_date):
+    text = str(game_date).strip()
+
+    # ISO dates are by far the most common, date.fromisoformat is much cheaper than strptime
+    if len(text) == 10 and text[4] == '-':
+        try:
+            return date.fromisoformat(text).isoformat()
+        except ValueError:
+            pass
+
+    for date_format in GAME_DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format).date().isoformat()
+        except ValueError:
+            continue
+    return None
+
+GAME_TIME_PATTERN = re.compile(r'^(\d{1,2})(?::(\d{2}))?\s*([ap])\.?m\.?\s*([a-z]{1,5})?$', re.IGNORECASE)
+
+# Split "7:30PM EST" / "07:30 PM EST" into ("19:30", "EST"); ("", "") if unknown
+def parse_game_time(time):
+    text = str(time).strip()
+    match = GAME_TIME_PATTERN.match(text)
+    if match:
+        hour = int(match.group(1)) % 12 + (12 if match.group(3).lower() == 'p' else 0)
+        return f"{hour:02d}:{match.group(2) or '00'}", (match.group(4) or '').upper()
+    match = re.match(r'^(\d{1,2}):(\d{2})\s*([a-z]{1,5})?$', text, re.IGNORECASE)
+    if match and int(match.group(1)) < 24:
+        return f"{int(match.group(1)):02d}:{match.group(2)}", (match.group(3) or '').upper()
+    return '', ''
+
+# Display form of a stored game time, e.g. "7:30 PM EST"
+def format_game_time(game_time, time_zone=''):
+    if not game_time:
+        return 'TBD'
+    hour, minute = int(game_time[:2]), game_time[3:5]
+    label = f"{hour % 12 or 12}:{minute} {'PM' if hour >= 12 else 'AM'}"
+    return f"{label} {time_zone}" if time_zone else label
+
+# Team whose games are stored when none is given
+DEFAULT_TEAM = 'Toronto Raptors'
+
+# NBA season label for a date; seasons start in October, e.g. 2025-02-01 -> "2024-25"
+def season_for_date(day):
+    start = day.year if day.month >= 10 else day.year - 1
+    return f"{start}-{(start + 1) % 100:02d}"
+
+# Same as season_for_date for an ISO date string
+def season_for_game_day(game_day):
+    if not game_day:
+        return None
+    return season_for_date(date.fromisoformat(game_day))
+
+# Schema migrations, applied in order and tracked with PRAGMA user_version
+
+def _columns(conn, table):
+    return [column[1] for column in conn.execute(f"PRAGMA table_info({table})")]
+
+# Version 1 brings an empty database, or one made by any earlier release of the
+# app, up to the layout the app had before typed columns
+def _migration_1_baseline(conn):
+    conn.execute('''
         CREATE TABLE IF NOT EXISTS roster (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             name TEXT NOT NULL,
@@ -15,138 +269,1118 @@ def create_database():
             salary REAL NOT NULL
         )
     ''')
-    conn.commit()
-    conn.close()
+    if 'nba_id' not in _columns(conn, 'roster'):
+        conn.execute("ALTER TABLE roster ADD COLUMN nba_id INTEGER")
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schedule (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            game_date TEXT NOT NULL,
+            opponent TEXT NOT NULL,
+            location TEXT NOT NULL,
+            time TEXT NOT NULL
+        )
+    ''')
+    columns = _columns(conn, 'schedule')
+    if 'time' not in columns:
+        conn.execute("ALTER TABLE schedule ADD COLUMN time TEXT NOT NULL DEFAULT ''")
+    if 'game_day' not in columns:
+        conn.execute("ALTER TABLE schedule ADD COLUMN game_day TEXT")
+    if 'season' not in columns:
+        conn.execute("ALTER TABLE schedule ADD COLUMN season TEXT")
+    if 'team' not in columns:
+        conn.execute(f"ALTER TABLE schedule ADD COLUMN team TEXT NOT NULL DEFAULT '{DEFAULT_TEAM}'")
+
+    # Backfill the derived date and season columns
+    missing = conn.execute('SELECT id, game_date FROM schedule WHERE game_day IS NULL').fetchall()
+    conn.executemany('UPDATE schedule SET game_day = ? WHERE id = ?',
+                     [(normalize_game_date(game_date), game_id) for game_id, game_date in missing])
+    missing = conn.execute(
+        'SELECT id, game_day FROM schedule WHERE season IS NULL AND game_day IS NOT NULL'
+    ).fetchall()
+    conn.executemany('UPDATE schedule SET season = ? WHERE id = ?',
+                     [(season_for_game_day(game_day), game_id) for game_id, game_day in missing])
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS nba_players (
+            normalized_name TEXT PRIMARY KEY,
+            nba_id INTEGER NOT NULL,
+            full_name TEXT NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS stats_cache (
+            nba_player_id INTEGER NOT NULL,
+            season TEXT NOT NULL,
+            endpoint TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            fetched_at REAL NOT NULL,
+            accessed_at REAL NOT NULL,
+            PRIMARY KEY (nba_player_id, season, endpoint)
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_stats_cache_accessed ON stats_cache (accessed_at)')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS player_season_stats (
+            nba_player_id INTEGER NOT NULL,
+            season TEXT NOT NULL,
+            gp INTEGER NOT NULL,
+            ppg REAL NOT NULL,
+            rpg REAL NOT NULL,
+            apg REAL NOT NULL,
+            fg_pct REAL,
+            fg3_pct REAL,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (nba_player_id, season)
+        )
+    ''')
+
+# Version 2 rebuilds roster and schedule with typed columns: height in inches,
+# weight in pounds, salary in integer cents, ISO game dates and 24h game times.
+# Games that can't be carried over (no parseable date, or a duplicate of an
+# earlier game) are moved to schedule_rejected rather than dropped.
+def _migration_2_typed_columns(conn):
+    conn.execute('''
+        CREATE TABLE roster_typed (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            position TEXT NOT NULL,
+            age INTEGER NOT NULL,
+            height_in INTEGER,
+            weight_lb INTEGER,
+            salary_cents INTEGER NOT NULL DEFAULT 0,
+            nba_id INTEGER
+        )
+    ''')
+    players = conn.execute('SELECT id, name, position, age, height, weight, salary, nba_id FROM roster')
+    conn.executemany('''
+        INSERT INTO roster_typed (id, name, position, age, height_in, weight_lb, salary_cents, nba_id)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', [
+        (player_id, name, position, parse_int(age), parse_height(height), parse_weight(weight),
+         salary_to_cents(salary), nba_id)
+        for player_id, name, position, age, height, weight, salary, nba_id in players.fetchall()
+    ])
+    conn.execute('DROP TABLE roster')
+    conn.execute('ALTER TABLE roster_typed RENAME TO roster')
+
+    conn.execute('CREATE INDEX idx_roster_name ON roster (name COLLATE NOCASE)')
+    conn.execute('CREATE INDEX idx_roster_position ON roster (position, name)')
+    conn.execute('CREATE INDEX idx_roster_age ON roster (age)')
+    conn.execute('CREATE INDEX idx_roster_salary ON roster (salary_cents)')
+    conn.execute('CREATE INDEX idx_roster_nba_id ON roster (nba_id)')
+
+    conn.execute('''
+        CREATE TABLE schedule_typed (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            team TEXT NOT NULL,
+            season TEXT NOT NULL,
+            game_date TEXT NOT NULL,
+            game_time TEXT NOT NULL DEFAULT '',
+            time_zone TEXT NOT NULL DEFAULT '',
+            opponent TEXT NOT NULL,
+            location TEXT NOT NULL
+        )
+    ''')
+    conn.execute('''
+        CREATE UNIQUE INDEX idx_schedule_team_game
+        ON schedule_typed (team, game_date, opponent, location, game_time)
+    ''')
+    games = conn.execute('''
+        SELECT id, team, game_day, time, opponent, location FROM schedule
+        WHERE game_day IS NOT NULL ORDER BY id
+    ''')
+    conn.executemany('''
+        INSERT OR IGNORE INTO schedule_typed
+            (id, team, season, game_date, game_time, time_zone, opponent, location)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', [
+        (game_id, team, season_for_game_day(game_day), game_day, *parse_game_time(time),
+         opponent.strip(), location.strip())
+        for game_id, team, game_day, time, opponent, location in games.fetchall()
+    ])
+
+    conn.execute('''
+        CREATE TABLE schedule_rejected (
+            id INTEGER PRIMARY KEY,
+            team TEXT,
+            game_day TEXT,
+            time TEXT,
+            opponent TEXT,
+            location TEXT,
+            reason TEXT NOT NULL
+        )
+    ''')
+    conn.execute('''
+        INSERT INTO schedule_rejected (id, team, game_day, time, opponent, location, reason)
+        SELECT id, team, game_day, time, opponent, location,
+               CASE WHEN game_day IS NULL THEN 'no date' ELSE 'duplicate' END
+        FROM schedule
+        WHERE id NOT IN (SELECT id FROM schedule_typed)
+    ''')
+    rejected = conn.execute('SELECT COUNT(*) FROM schedule_rejected').fetchone()[0]
+    if rejected:
+        log.warning("%d games could not be migrated (no date or duplicate); they were kept in "
+                    "the schedule_rejected table", rejected)
+    conn.execute('DROP TABLE schedule')
+    conn.execute('ALTER TABLE schedule_typed RENAME TO schedule')
+
+    conn.execute('CREATE INDEX idx_schedule_season ON schedule (season, game_date)')
+    conn.execute('CREATE INDEX idx_schedule_date ON schedule (game_date)')
+
+# Version 3 adds a version counter per table, bumped by triggers on every row
+# change, so readers can tell cheaply whether anything changed (HTTP ETags)
+def _migration_3_change_counters(conn):
+    conn.execute('''
+        CREATE TABLE change_counters (
+            table_name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    ''')
+    for table in ('roster', 'schedule', 'player_season_stats'):
+        conn.execute('INSERT INTO change_counters (table_name) VALUES (?)', (table,))
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            conn.execute(f'''
+                CREATE TRIGGER trg_{table}_{event.lower()}_version AFTER {event} ON {table}
+                BEGIN
+                    UPDATE change_counters SET version = version + 1 WHERE table_name = '{table}';
+                END
+            ''')
+
+# Version 4 adds FTS5 indexes over roster names/positions and schedule
+# opponents. They are external-content tables (the text stays in roster
+# and schedule) kept in sync by triggers; the prefix indexes make
+# search-as-you-type prefix queries cheap.
+def _migration_4_search(conn):
+    for table, columns in (('roster', ('name', 'position')), ('schedule', ('opponent',))):
+        index = f'{table}_search'
+        new_values = ', '.join(f'new.{column}' for column in columns)
+        old_values = ', '.join(f'old.{column}' for column in columns)
+        column_list = ', '.join(columns)
+
+        conn.execute(f'''
+            CREATE VIRTUAL TABLE {index} USING fts5(
+                {column_list}, content='{table}', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2', prefix='1 2 3'
+            )
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER trg_{index}_insert AFTER INSERT ON {table} BEGIN
+                INSERT INTO {index} (rowid, {column_list}) VALUES (new.id, {new_values});
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER trg_{index}_delete AFTER DELETE ON {table} BEGIN
+                INSERT INTO {index} ({index}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER trg_{index}_update AFTER UPDATE OF {column_list} ON {table} BEGIN
+                INSERT INTO {index} ({index}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});
+                INSERT INTO {index} (rowid, {column_list}) VALUES (new.id, {new_values});
+            END
+        ''')
+        conn.execute(f"INSERT INTO {index} ({index}) VALUES ('rebuild')")
+
+# Version 5 stores per-game box scores, pulled a season at a time for the
+# whole league, which the stats engine (rapsstats) aggregates locally
+def _migration_5_game_logs(conn):
+    conn.execute('''
+        CREATE TABLE game_logs (
+            nba_player_id INTEGER NOT NULL,
+            game_id TEXT NOT NULL,
+            season TEXT NOT NULL,
+            game_date TEXT NOT NULL,
+            team TEXT NOT NULL,
+            matchup TEXT NOT NULL,
+            home INTEGER NOT NULL,
+            wl TEXT,
+            minutes REAL,
+            fgm INTEGER, fga INTEGER, fg3m INTEGER, fg3a INTEGER, ftm INTEGER, fta INTEGER,
+            oreb INTEGER, dreb INTEGER, reb INTEGER, ast INTEGER, stl INTEGER, blk INTEGER,
+            tov INTEGER, pf INTEGER, pts INTEGER, plus_minus INTEGER,
+            PRIMARY KEY (nba_player_id, game_id)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('CREATE INDEX idx_game_logs_season ON game_logs (season, nba_player_id, game_date)')
+
+# Version 6 adds final scores to schedule rows and remembers, per team and
+# season, the last game date synced from the NBA API (rapsnba.sync_team_results)
+def _migration_6_results(conn):
+    conn.execute('ALTER TABLE schedule ADD COLUMN game_id TEXT')
+    conn.execute('ALTER TABLE schedule ADD COLUMN team_score INTEGER')
+    conn.execute('ALTER TABLE schedule ADD COLUMN opponent_score INTEGER')
+    conn.execute('ALTER TABLE schedule ADD COLUMN result TEXT')
+    conn.execute('''
+        CREATE TABLE sync_state (
+            team TEXT NOT NULL,
+            season TEXT NOT NULL,
+            last_game_date TEXT NOT NULL,
+            synced_at REAL NOT NULL,
+            PRIMARY KEY (team, season)
+        ) WITHOUT ROWID
+    ''')
+
+# Version 7 adds an append-only journal of roster changes written by triggers.
+# Each entry records the row before and after as JSON, the batch (one user
+# action, e.g. an edit or a whole import) and its origin (edit, undo or redo),
+# both read from the one-row journal_context table that rapsdb sets before
+# writing. roster_history holds the undo and redo stacks of batches.
+def _migration_7_roster_journal(conn):
+    conn.execute('''
+        CREATE TABLE roster_journal (
+            version INTEGER PRIMARY KEY AUTOINCREMENT,
+            batch INTEGER NOT NULL,
+            origin TEXT NOT NULL,
+            player_id INTEGER NOT NULL,
+            action TEXT NOT NULL,
+            old_row TEXT,
+            new_row TEXT,
+            changed_at REAL NOT NULL
+        )
+    ''')
+    conn.execute('CREATE INDEX idx_roster_journal_batch ON roster_journal (batch)')
+    conn.execute('''
+        CREATE TABLE journal_context (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            batch INTEGER NOT NULL,
+            origin TEXT NOT NULL
+        )
+    ''')
+    conn.execute("INSERT INTO journal_context (id, batch, origin) VALUES (1, 0, 'edit')")
+    conn.execute('''
+        CREATE TABLE roster_history (
+            batch INTEGER PRIMARY KEY,
+            stack TEXT NOT NULL
+        )
+    ''')
+
+    columns = ['id', 'name', 'position', 'age', 'height_in', 'weight_lb', 'salary_cents', 'nba_id']
+    def row_json(ref):
+        return 'json_object(' + ', '.join(f"'{column}', {ref}.{column}" for column in columns) + ')'
+    now = "(julianday('now') - 2440587.5) * 86400.0"
+
+    for event, old_row, new_row, player_id, condition in (
+        ('INSERT', 'NULL', row_json('new'), 'new.id', ''),
+        ('DELETE', row_json('old'), 'NULL', 'old.id', ''),
+        # nba_id is a lookup cache, changes to it alone are not user edits
+        ('UPDATE', row_json('old'), row_json('new'), 'new.id',
+         'WHEN ' + ' OR '.join(f'old.{column} IS NOT new.{column}' for column in columns[:-1]))
+    ):
+        conn.execute(f'''
+            CREATE TRIGGER trg_roster_journal_{event.lower()} AFTER {event} ON roster {condition}
+            BEGIN
+                INSERT INTO roster_journal (batch, origin, player_id, action, old_row, new_row, changed_at)
+                SELECT batch, origin, {player_id}, '{event.lower()}', {old_row}, {new_row}, {now}
+                FROM journal_context;
+            END
+        ''')
+
+    for event in ('UPDATE', 'DELETE'):
+        conn.execute(f'''
+            CREATE TRIGGER trg_roster_journal_no_{event.lower()} BEFORE {event} ON roster_journal
+            BEGIN
+                SELECT RAISE(ABORT, 'roster_journal is append-only');
+            END
+        ''')
+
+MIGRATIONS = [
+    _migration_1_baseline,
+    _migration_2_typed_columns,
+    _migration_3_change_counters,
+    _migration_4_search,
+    _migration_5_game_logs,
+    _migration_6_results,
+    _migration_7_roster_journal
+]
+
+def get_schema_version():
+    with connection() as conn:
+        return conn.execute('PRAGMA user_version').fetchone()[0]
+
+# Bring the database up to date in a single transaction, returns the new version
+def migrate():
+    with transaction() as conn:
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+            migration(conn)
+            conn.execute(f'PRAGMA user_version = {number}')
+        return max(version, len(MIGRATIONS))
+
+# Current change counter of each table as {table_name: version}
+def get_table_versions(tables):
+    with connection() as conn:
+        rows = conn.execute(
+            f"SELECT table_name, version FROM change_counters WHERE table_name IN ({', '.join('?' * len(tables))})",
+            list(tables)
+        ).fetchall()
+        return dict(rows)
+
+# Function to create the database and the roster table (now part of migrate)
+def create_database():
+    migrate()
+
+# Display helpers shared by the roster row types
+class _PlayerDisplay:
+    __slots__ = ()
+
+    @property
+    def height(self):
+        return format_height(self.height_in)
+
+    @property
+    def weight(self):
+        return format_weight(self.weight_lb)
+
+    @property
+    def salary(self):
+        return format_salary(self.salary_cents)
+
+# A roster row as stored
+class Player(_PlayerDisplay, namedtuple('Player', ['id', 'name', 'position', 'age', 'height_in',
+                                                   'weight_lb', 'salary_cents', 'nba_id'])):
+    __slots__ = ()
+
+PLAYER_COLUMNS = 'id, name, position, age, height_in, weight_lb, salary_cents, nba_id'
 
 # Function to add a player to the roster
 def add_player(name, position, age, height, weight, salary):
-    conn = sqlite3.connect('raptors.db')
-    cursor = conn.cursor()
-    
-    # Convert salary to float, handle potential input errors
-    try:
-        salary = float(salary)
-    except ValueError:
-        salary = 0.0
-    
-    cursor.execute('''
-        INSERT INTO roster (name, position, age, height, weight, salary)
-        VALUES (?, ?, ?, ?, ?, ?)
-    ''', (name, position, age, height, weight, salary))
-    
-    conn.commit()
-    conn.close()
+    with transaction() as conn:
+        _begin_roster_batch(conn)
+        cursor = conn.execute('''
+            INSERT INTO roster (name, position, age, height_in, weight_lb, salary_cents)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (name, position, parse_int(age), parse_height(height), parse_weight(weight),
+              salary_to_cents(salary)))
+        return cursor.lastrowid
 
 # Function to delete a player from the roster
 def delete_player_from_db(player_id):
-    conn = sqlite3.connect('raptors.db')
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        DELETE FROM roster WHERE id = ?
-    ''', (player_id,))
-    
-    conn.commit()
-    conn.close()
+    with transaction() as conn:
+        _begin_roster_batch(conn)
+        conn.execute('''
+            DELETE FROM roster WHERE id = ?
+        ''', (player_id,))
 
 # Function to retrieve all players from the roster
 def get_all_players():
-    conn = sqlite3.connect('raptors.db')
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT * FROM roster')
-    players = cursor.fetchall()
-    
-    conn.close()
-    return players
+    with connection() as conn:
+        return [Player(*row) for row in conn.execute(f'SELECT {PLAYER_COLUMNS} FROM roster')]
 
 # Function to update a player's information
 def update_player(player_id, name, position, age, height, weight, salary):
-    conn = sqlite3.connect('raptors.db')
-    cursor = conn.cursor()
-    
-    # Convert salary to float, handle potential input errors
-    try:
-        salary = float(salary)
-    except ValueError:
-        salary = 0.0
-    
-    cursor.execute('''
-        UPDATE roster 
-        SET name=?, position=?, age=?, height=?, weight=?, salary=?
-        WHERE id=?
-    ''', (name, position, age, height, weight, salary, player_id))
-    
-    conn.commit()
-    conn.close()
+    # A renamed player has to be matched to an NBA ID again
+    with transaction() as conn:
+        _begin_roster_batch(conn)
+        conn.execute('''
+            UPDATE roster 
+            SET name=?, position=?, age=?, height_in=?, weight_lb=?, salary_cents=?,
+                nba_id = CASE WHEN name = ? THEN nba_id ELSE NULL END
+            WHERE id=?
+        ''', (name, position, parse_int(age), parse_height(height), parse_weight(weight),
+              salary_to_cents(salary), name, player_id))
+
+# Roster change journal, undo and redo
+
+# One roster_journal entry; old_row/new_row are dicts of the roster columns (None
+# for the side that doesn't exist) and action is 'insert', 'update' or 'delete'
+RosterChange = namedtuple('RosterChange', ['version', 'batch', 'origin', 'player_id', 'action',
+                                           'old_row', 'new_row', 'changed_at'])
+
+ROSTER_CHANGE_COLUMNS = 'version, batch, origin, player_id, action, old_row, new_row, changed_at'
+
+def _roster_change(row):
+    version, batch, origin, player_id, action, old_row, new_row, changed_at = row
+    return RosterChange(version, batch, origin, player_id, action,
+                        json.loads(old_row) if old_row else None,
+                        json.loads(new_row) if new_row else None, changed_at)
+
+# Start a new undoable batch for the roster writes in this transaction; a new
+# edit makes the undone batches impossible to redo
+def _begin_roster_batch(conn):
+    batch = conn.execute('''
+        SELECT MAX(COALESCE((SELECT MAX(batch) FROM roster_history), 0),
+                   COALESCE((SELECT MAX(batch) FROM roster_journal), 0)) + 1
+    ''').fetchone()[0]
+    conn.execute("DELETE FROM roster_history WHERE stack = 'redo'")
+    conn.execute("INSERT INTO roster_history (batch, stack) VALUES (?, 'undo')", (batch,))
+    conn.execute("UPDATE journal_context SET batch = ?, origin = 'edit'", (batch,))
+    return batch
+
+# Latest journal version, 0 before the first change
+def get_roster_version():
+    with connection() as conn:
+        return conn.execute('SELECT COALESCE(MAX(version), 0) FROM roster_journal').fetchone()[0]
+
+# Journal entries after `since_version`, oldest first
+def get_roster_changes(since_version=0, limit=None):
+    sql = f'SELECT {ROSTER_CHANGE_COLUMNS} FROM roster_journal WHERE version > ? ORDER BY version'
+    params = [since_version]
+    if limit is not None:
+        sql += ' LIMIT ?'
+        params.append(limit)
+    with connection() as conn:
+        return [_roster_change(row) for row in conn.execute(sql, params)]
+
+# Number of batches that can be undone and redone
+def get_undo_state():
+    with connection() as conn:
+        counts = dict(conn.execute('SELECT stack, COUNT(*) FROM roster_history GROUP BY stack').fetchall())
+        return counts.get('undo', 0), counts.get('redo', 0)
+
+# Write one side of a journal entry back to the roster: `row` is the dict to
+# restore, or None to remove the player
+def _restore_player(conn, player_id, row):
+    if row is None:
+        conn.execute('DELETE FROM roster WHERE id = ?', (player_id,))
+        return
+    values = [row[column] for column in PLAYER_COLUMNS.split(', ')]
+    conn.execute(UPSERT_PLAYER_SQL, values)
+
+# Undo or redo the newest batch on one stack, returns the player ids it
+# touched, or None when there is nothing to undo/redo
+def _replay_batch(stack, origin):
+    with transaction() as conn:
+        # Undo takes the newest batch; redo the one undone most recently
+        row = conn.execute(f'''
+            SELECT batch FROM roster_history WHERE stack = ?
+            ORDER BY batch {'DESC' if stack == 'undo' else 'ASC'} LIMIT 1
+        ''', (stack,)).fetchone()
+        if row is None:
+            return None
+        batch = row[0]
+
+        changes = [_roster_change(change) for change in conn.execute(f'''
+            SELECT {ROSTER_CHANGE_COLUMNS} FROM roster_journal
+            WHERE batch = ? AND origin = 'edit' ORDER BY version {'DESC' if stack == 'undo' else 'ASC'}
+        ''', (batch,))]
+
+        conn.execute('UPDATE journal_context SET batch = ?, origin = ?', (batch, origin))
+        for change in changes:
+            _restore_player(conn, change.player_id, change.old_row if stack == 'undo' else change.new_row)
+        conn.execute("UPDATE journal_context SET origin = 'edit'")
+
+        conn.execute('UPDATE roster_history SET stack = ? WHERE batch = ?',
+                     ('redo' if stack == 'undo' else 'undo', batch))
+        return list(dict.fromkeys(change.player_id for change in changes))
+
+def undo_roster_change():
+    return _replay_batch('undo', 'undo')
+
+def redo_roster_change():
+    return _replay_batch('redo', 'redo')
+
+# Stream every roster row in id order without loading the table into memory
+def iter_players():
+    with connection() as conn:
+        for row in conn.execute(f'SELECT {PLAYER_COLUMNS} FROM roster ORDER BY id'):
+            yield Player(*row)
+
+UPSERT_PLAYER_SQL = '''
+    INSERT INTO roster (id, name, position, age, height_in, weight_lb, salary_cents, nba_id)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (id) DO UPDATE SET
+        name = excluded.name, position = excluded.position, age = excluded.age,
+        height_in = excluded.height_in, weight_lb = excluded.weight_lb,
+        salary_cents = excluded.salary_cents, nba_id = excluded.nba_id
+'''
+
+# Bulk insert or update roster rows in one transaction, returns the number written.
+# `rows` are (id, name, position, age, height_in, weight_lb, salary_cents, nba_id)
+# tuples with typed values; rows with an id replace that player, id None adds one.
+def import_players(rows, chunk_size=IMPORT_CHUNK_SIZE):
+    written = 0
+    rows = iter(rows)
+    with transaction() as conn:
+        # The whole import is undone in one step
+        _begin_roster_batch(conn)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            conn.executemany(UPSERT_PLAYER_SQL, chunk)
+            written += len(chunk)
+    return written
 
 # Function to retrieve a player by ID
 def get_player_by_id(player_id):
-    conn = sqlite3.connect('raptors.db')
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT * FROM roster WHERE id = ?', (player_id,))
-    player = cursor.fetchone()
-    
-    conn.close()
-    return player
+    with connection() as conn:
+        row = conn.execute(f'SELECT {PLAYER_COLUMNS} FROM roster WHERE id = ?', (player_id,)).fetchone()
+        return Player(*row) if row else None
+
+def get_player_nba_id(player_id):
+    with connection() as conn:
+        row = conn.execute('SELECT nba_id FROM roster WHERE id = ?', (player_id,)).fetchone()
+        return row[0] if row else None
+
+def set_player_nba_id(player_id, nba_id):
+    with transaction() as conn:
+        conn.execute('UPDATE roster SET nba_id = ? WHERE id = ?', (nba_id, player_id))
+
+# NBA player lookup table, keyed by normalized name (see rapsnba.normalize_name)
+def count_nba_players():
+    with connection() as conn:
+        return conn.execute('SELECT COUNT(*) FROM nba_players').fetchone()[0]
+
+# Store (normalized_name, nba_id, full_name) rows, later rows win on clashes
+def save_nba_players(rows):
+    with transaction() as conn:
+        conn.executemany('''
+            INSERT OR REPLACE INTO nba_players (normalized_name, nba_id, full_name)
+            VALUES (?, ?, ?)
+        ''', rows)
+
+def find_nba_player_id(normalized_name):
+    with connection() as conn:
+        row = conn.execute('SELECT nba_id FROM nba_players WHERE normalized_name = ?',
+                           (normalized_name,)).fetchone()
+        return row[0] if row else None
+
+def get_nba_player_names():
+    with connection() as conn:
+        return [row[0] for row in conn.execute('SELECT normalized_name FROM nba_players')]
+
+# Cache hits waiting to be written to stats_cache.accessed_at, so reads don't
+# need a write transaction; flushed in batches and before any eviction
+_cache_accesses = {}
+_cache_access_lock = threading.Lock()
+CACHE_ACCESS_BATCH = 100
+
+# Persistent cache of NBA API responses keyed by (player, season, endpoint).
+# Returns (payload, fetched_at) or None, and marks the entry as recently used
+def get_cached_stats(nba_player_id, season, endpoint, now):
+    key = (nba_player_id, season, endpoint)
+    with connection() as conn:
+        row = conn.execute('''
+            SELECT payload, fetched_at FROM stats_cache
+            WHERE nba_player_id = ? AND season = ? AND endpoint = ?
+        ''', key).fetchone()
+    if row:
+        with _cache_access_lock:
+            _cache_accesses[key] = now
+            full = len(_cache_accesses) >= CACHE_ACCESS_BATCH
+        if full:
+            flush_cache_accesses()
+    return row
+
+# Write the pending cache hits' access times
+def flush_cache_accesses():
+    with _cache_access_lock:
+        accesses = [(now,) + key for key, now in _cache_accesses.items()]
+        _cache_accesses.clear()
+    if accesses:
+        with transaction() as conn:
+            _write_cache_accesses(conn, accesses)
+
+def _write_cache_accesses(conn, accesses):
+    conn.executemany('''
+        UPDATE stats_cache SET accessed_at = MAX(accessed_at, ?)
+        WHERE nba_player_id = ? AND season = ? AND endpoint = ?
+    ''', accesses)
+
+# Store a payload and evict the least recently used entries above max_entries
+def put_cached_stats(nba_player_id, season, endpoint, payload, now, max_entries):
+    with _cache_access_lock:
+        accesses = [(when,) + key for key, when in _cache_accesses.items()]
+        _cache_accesses.clear()
+    with transaction() as conn:
+        _write_cache_accesses(conn, accesses)
+        conn.execute('''
+            INSERT OR REPLACE INTO stats_cache
+                (nba_player_id, season, endpoint, payload, fetched_at, accessed_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (nba_player_id, season, endpoint, payload, now, now))
+        conn.execute('''
+            DELETE FROM stats_cache WHERE rowid IN (
+                SELECT rowid FROM stats_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+            )
+        ''', (max_entries,))
+
+def clear_stats_cache():
+    with _cache_access_lock:
+        _cache_accesses.clear()
+    with transaction() as conn:
+        conn.execute('DELETE FROM stats_cache')
+
+# Season averages per NBA player, read by the roster view without any network.
+# Store (nba_player_id, season, gp, ppg, rpg, apg, fg_pct, fg3_pct, updated_at) rows
+def save_player_season_stats(rows):
+    with transaction() as conn:
+        conn.executemany('''
+            INSERT OR REPLACE INTO player_season_stats
+                (nba_player_id, season, gp, ppg, rpg, apg, fg_pct, fg3_pct, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+
+# Box score columns of game_logs, in table order
+GAME_LOG_COLUMNS = ['nba_player_id', 'game_id', 'season', 'game_date', 'team', 'matchup', 'home', 'wl',
+                    'minutes', 'fgm', 'fga', 'fg3m', 'fg3a', 'ftm', 'fta', 'oreb', 'dreb', 'reb', 'ast',
+                    'stl', 'blk', 'tov', 'pf', 'pts', 'plus_minus']
+
+# Store game log rows (tuples in GAME_LOG_COLUMNS order), replacing games already stored
+def save_game_logs(rows, chunk_size=IMPORT_CHUNK_SIZE):
+    sql = f'''
+        INSERT OR REPLACE INTO game_logs ({', '.join(GAME_LOG_COLUMNS)})
+        VALUES ({', '.join('?' * len(GAME_LOG_COLUMNS))})
+    '''
+    written = 0
+    rows = iter(rows)
+    with transaction() as conn:
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            conn.executemany(sql, chunk)
+            written += len(chunk)
+    return written
+
+# Game log rows for a season (optionally only some players), by player and date
+def get_game_logs(season, nba_player_ids=None):
+    sql = f'SELECT {", ".join(GAME_LOG_COLUMNS)} FROM game_logs WHERE season = ?'
+    params = [season]
+    if nba_player_ids is not None:
+        nba_player_ids = list(nba_player_ids)
+        sql += f" AND nba_player_id IN ({', '.join('?' * len(nba_player_ids))})"
+        params.extend(nba_player_ids)
+    sql += ' ORDER BY nba_player_id, game_date'
+
+    with connection() as conn:
+        return conn.execute(sql, params).fetchall()
+
+def count_game_logs(season):
+    with connection() as conn:
+        return conn.execute('SELECT COUNT(*) FROM game_logs WHERE season = ?', (season,)).fetchone()[0]
+
+# One row of player_season_stats as seen through the roster
+SeasonStats = namedtuple('SeasonStats', ['season', 'gp', 'ppg', 'rpg', 'apg', 'fg_pct', 'fg3_pct', 'updated_at'])
+
+# Stored season averages for a roster player, newest season first (no network)
+def get_stored_season_stats(player_id, season=None):
+    sql = '''
+        SELECT s.season, s.gp, s.ppg, s.rpg, s.apg, s.fg_pct, s.fg3_pct, s.updated_at
+        FROM roster r
+        JOIN player_season_stats s ON s.nba_player_id = r.nba_id
+        WHERE r.id = ?
+    '''
+    params = [player_id]
+    if season is not None:
+        sql += ' AND s.season = ?'
+        params.append(season)
+    sql += ' ORDER BY s.season DESC'
+
+    with connection() as conn:
+        return [SeasonStats(*row) for row in conn.execute(sql, params)]
+
+# Lightweight roster row with the selected season's averages
+class PlayerRow(_PlayerDisplay, namedtuple('PlayerRow', ['id', 'name', 'position', 'age', 'height_in',
+                                                         'weight_lb', 'salary_cents', 'ppg', 'rpg', 'apg'])):
+    __slots__ = ()
+
+ROSTER_WITH_STATS_QUERY = '''
+    SELECT r.id, r.name, r.position, r.age, r.height_in, r.weight_lb, r.salary_cents,
+           s.ppg, s.rpg, s.apg
+    FROM roster r
+    LEFT JOIN player_season_stats s
+        ON s.nba_player_id = r.nba_id AND s.season = ?
+'''
+
+# Columns query_players can sort on; missing heights, weights and stats sort
+# as -1 (a NULL would never compare true in the keyset clause, losing rows)
+PLAYER_SORT_COLUMNS = {
+    'id': 'r.id',
+    'name': 'r.name COLLATE NOCASE',
+    'position': 'r.position',
+    'age': 'r.age',
+    'height_in': 'COALESCE(r.height_in, -1)',
+    'weight_lb': 'COALESCE(r.weight_lb, -1)',
+    'salary_cents': 'r.salary_cents',
+    'ppg': 'COALESCE(s.ppg, -1)',
+    'rpg': 'COALESCE(s.rpg, -1)',
+    'apg': 'COALESCE(s.apg, -1)'
+}
+
+# Roster rows followed by that season's PPG, RPG and APG (None when not fetched yet)
+def get_all_players_with_stats(season):
+    with connection() as conn:
+        return [PlayerRow(*row) for row in conn.execute(ROSTER_WITH_STATS_QUERY + ' ORDER BY r.id', (season,))]
+
+# Single roster row in the same shape as get_all_players_with_stats
+def get_player_with_stats(player_id, season):
+    with connection() as conn:
+        row = conn.execute(ROSTER_WITH_STATS_QUERY + ' WHERE r.id = ?', (season, player_id)).fetchone()
+        return PlayerRow(*row) if row else None
+
+def _player_filters(position=None, min_age=None, max_age=None, min_salary=None, max_salary=None,
+                    name_prefix=None, search=None):
+    clauses = []
+    params = []
+    if position is not None:
+        clauses.append('r.position = ?')
+        params.append(position)
+    if min_age is not None:
+        clauses.append('r.age >= ?')
+        params.append(min_age)
+    if max_age is not None:
+        clauses.append('r.age <= ?')
+        params.append(max_age)
+    if min_salary is not None:
+        clauses.append('r.salary_cents >= ?')
+        params.append(salary_to_cents(min_salary))
+    if max_salary is not None:
+        clauses.append('r.salary_cents <= ?')
+        params.append(salary_to_cents(max_salary))
+    if name_prefix:
+        escaped = name_prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        clauses.append("r.name LIKE ? ESCAPE '\\'")
+        params.append(escaped + '%')
+    if search:
+        clauses.append('r.id IN (SELECT rowid FROM roster_search WHERE roster_search MATCH ?)')
+        params.append(search_query(search) or '""')
+    return clauses, params
+
+# Sort columns whose NULLs sort as -1 (see PLAYER_SORT_COLUMNS)
+NULL_AS_MINUS_ONE = ('height_in', 'weight_lb', 'ppg', 'rpg', 'apg')
+
+# Sort value of a row as the database sees it, used for keyset pagination
+def player_sort_value(row, order_by):
+    value = getattr(row, order_by)
+    if value is None and order_by in NULL_AS_MINUS_ONE:
+        return -1
+    return value
+
+# Filtered, sorted page of the roster as PlayerRow objects (salary bounds in dollars).
+# Page with limit/offset, or pass the last row of the previous page as `after`
+# for keyset pagination, which stays fast however deep the page is.
+def query_players(position=None, min_age=None, max_age=None, min_salary=None, max_salary=None,
+                  name_prefix=None, order_by='id', descending=False, limit=None, offset=None,
+                  after=None, season=None, search=None):
+    if order_by not in PLAYER_SORT_COLUMNS:
+        raise ValueError(f"Cannot sort players by {order_by!r}")
+    sort = PLAYER_SORT_COLUMNS[order_by]
+    direction = 'DESC' if descending else 'ASC'
+
+    clauses, params = _player_filters(position, min_age, max_age, min_salary, max_salary, name_prefix, search)
+    if after is not None:
+        clauses.append(f"({sort}, r.id) {'<' if descending else '>'} (?, ?)")
+        params.extend([player_sort_value(after, order_by), after.id])
+
+    sql = ROSTER_WITH_STATS_QUERY
+    if clauses:
+        sql += ' WHERE ' + ' AND '.join(clauses)
+    sql += f' ORDER BY {sort} {direction}, r.id {direction}'
+    if limit is not None or offset is not None:
+        sql += ' LIMIT ? OFFSET ?'
+        params.extend([-1 if limit is None else limit, offset or 0])
+
+    with connection() as conn:
+        return [PlayerRow(*row) for row in conn.execute(sql, [season] + params)]
+
+# Number of roster rows matching the same filters as query_players
+def count_players(position=None, min_age=None, max_age=None, min_salary=None, max_salary=None,
+                  name_prefix=None, search=None):
+    clauses, params = _player_filters(position, min_age, max_age, min_salary, max_salary, name_prefix, search)
+    sql = 'SELECT COUNT(*) FROM roster r'
+    if clauses:
+        sql += ' WHERE ' + ' AND '.join(clauses)
+    with connection() as conn:
+        return conn.execute(sql, params).fetchone()[0]
+
+# FTS5 query matching every word of `text` as a prefix, e.g. "ja wal" ->
+# '"ja"* "wal"*'; None when there is nothing to search for
+def search_query(text):
+    terms = re.findall(r'\w+', text or '')
+    return ' '.join(f'"{term}"*' for term in terms) or None
+
+# Ranking costs about a microsecond per match, so for broad prefixes ("b") with
+# more matches than this only the first matches in roster order are ranked
+SEARCH_RANK_LIMIT = 2000
+
+# Players whose name or position starts with each typed word, best match first
+def search_players(text, limit=20, season=None):
+    query = search_query(text)
+    if query is None:
+        return []
+    with connection() as conn:
+        matches = conn.execute('SELECT COUNT(*) FROM roster_search WHERE roster_search MATCH ?',
+                               (query,)).fetchone()[0]
+        order = 'ORDER BY rank' if matches <= SEARCH_RANK_LIMIT else 'ORDER BY rowid'
+        return [PlayerRow(*row) for row in conn.execute(f'''
+            SELECT r.id, r.name, r.position, r.age, r.height_in, r.weight_lb, r.salary_cents,
+                   s.ppg, s.rpg, s.apg
+            FROM (
+                SELECT rowid, rank FROM roster_search WHERE roster_search MATCH ? {order} LIMIT ?
+            ) m
+            JOIN roster r ON r.id = m.rowid
+            LEFT JOIN player_season_stats s ON s.nba_player_id = r.nba_id AND s.season = ?
+            ORDER BY m.rank, r.name COLLATE NOCASE
+        ''', (query, limit, season))]
 
 # Schedule-related functions
+
+# Function to create the schedule table (now part of migrate)
 def create_schedule_table():
-    conn = sqlite3.connect('raptors.db')
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS schedule (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            game_date TEXT NOT NULL,
-            opponent TEXT NOT NULL,
-            location TEXT NOT NULL,
-            time TEXT NOT NULL
-        )
-    ''')
-    
-    conn.commit()
-    conn.close()
-    
-def ensure_time_column_exists():
-    conn = sqlite3.connect('raptors.db')
-    cursor = conn.cursor()
-    
-    cursor.execute("PRAGMA table_info(schedule)")
-    columns = [column[1] for column in cursor.fetchall()]
+    migrate()
+
+SCHEDULE_COLUMNS = ('id, team, season, game_date, game_time, time_zone, opponent, location, '
+                    'game_id, team_score, opponent_score, result')
+
+# A stored game; game_date is ISO and game_time "HH:MM" (24h, '' if unknown).
+# The result columns stay None until the game is synced after it is played.
+class Game(namedtuple('Game', ['id', 'team', 'season', 'game_date', 'game_time', 'time_zone',
+                               'opponent', 'location', 'game_id', 'team_score', 'opponent_score',
+                               'result'], defaults=[None, None, None, None])):
+    __slots__ = ()
+
+    @property
+    def time(self):
+        return format_game_time(self.game_time, self.time_zone)
+
+    @property
+    def score(self):
+        return format_score(self.result, self.team_score, self.opponent_score)
+
+# Display form of a final score, e.g. "W 112-104"; '' before the game is played
+def format_score(result, team_score, opponent_score):
+    if team_score is None or opponent_score is None:
+        return ''
+    return f"{result or ''} {team_score}-{opponent_score}".strip()
+
+INSERT_GAME_SQL = '''
+    INSERT OR IGNORE INTO schedule (team, season, game_date, game_time, time_zone, opponent, location,
+                                    game_id, team_score, opponent_score, result)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# Values for INSERT_GAME_SQL with the date normalized and the season derived
+def _game_row(game_date, opponent, location, time, team):
+    game_day = normalize_game_date(game_date)
+    if game_day is None:
+        raise ValueError(f"Unrecognized game date: {game_date!r}")
+    game_time, time_zone = parse_game_time(time)
+    return (team, season_for_game_day(game_day), game_day, game_time, time_zone,
+            opponent.strip(), location.strip(), None, None, None, None)
+
+def add_game(game_date, opponent, location, time, team=DEFAULT_TEAM):
+    with transaction() as conn:
+        conn.execute(INSERT_GAME_SQL, _game_row(game_date, opponent, location, time, team))
+
+# Bulk insert normalized games in one transaction, returns (added, skipped).
+# `records` is any iterable of objects with game_date (ISO), opponent, location,
+# game_time, time_zone and team (None for `team`), e.g. rapsparse.ScheduleRecord,
+# and optionally the result columns (game_id, team_score, opponent_score,
+# result) of a played game; it is consumed in chunks so arbitrarily large
+# inputs use constant memory.
+def import_schedule_records(records, chunk_size=IMPORT_CHUNK_SIZE, team=DEFAULT_TEAM):
+    added = 0
+    skipped = 0
+
+    rows = ((record.team or team, season_for_game_day(record.game_date), record.game_date, record.game_time,
+             record.time_zone, record.opponent, record.location, getattr(record, 'game_id', None),
+             getattr(record, 'team_score', None), getattr(record, 'opponent_score', None),
+             getattr(record, 'result', None)) for record in records)
+
+    with transaction() as conn:
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+
+            # rowcount leaves out rows written by triggers, unlike total_changes
+            inserted = conn.executemany(INSERT_GAME_SQL, chunk).rowcount
+            added += inserted
+            skipped += len(chunk) - inserted
+
+    return added, skipped
+
+# Bulk import a schedule file in one transaction, returns (added, skipped).
+# Bad lines are skipped and recorded on `report` (a rapsparse.ParseReport).
+def import_schedule_file(filename, chunk_size=IMPORT_CHUNK_SIZE, team=DEFAULT_TEAM, report=None):
+    from rapsparse import iter_schedule_file
+
+    return import_schedule_records(iter_schedule_file(filename, report), chunk_size, team)
 
-    if 'time' not in columns:
-        try:
-            cursor.execute("ALTER TABLE schedule ADD COLUMN time TEXT NOT NULL DEFAULT ''")
-        except sqlite3.OperationalError as e:
-            print(f"Error adding column: {e}")
-
-    conn.commit()
-    conn.close()
-    
-def add_game(game_date, opponent, location, time):
-    conn = sqlite3.connect('raptors.db')
-    cursor = conn.cursor()
-    cursor.execute('INSERT INTO schedule (game_date, opponent, location, time) VALUES (?, ?, ?, ?)',
-                   (game_date, opponent, location, time))
-    conn.commit()
-    conn.close()
-    
 def get_games_by_date(game_date):
-    conn = sqlite3.connect('raptors.db')
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM schedule WHERE game_date = ?', (game_date,))
-    games = cursor.fetchall()
-    conn.close()
-    return games
+    with connection() as conn:
+        return [Game(*row) for row in conn.execute(f'SELECT {SCHEDULE_COLUMNS} FROM schedule WHERE game_date = ?',
+                                                   (normalize_game_date(game_date),))]
+
+# Games between two ISO dates (inclusive, either may be None), in date order
+def get_games_between(start=None, end=None, team=None):
+    clauses, params = _game_filters(team=team)
+    if start is not None:
+        clauses.append('game_date >= ?')
+        params.append(start)
+    if end is not None:
+        clauses.append('game_date <= ?')
+        params.append(end)
+
+    sql = f'SELECT {SCHEDULE_COLUMNS} FROM schedule'
+    if clauses:
+        sql += ' WHERE ' + ' AND '.join(clauses)
+    sql += ' ORDER BY game_date, game_time, team'
+
+    with connection() as conn:
+        return [Game(*row) for row in conn.execute(sql, params)]
+
+# Games whose opponent starts with each typed word, most recent first
+def search_games(text, limit=50, team=None):
+    query = search_query(text)
+    if query is None:
+        return []
+    sql = f'''
+        SELECT {', '.join('g.' + column for column in SCHEDULE_COLUMNS.split(', '))}
+        FROM schedule_search
+        JOIN schedule g ON g.id = schedule_search.rowid
+        WHERE schedule_search MATCH ?
+    '''
+    params = [query]
+    if team is not None:
+        sql += ' AND g.team = ?'
+        params.append(team)
+    sql += ' ORDER BY g.game_date DESC, g.game_time DESC LIMIT ?'
+    params.append(limit)
+
+    with connection() as conn:
+        return [Game(*row) for row in conn.execute(sql, params)]
+
+# Function to retrieve every game ordered by date
+def get_all_games():
+    with connection() as conn:
+        return [Game(*row) for row in conn.execute(
+            f'SELECT {SCHEDULE_COLUMNS} FROM schedule ORDER BY game_date, game_time')]
+
+# Stream stored games in date order, optionally for one season and/or team
+def iter_games(season=None, team=None):
+    clauses, params = _game_filters(season, team)
+    sql = f'SELECT {SCHEDULE_COLUMNS} FROM schedule'
+    if clauses:
+        sql += ' WHERE ' + ' AND '.join(clauses)
+    sql += ' ORDER BY game_date, game_time, team'
+
+    with connection() as conn:
+        for row in conn.execute(sql, params):
+            yield Game(*row)
+
+def _game_filters(season=None, team=None):
+    clauses = []
+    params = []
+    if season is not None:
+        clauses.append('season = ?')
+        params.append(season)
+    if team is not None:
+        clauses.append('team = ?')
+        params.append(team)
+    return clauses, params
+
+# Games as (game_date, opponent, location, game_time, time_zone, result,
+# team_score, opponent_score), in date order
+def get_dated_games(season=None, team=None):
+    clauses, params = _game_filters(season, team)
+
+    sql = '''
+        SELECT game_date, opponent, location, game_time, time_zone, result, team_score, opponent_score
+        FROM schedule
+    '''
+    if clauses:
+        sql += ' WHERE ' + ' AND '.join(clauses)
+    sql += ' ORDER BY game_date, game_time'
+
+    with connection() as conn:
+        return conn.execute(sql, params).fetchall()
+
+# Seasons with games as (season, first game_date, last game_date), oldest first
+def get_schedule_seasons(team=None):
+    sql = 'SELECT season, MIN(game_date), MAX(game_date) FROM schedule'
+    params = []
+    if team is not None:
+        sql += ' WHERE team = ?'
+        params.append(team)
+    sql += ' GROUP BY season ORDER BY season'
+
+    with connection() as conn:
+        return conn.execute(sql, params).fetchall()
+
+# Last game date synced for a team's season, None if it was never synced
+def get_sync_state(team, season):
+    with connection() as conn:
+        row = conn.execute('SELECT last_game_date FROM sync_state WHERE team = ? AND season = ?',
+                           (team, season)).fetchone()
+        return row[0] if row else None
+
+def clear_sync_state(team=None):
+    with transaction() as conn:
+        if team is None:
+            conn.execute('DELETE FROM sync_state')
+        else:
+            conn.execute('DELETE FROM sync_state WHERE team = ?', (team,))
+
+# Write played games onto the schedule and advance the team's sync state, all
+# in one transaction. `results` are (game_date, game_id, opponent, location,
+# team_score, opponent_score, result) tuples; a game is matched to the stored
+# row for that team and date (a team plays at most once a day) and added if
+# there is none. Returns {'added': [Game], 'updated': [Game], 'unchanged': n}.
+def apply_game_results(team, season, results, last_game_date, synced_at):
+    changes = {'added': [], 'updated': [], 'unchanged': 0}
+    with transaction() as conn:
+        for game_date, game_id, opponent, location, team_score, opponent_score, result in results:
+            row = conn.execute(f'SELECT {SCHEDULE_COLUMNS} FROM schedule WHERE team = ? AND game_date = ?',
+                               (team, game_date)).fetchone()
+            if row is None:
+                cursor = conn.execute('''
+                    INSERT INTO schedule (team, season, game_date, opponent, location,
+                                          game_id, team_score, opponent_score, result)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (team, season, game_date, opponent, location, game_id, team_score, opponent_score, result))
+                changes['added'].append(Game(cursor.lastrowid, team, season, game_date, '', '', opponent, location,
+                                             game_id, team_score, opponent_score, result))
+                continue
+
+            game = Game(*row)
+            if (game.game_id, game.team_score, game.opponent_score, game.result) == \
+                    (game_id, team_score, opponent_score, result):
+                changes['unchanged'] += 1
+                continue
+            conn.execute('''
+                UPDATE schedule SET game_id = ?, team_score = ?, opponent_score = ?, result = ?
+                WHERE id = ?
+            ''', (game_id, team_score, opponent_score, result, game.id))
+            changes['updated'].append(game._replace(game_id=game_id, team_score=team_score,
+                                                    opponent_score=opponent_score, result=result))
+
+        if last_game_date is not None:
+            conn.execute('''
+                INSERT INTO sync_state (team, season, last_game_date, synced_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT (team, season) DO UPDATE SET
+                    last_game_date = MAX(last_game_date, excluded.last_game_date),
+                    synced_at = excluded.synced_at
+            ''', (team, season, last_game_date, synced_at))
+    return changes
+
+# Teams with games, jumping from one team to the next along the team index
+# instead of reading every game (DISTINCT would scan them all)
+def get_schedule_teams():
+    with connection() as conn:
+        return [row[0] for row in conn.execute('''
+            WITH RECURSIVE teams(team) AS (
+                SELECT MIN(team) FROM schedule
+                UNION ALL
+                SELECT (SELECT MIN(team) FROM schedule WHERE team > teams.team) FROM teams WHERE team IS NOT NULL
+            )
+            SELECT team FROM teams WHERE team IS NOT NULL
+        ''')]
 
 def delete_all_games():
-    conn = sqlite3.connect('raptors.db')
-    cursor = conn.cursor()
-    
-    cursor.execute('DELETE FROM schedule')
-    cursor.execute('DELETE FROM sqlite_sequence WHERE name="schedule"')
-    
-    conn.commit()
-    conn.close()
\ No newline at end of file
+    with transaction() as conn:
+        conn.execute('DELETE FROM schedule')
+        conn.execute('DELETE FROM sync_state')
+        conn.execute("DELETE FROM sqlite_sequence WHERE name='schedule'")
+
+# Time every database call when RAPTORS_METRICS is set (see rapsmetrics).
+# Connection plumbing and the pure parsing/formatting helpers are left out:
+# imports call the helpers once per row, which would swamp the timings.
+rapsmetrics.instrument(globals(), 'db', exclude=(
+    'configure', 'get_manager', 'connection', 'transaction', 'close_connections',
+    'parse_height', 'format_height', 'parse_weight', 'format_weight', 'salary_to_cents', 'format_salary',
+    'parse_int', 'normalize_game_date', 'parse_game_time', 'format_game_time', 'format_score',
+    'season_for_date', 'season_for_game_day', 'player_sort_value', 'search_query'
+))
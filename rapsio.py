@@ -0,0 +1,376 @@
+import os
+import re
+import csv
+import json
+from datetime import datetime, timezone
+import rapsdb
+from rapsparse import ParseReport, schedule_record, iter_schedule_file
+
+# Bulk import and export of the roster and schedule as CSV, JSON Lines and
+# iCalendar. Rows are streamed from database cursors on export and written in
+# executemany batches on import, so file size doesn't affect memory use.
+
+# File extension -> format name
+FORMATS = {
+    '.csv': 'csv',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+    '.ics': 'ics',
+    '.txt': 'txt'
+}
+
+ROSTER_FIELDS = ['id', 'name', 'position', 'age', 'height_in', 'weight_lb', 'salary_cents', 'nba_id']
+SCHEDULE_FIELDS = ['team', 'season', 'game_date', 'game_time', 'time_zone', 'opponent', 'location',
+                   'game_id', 'team_score', 'opponent_score', 'result']
+
+# Time zone abbreviations used in schedules and the IANA zones written to .ics files
+TIME_ZONES = {
+    'ET': 'America/New_York',
+    'EST': 'America/New_York',
+    'EDT': 'America/New_York',
+    'CT': 'America/Chicago',
+    'CST': 'America/Chicago',
+    'CDT': 'America/Chicago',
+    'MT': 'America/Denver',
+    'MST': 'America/Denver',
+    'MDT': 'America/Denver',
+    'PT': 'America/Los_Angeles',
+    'PST': 'America/Los_Angeles',
+    'PDT': 'America/Los_Angeles'
+}
+
+# VTIMEZONE definitions for the zones above (RFC 5545 requires one for every
+# TZID used): (standard offset, daylight offset, standard name, daylight name),
+# with the US daylight saving rules in force since 2007
+ZONE_RULES = {
+    'America/New_York': ('-0500', '-0400', 'EST', 'EDT'),
+    'America/Chicago': ('-0600', '-0500', 'CST', 'CDT'),
+    'America/Denver': ('-0700', '-0600', 'MST', 'MDT'),
+    'America/Los_Angeles': ('-0800', '-0700', 'PST', 'PDT')
+}
+
+# Calendar events don't know how long a game runs, this covers most of them
+GAME_DURATION = 'PT2H30M'
+ICS_PRODID = '-//Raptors Roster App//Schedule//EN'
+
+# Format name for a path, from `fmt` if given or else the file extension
+def format_for_path(path, fmt=None, allowed=('csv', 'jsonl', 'ics')):
+    fmt = (fmt or FORMATS.get(os.path.splitext(path)[1].lower(), '')).lower()
+    if fmt not in allowed:
+        raise ValueError(f"Unsupported format for {path!r}, expected one of: {', '.join(allowed)}")
+    return fmt
+
+# Roster
+
+# Typed roster row for rapsdb.import_players from a CSV/JSON record. Typed
+# columns win, but the display forms ("6'6", "214 lbs", "$1,000.00") work too.
+def player_row(fields):
+    name = str(fields.get('name') or '').strip()
+    position = str(fields.get('position') or '').strip()
+    if not name:
+        raise ValueError("missing name")
+    if not position:
+        raise ValueError("missing position")
+
+    age = _optional_int(fields, 'age')
+    if age is None:
+        raise ValueError(f"invalid age {fields.get('age')!r}")
+
+    height_in = _optional_int(fields, 'height_in')
+    if height_in is None and fields.get('height'):
+        height_in = rapsdb.parse_height(fields['height'])
+    weight_lb = _optional_int(fields, 'weight_lb')
+    if weight_lb is None and fields.get('weight'):
+        weight_lb = rapsdb.parse_weight(fields['weight'])
+    salary_cents = _optional_int(fields, 'salary_cents')
+    if salary_cents is None:
+        salary_cents = rapsdb.salary_to_cents(fields.get('salary') or 0)
+
+    return (_optional_int(fields, 'id'), name, position, age, height_in, weight_lb,
+            salary_cents, _optional_int(fields, 'nba_id'))
+
+def _optional_int(fields, key):
+    value = fields.get(key)
+    if value is None or value == '':
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid {key} {value!r}")
+
+# Write the whole roster, returns the number of players written
+def export_roster(path, fmt=None):
+    fmt = format_for_path(path, fmt, ('csv', 'jsonl'))
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        return _write_records(file, fmt, ROSTER_FIELDS, rapsdb.iter_players())
+
+# Add or update players from a file, returns the number written. Rows with an
+# id replace that player; bad rows are skipped and recorded on `report`.
+def import_roster(path, fmt=None, report=None, chunk_size=rapsdb.IMPORT_CHUNK_SIZE):
+    fmt = format_for_path(path, fmt, ('csv', 'jsonl'))
+    report = report if report is not None else ParseReport()
+
+    def rows():
+        for line_number, fields in _read_records(path, fmt, report):
+            try:
+                row = player_row(fields)
+            except ValueError as e:
+                report.add_error(line_number, str(fields), str(e))
+                continue
+            report.records += 1
+            yield row
+
+    return rapsdb.import_players(rows(), chunk_size)
+
+# Schedule
+
+# Write stored games, optionally one season and/or team, returns the number written
+def export_schedule(path, fmt=None, season=None, team=None):
+    fmt = format_for_path(path, fmt)
+    # RFC 5545 wants CRLF line endings, which _write_ics writes itself
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        games = rapsdb.iter_games(season, team)
+        if fmt == 'ics':
+            return _write_ics(file, games)
+        return _write_records(file, fmt, SCHEDULE_FIELDS, games)
+
+# Add games from a CSV, JSON Lines, .ics or text schedule file, returns (added, skipped).
+# Games without a team column go to `team`; bad rows are recorded on `report`.
+def import_schedule(path, fmt=None, report=None, team=rapsdb.DEFAULT_TEAM,
+                    chunk_size=rapsdb.IMPORT_CHUNK_SIZE):
+    fmt = format_for_path(path, fmt, ('csv', 'jsonl', 'ics', 'txt'))
+    report = report if report is not None else ParseReport()
+
+    if fmt == 'txt':
+        records = iter_schedule_file(path, report)
+    elif fmt == 'ics':
+        records = _validated(_read_ics_games(path, report), report)
+    else:
+        records = _validated(
+            (_game_fields(line_number, fields) for line_number, fields in _read_records(path, fmt, report)),
+            report
+        )
+    return rapsdb.import_schedule_records(records, chunk_size, team)
+
+# (line_number, date, opponent, location, time, team) from a CSV/JSON record;
+# takes the exported game_time/time_zone columns or a single "time" column.
+# The exported result columns follow as a dict (empty for games not played).
+def _game_fields(line_number, fields):
+    if fields.get('game_time') is not None:
+        time = f"{fields.get('game_time') or ''} {fields.get('time_zone') or ''}"
+    else:
+        time = fields.get('time') or ''
+    results = {key: fields[key] for key in ('game_id', 'team_score', 'opponent_score', 'result')
+               if fields.get(key) not in (None, '')}
+    return (line_number, fields.get('game_date'), fields.get('opponent'), fields.get('location'),
+            time, fields.get('team'), results)
+
+def _validated(games, report):
+    for line_number, *fields, results in games:
+        record, error = schedule_record(line_number, *fields)
+        if not error:
+            try:
+                record = record._replace(**_game_results(results))
+            except ValueError as e:
+                error = str(e)
+        if error:
+            report.add_error(line_number, ', '.join(str(field or '') for field in fields), error)
+            continue
+        report.records += 1
+        yield record
+
+# Typed result columns from exported values
+def _game_results(results):
+    typed = {key: _optional_int(results, key) for key in ('team_score', 'opponent_score') if key in results}
+    for key in ('game_id', 'result'):
+        if key in results:
+            typed[key] = str(results[key]).strip()
+    return typed
+
+# CSV and JSON Lines
+
+def _write_records(file, fmt, fields, records):
+    count = 0
+    if fmt == 'csv':
+        writer = csv.writer(file)
+        writer.writerow(fields)
+        for record in records:
+            writer.writerow(['' if value is None else value for value in
+                             (getattr(record, field) for field in fields)])
+            count += 1
+    else:
+        for record in records:
+            file.write(json.dumps({field: getattr(record, field) for field in fields}) + '\n')
+            count += 1
+    return count
+
+# Yield (line_number, {field: value}) for each record in a CSV or JSON Lines file
+def _read_records(path, fmt, report):
+    with open(path, 'r', encoding='utf-8-sig', newline='') as file:
+        if fmt == 'csv':
+            reader = csv.DictReader(file, skipinitialspace=True)
+            for fields in reader:
+                report.lines += 1
+                yield reader.line_num, fields
+            return
+
+        for line_number, line in enumerate(file, start=1):
+            report.lines += 1
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                fields = json.loads(line)
+            except ValueError as e:
+                report.add_error(line_number, line, f"invalid JSON: {e}")
+                continue
+            if not isinstance(fields, dict):
+                report.add_error(line_number, line, "expected a JSON object")
+                continue
+            yield line_number, fields
+
+# iCalendar
+
+def _ics_escape(text):
+    return (str(text).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\n', '\\n'))
+
+def _ics_unescape(text):
+    return re.sub(r'\\(.)', lambda m: '\n' if m.group(1) in 'nN' else m.group(1), text)
+
+# Fold content lines longer than 75 octets as RFC 5545 requires
+def _ics_fold(line):
+    parts = []
+    current = ''
+    size = 0
+    for char in line:
+        width = len(char.encode('utf-8'))
+        if size + width > 75:
+            parts.append(current)
+            current, size = ' ', 1
+        current += char
+        size += width
+    parts.append(current)
+    return '\r\n'.join(parts) + '\r\n'
+
+def _game_uid(game):
+    slug = re.sub(r'[^a-z0-9]+', '-', f"{game.game_date} {game.team} {game.opponent} {game.location} "
+                                      f"{game.game_time}".lower()).strip('-')
+    return f"{slug}@raptors-roster-app"
+
+def _ics_timezone(tzid):
+    standard, daylight, standard_name, daylight_name = ZONE_RULES[tzid]
+    return [
+        'BEGIN:VTIMEZONE',
+        f'TZID:{tzid}',
+        'BEGIN:DAYLIGHT',
+        'DTSTART:19700308T020000',
+        'RRULE:FREQ=YEARLY;BYMONTH=3;BYDAY=2SU',
+        f'TZOFFSETFROM:{standard}',
+        f'TZOFFSETTO:{daylight}',
+        f'TZNAME:{daylight_name}',
+        'END:DAYLIGHT',
+        'BEGIN:STANDARD',
+        'DTSTART:19701101T020000',
+        'RRULE:FREQ=YEARLY;BYMONTH=11;BYDAY=1SU',
+        f'TZOFFSETFROM:{daylight}',
+        f'TZOFFSETTO:{standard}',
+        f'TZNAME:{standard_name}',
+        'END:STANDARD',
+        'END:VTIMEZONE'
+    ]
+
+def _write_ics(file, games):
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    file.write(_ics_fold('BEGIN:VCALENDAR') + _ics_fold('VERSION:2.0') +
+               _ics_fold(f'PRODID:{ICS_PRODID}') + _ics_fold('CALSCALE:GREGORIAN'))
+    # Games are streamed, so every zone DTSTART may refer to is defined up front
+    for tzid in ZONE_RULES:
+        file.write(''.join(_ics_fold(line) for line in _ics_timezone(tzid)))
+
+    count = 0
+    for game in games:
+        day = game.game_date.replace('-', '')
+        if not game.game_time:
+            start = f'DTSTART;VALUE=DATE:{day}'
+        elif game.time_zone in TIME_ZONES:
+            start = f'DTSTART;TZID={TIME_ZONES[game.time_zone]}:{day}T{game.game_time.replace(":", "")}00'
+        else:
+            start = f'DTSTART:{day}T{game.game_time.replace(":", "")}00'
+        separator = 'vs' if game.location == 'Home' else '@'
+
+        lines = [
+            'BEGIN:VEVENT',
+            f'UID:{_game_uid(game)}',
+            f'DTSTAMP:{stamp}',
+            start,
+            f'DURATION:{GAME_DURATION}' if game.game_time else 'DURATION:P1D',
+            f'SUMMARY:{_ics_escape(f"{game.team} {separator} {game.opponent}")}',
+            f'X-RAPTORS-TEAM:{_ics_escape(game.team)}',
+            f'X-RAPTORS-OPPONENT:{_ics_escape(game.opponent)}',
+            f'X-RAPTORS-LOCATION:{game.location}',
+            f'X-RAPTORS-TIME-ZONE:{_ics_escape(game.time_zone)}',
+            'END:VEVENT'
+        ]
+        file.write(''.join(_ics_fold(line) for line in lines))
+        count += 1
+
+    file.write(_ics_fold('END:VCALENDAR'))
+    return count
+
+# Yield (line_number, name, params, value) for each unfolded content line
+def _ics_lines(path, report):
+    with open(path, 'r', encoding='utf-8-sig', newline='') as file:
+        pending = None
+        for line_number, line in enumerate(file, start=1):
+            report.lines += 1
+            line = line.rstrip('\r\n')
+            if line[:1] in (' ', '\t') and pending is not None:
+                pending[1] += line[1:]
+                continue
+            if pending is not None:
+                yield _ics_property(*pending)
+            pending = [line_number, line] if line else None
+        if pending is not None:
+            yield _ics_property(*pending)
+
+def _ics_property(line_number, line):
+    head, _, value = line.partition(':')
+    name, *params = head.split(';')
+    params = dict(param.partition('=')[::2] for param in params)
+    return line_number, name.upper(), params, value
+
+# Game fields for each VEVENT, in the same shape as _game_fields. Events made by
+# other calendars are read from SUMMARY ("Team vs Opponent" / "Team @ Opponent").
+def _read_ics_games(path, report):
+    event = None
+    for line_number, name, params, value in _ics_lines(path, report):
+        if name == 'BEGIN' and value.upper() == 'VEVENT':
+            event = {'line_number': line_number}
+        elif name == 'END' and value.upper() == 'VEVENT' and event is not None:
+            yield _ics_game_fields(event)
+            event = None
+        elif event is not None:
+            event[name] = (params, value)
+
+def _ics_game_fields(event):
+    def text(name):
+        return _ics_unescape(event[name][1]) if name in event else None
+
+    team, opponent, location = text('X-RAPTORS-TEAM'), text('X-RAPTORS-OPPONENT'), text('X-RAPTORS-LOCATION')
+    if opponent is None and text('SUMMARY'):
+        match = re.match(r'^(.*?)\s+(vs\.?|@|at)\s+(.*)$', text('SUMMARY'), re.IGNORECASE)
+        if match:
+            team, location, opponent = match.group(1), match.group(2), match.group(3)
+
+    game_date = time = None
+    if 'DTSTART' in event:
+        params, value = event['DTSTART']
+        if re.match(r'^\d{8}', value):
+            game_date = f"{value[:4]}-{value[4:6]}-{value[6:8]}"
+        if re.match(r'^\d{8}T\d{4}', value):
+            time_zone = text('X-RAPTORS-TIME-ZONE')
+            if time_zone is None:
+                time_zone = 'UTC' if value.endswith('Z') else ''
+            time = f"{value[9:11]}:{value[11:13]} {time_zone}"
+    return (event['line_number'], game_date, opponent, location, time, team, {})
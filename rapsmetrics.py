@@ -0,0 +1,235 @@
+# Timing instrumentation for database calls, NBA API requests and view
+# builders. Off unless RAPTORS_METRICS is set, in which case every call of an
+# instrumented function is counted and its latency added to a histogram:
+#
+#   RAPTORS_METRICS=1 python rapsapp.py
+#   RAPTORS_METRICS=trace.json python -m raptors stats     (also written on exit)
+#   RAPTORS_METRICS=trace.csv python -m raptors serve
+#
+# When disabled the decorators return the function itself, so instrumented
+# code runs exactly as before. RAPTORS_LOG_LEVEL (e.g. DEBUG) sets the level of
+# the logging that replaced the debug prints.
+import os
+import csv
+import json
+import time
+import atexit
+import logging
+import threading
+import functools
+import inspect
+from contextlib import contextmanager
+
+# Upper bounds of the latency histogram buckets in milliseconds; the last
+# bucket takes everything slower
+BUCKETS_MS = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+# Individual calls kept for the trace file, oldest first; later calls are
+# still counted in the histograms
+MAX_EVENTS = 100000
+
+_setting = os.environ.get('RAPTORS_METRICS', '').strip()
+ENABLED = _setting.lower() not in ('', '0', 'false', 'no', 'off')
+TRACE_PATH = _setting if os.path.splitext(_setting)[1].lower() in ('.json', '.csv') else None
+
+_lock = threading.Lock()
+_metrics = {}
+_counters = {}
+_events = []
+_started = time.perf_counter()
+
+class Metric:
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.min = None
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, ms, failed):
+        self.count += 1
+        self.errors += failed
+        self.total += ms
+        self.min = ms if self.min is None else min(self.min, ms)
+        self.max = max(self.max, ms)
+        for i, bound in enumerate(BUCKETS_MS):
+            if ms <= bound:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+
+    # Latency below which `fraction` of the calls fell, read off the histogram
+    # (the bucket's upper bound, or the slowest call for the last bucket)
+    def percentile(self, fraction):
+        if not self.count:
+            return None
+        needed = fraction * self.count
+        seen = 0
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if seen >= needed:
+                return round(min(BUCKETS_MS[i], self.max) if i < len(BUCKETS_MS) else self.max, 3)
+        return round(self.max, 3)
+
+    def as_dict(self):
+        return {
+            'name': self.name,
+            'count': self.count,
+            'errors': self.errors,
+            'total_ms': round(self.total, 3),
+            'mean_ms': round(self.total / self.count, 3) if self.count else None,
+            'min_ms': None if self.min is None else round(self.min, 3),
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'max_ms': round(self.max, 3),
+            'buckets': {f'le_{bound}': count for bound, count in zip(BUCKETS_MS + ['inf'], self.buckets)}
+        }
+
+def record(name, start, ms, failed=False):
+    with _lock:
+        metric = _metrics.get(name)
+        if metric is None:
+            metric = _metrics[name] = Metric(name)
+        metric.add(ms, failed)
+        if len(_events) < MAX_EVENTS:
+            _events.append((name, round((start - _started) * 1000, 3), round(ms, 3),
+                            threading.current_thread().name, failed))
+
+# Count an event that has no duration (e.g. a request answered by another
+# caller's request); free when metrics are off
+def increment(name, amount=1):
+    if ENABLED:
+        with _lock:
+            _counters[name] = _counters.get(name, 0) + amount
+
+# Time a block: `with measure('ui.build_month_tab'): ...`
+@contextmanager
+def measure(name):
+    if not ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    failed = True
+    try:
+        yield
+        failed = False
+    finally:
+        record(name, start, (time.perf_counter() - start) * 1000, failed)
+
+def _wrap(func, name):
+    # A generator's time is spent while it is iterated, not when it is called
+    if inspect.isgeneratorfunction(func):
+        @functools.wraps(func)
+        def timed_generator(*args, **kwargs):
+            start = time.perf_counter()
+            failed = True
+            try:
+                yield from func(*args, **kwargs)
+                failed = False
+            except GeneratorExit:
+                # Closed early by the caller, not an error
+                failed = False
+                raise
+            finally:
+                record(name, start, (time.perf_counter() - start) * 1000, failed)
+        return timed_generator
+
+    @functools.wraps(func)
+    def timed_call(*args, **kwargs):
+        start = time.perf_counter()
+        failed = True
+        try:
+            result = func(*args, **kwargs)
+            failed = False
+            return result
+        finally:
+            record(name, start, (time.perf_counter() - start) * 1000, failed)
+    return timed_call
+
+# Decorator recording each call under `name` (default: module.function)
+def timed(name=None):
+    def decorate(func):
+        if not ENABLED:
+            return func
+        return _wrap(func, name or f'{func.__module__}.{func.__name__}')
+    return decorate
+
+# Wrap every public function defined in a module, from the end of the module:
+#   instrument(globals(), 'db', exclude=('connection',))
+# Module-internal calls go through the wrapped globals too, so the numbers
+# include calls made on behalf of other functions.
+def instrument(namespace, prefix, exclude=()):
+    if not ENABLED:
+        return
+    module = namespace.get('__name__')
+    for attr, value in list(namespace.items()):
+        if (inspect.isfunction(value) and value.__module__ == module and not attr.startswith('_')
+                and attr not in exclude):
+            namespace[attr] = _wrap(value, f'{prefix}.{attr}')
+
+def get_metrics():
+    with _lock:
+        return [metric.as_dict() for metric in sorted(_metrics.values(), key=lambda m: -m.total)]
+
+def get_metric(name):
+    with _lock:
+        metric = _metrics.get(name)
+        return metric.as_dict() if metric else None
+
+def get_counters():
+    with _lock:
+        return dict(sorted(_counters.items()))
+
+def reset():
+    global _started
+    with _lock:
+        _metrics.clear()
+        _counters.clear()
+        _events.clear()
+        _started = time.perf_counter()
+
+# One line for the app's timing overlay: the slowest operations so far
+def summary_line(limit=3):
+    parts = [f"{m['name']} {m['count']}x p95 {m['p95_ms']} ms" for m in get_metrics()[:limit]]
+    parts.extend(f"{name} {count}" for name, count in get_counters().items())
+    return '  |  '.join(parts) or "No timings recorded yet"
+
+CSV_FIELDS = ['name', 'count', 'errors', 'total_ms', 'mean_ms', 'min_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms']
+
+# Write the histograms and counters (and, for JSON, the individual calls) to
+# a .json or .csv file; in CSV a counter is a row with only a name and count
+def export_trace(path):
+    metrics = get_metrics()
+    counters = get_counters()
+    if os.path.splitext(path)[1].lower() == '.csv':
+        with open(path, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            bounds = [f'le_{bound}' for bound in BUCKETS_MS + ['inf']]
+            writer.writerow(CSV_FIELDS + bounds)
+            for metric in metrics:
+                writer.writerow([metric[field] for field in CSV_FIELDS] +
+                                [metric['buckets'][bound] for bound in bounds])
+            for name, count in counters.items():
+                writer.writerow([name, count])
+        return path
+
+    with _lock:
+        events = [{'name': name, 'start_ms': start, 'duration_ms': ms, 'thread': thread, 'error': failed}
+                  for name, start, ms, thread, failed in _events]
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump({'buckets_ms': BUCKETS_MS, 'metrics': metrics, 'counters': counters, 'events': events},
+                  file, indent=1)
+    return path
+
+# Level for the app's loggers from RAPTORS_LOG_LEVEL (default WARNING); call
+# once from an entry point
+def configure_logging(level=None):
+    level = level or os.environ.get('RAPTORS_LOG_LEVEL', 'WARNING')
+    logging.basicConfig(level=level.upper(), format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+if ENABLED and TRACE_PATH:
+    atexit.register(export_trace, TRACE_PATH)
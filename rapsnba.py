@@ -0,0 +1,300 @@
+import re
+import json
+import time
+import difflib
+import logging
+import threading
+import unicodedata
+from datetime import date, datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import rapsdb
+import rapsmetrics
+import rapsbackend
+import rapsclient
+
+log = logging.getLogger(__name__)
+
+# How close a name has to be for the fuzzy fallback ("Poeltl" vs "Pöltl")
+FUZZY_CUTOFF = 0.85
+
+# Stats cache settings: completed seasons never expire, the current one is
+# refetched after a few minutes, and the table is capped at this many entries
+CURRENT_SEASON_TTL = 10 * 60
+STATS_CACHE_MAX_ENTRIES = 5000
+
+# Roster prefetch limits; stats.nba.com starts throttling on bursts of requests
+PREFETCH_WORKERS = 4
+PREFETCH_RATE = 2.0  # requests per second, applied to the shared client
+
+_index_lock = threading.Lock()
+_index_names = None
+
+_cache_lock = threading.Lock()
+cache_counters = {'hits': 0, 'misses': 0, 'expired': 0}
+
+# Lowercase, strip accents and punctuation so "Jakob Pöltl" -> "jakob poltl"
+def normalize_name(name):
+    name = unicodedata.normalize('NFKD', name)
+    name = ''.join(c for c in name if not unicodedata.combining(c)).lower()
+    name = re.sub(r"['.]", '', name)
+    name = re.sub(r'[^a-z0-9]+', ' ', name)
+    return ' '.join(name.split())
+
+# Build the persistent name -> ID table from the backend's player list (once per database)
+@rapsmetrics.timed('nba.build_player_index')
+def build_player_index():
+    global _index_names
+    with _index_lock:
+        if rapsdb.count_nba_players() == 0:
+            # Active players are written last so they win on name clashes
+            nba_players = sorted(rapsbackend.get_backend().players(), key=lambda p: p['is_active'])
+            rapsdb.save_nba_players(
+                (normalize_name(p['full_name']), p['id'], p['full_name']) for p in nba_players
+            )
+        if _index_names is None:
+            _index_names = rapsdb.get_nba_player_names()
+    return _index_names
+
+# Find the NBA ID for a name, falling back to the closest spelling
+def find_nba_player_id(player_name):
+    names = build_player_index()
+    normalized = normalize_name(player_name)
+
+    nba_player_id = rapsdb.find_nba_player_id(normalized)
+    if nba_player_id is not None:
+        return nba_player_id
+
+    matches = difflib.get_close_matches(normalized, names, n=1, cutoff=FUZZY_CUTOFF)
+    if not matches:
+        return None
+
+    # Remember the alias so the next lookup is a direct hit
+    nba_player_id = rapsdb.find_nba_player_id(matches[0])
+    rapsdb.save_nba_players([(normalized, nba_player_id, player_name)])
+    with _index_lock:
+        names.append(normalized)
+    return nba_player_id
+
+# Resolve a roster player's NBA ID, caching it on the roster row
+def resolve_nba_player_id(player_name, roster_id=None):
+    if roster_id is not None:
+        nba_player_id = rapsdb.get_player_nba_id(roster_id)
+        if nba_player_id is not None:
+            return nba_player_id
+
+    nba_player_id = find_nba_player_id(player_name)
+    if nba_player_id is not None and roster_id is not None:
+        rapsdb.set_player_nba_id(roster_id, nba_player_id)
+    return nba_player_id
+
+# NBA season label for a date, e.g. "2024-25" from October 2024 to September 2025
+def current_season(today=None):
+    return rapsdb.season_for_date(today or date.today())
+
+# Seconds a cached response for this season stays fresh, None for never expiring
+def season_ttl(season):
+    if season < current_season():
+        return None
+    return CURRENT_SEASON_TTL
+
+def _count(counter):
+    with _cache_lock:
+        cache_counters[counter] += 1
+
+def get_cache_counters():
+    with _cache_lock:
+        return dict(cache_counters)
+
+# Look up a cached response, returns None on a miss or an expired entry
+def get_cached_response(nba_player_id, season, endpoint):
+    now = time.time()
+    row = rapsdb.get_cached_stats(nba_player_id, season, endpoint, now)
+    if row is None:
+        _count('misses')
+        return None
+
+    payload, fetched_at = row
+    ttl = season_ttl(season)
+    if ttl is not None and now - fetched_at > ttl:
+        _count('expired')
+        return None
+
+    _count('hits')
+    return json.loads(payload)
+
+def cache_response(nba_player_id, season, endpoint, data):
+    rapsdb.put_cached_stats(nba_player_id, season, endpoint, json.dumps(data),
+                            time.time(), STATS_CACHE_MAX_ENTRIES)
+
+# Fetch season averages for an NBA player ID from the stats API
+@rapsmetrics.timed('nba.fetch_season_stats')
+def fetch_season_stats(nba_player_id, season):
+    # Overall line of the full-season (last 82 games) dashboard
+    season_stats = rapsbackend.fetch_frame(rapsbackend.PLAYER_DASHBOARD, PlayerID=nba_player_id, Season=season)
+
+    # Calculate per-game averages
+    games_played = int(season_stats['GP'].iloc[0])
+
+    return {
+        'PPG': round(float(season_stats['PTS'].iloc[0]) / games_played, 1) if games_played > 0 else 0,
+        'RPG': round(float(season_stats['REB'].iloc[0]) / games_played, 1) if games_played > 0 else 0,
+        'APG': round(float(season_stats['AST'].iloc[0]) / games_played, 1) if games_played > 0 else 0,
+        'FG_PCT': f"{round(float(season_stats['FG_PCT'].iloc[0]) * 100, 1)}%",
+        '3PT_PCT': f"{round(float(season_stats['FG3_PCT'].iloc[0]) * 100, 1)}%",
+        'GP': games_played
+    }
+
+# Persist a stats dict into player_season_stats for the roster view
+def store_season_stats(nba_player_id, season, stats):
+    rapsdb.save_player_season_stats([_season_stats_row(nba_player_id, season, stats)])
+
+def _season_stats_row(nba_player_id, season, stats):
+    return (
+        nba_player_id, season, stats['GP'], stats['PPG'], stats['RPG'], stats['APG'],
+        _percent(stats['FG_PCT']), _percent(stats['3PT_PCT']), time.time()
+    )
+
+def _percent(value):
+    try:
+        return float(str(value).rstrip('%'))
+    except ValueError:
+        return None
+
+# Resolve every roster player and fetch their stats for each season in parallel.
+# `fetch(nba_player_id, season)` defaults to the live API and can be swapped for a stub.
+# Requests go through the shared client, paced at `rate` while the prefetch runs.
+def prefetch_roster_stats(roster, seasons, max_workers=PREFETCH_WORKERS, rate=PREFETCH_RATE, fetch=None):
+    fetch = fetch or fetch_season_stats
+    summary = {'fetched': 0, 'cached': 0, 'failed': [], 'unresolved': []}
+
+    nba_ids = []
+    for player in roster:
+        nba_player_id = resolve_nba_player_id(player[1], player[0])
+        if nba_player_id is None:
+            summary['unresolved'].append(player[1])
+        else:
+            nba_ids.append(nba_player_id)
+
+    def load(nba_player_id, season):
+        stats = get_cached_response(nba_player_id, season, 'PlayerDashboardByLastNGames')
+        if stats is not None:
+            return stats, True
+        stats = fetch(nba_player_id, season)
+        cache_response(nba_player_id, season, 'PlayerDashboardByLastNGames', stats)
+        return stats, False
+
+    rows = []
+    client = rapsclient.get_client()
+    previous_rate = client.set_rate(rate)
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {
+                pool.submit(load, nba_player_id, season): (nba_player_id, season)
+                for nba_player_id in dict.fromkeys(nba_ids) for season in seasons
+            }
+            for future in as_completed(futures):
+                nba_player_id, season = futures[future]
+                try:
+                    stats, cached = future.result()
+                except Exception as e:
+                    summary['failed'].append((nba_player_id, season, str(e)))
+                    continue
+                summary['cached' if cached else 'fetched'] += 1
+                rows.append(_season_stats_row(nba_player_id, season, stats))
+    finally:
+        client.set_rate(previous_rate)
+
+    rapsdb.save_player_season_stats(rows)
+    return summary
+
+def get_player_season_stats(player_name, season, roster_id=None):
+    try:
+        # Find the NBA player ID based on the name
+        nba_player_id = resolve_nba_player_id(player_name, roster_id)
+
+        if nba_player_id is None:
+            log.info("No NBA player found for name: %s", player_name)
+            return None
+
+        stats = get_cached_response(nba_player_id, season, 'PlayerDashboardByLastNGames')
+        if stats is None:
+            stats = fetch_season_stats(nba_player_id, season)
+            cache_response(nba_player_id, season, 'PlayerDashboardByLastNGames', stats)
+            store_season_stats(nba_player_id, season, stats)
+        return stats
+    except Exception as e:
+        log.warning("Error retrieving stats for %s: %s", player_name, e)
+        return None
+
+# Games played by a team in a season as {"Oct 23, 2024": ["vs CLE", ...]}
+@rapsmetrics.timed('nba.get_team_schedule')
+def get_team_schedule(team_name=rapsdb.DEFAULT_TEAM, season=None):
+    games = fetch_team_games(find_team(team_name)['id'], season or current_season())
+
+    # Whole-column string operations instead of walking the rows
+    game_dates = games['GAME_DATE'].str.slice(0, 10)
+    home_away = games['MATCHUP'].str.contains(' vs. ', regex=False).map({True: 'vs', False: '@'})
+    labels = home_away + ' ' + games['MATCHUP'].str.split().str[-1]
+
+    schedule = {}
+    for game_date, day_labels in labels.groupby(game_dates, sort=False):
+        schedule[datetime.strptime(game_date, '%Y-%m-%d').strftime('%b %d, %Y')] = list(day_labels)
+    return schedule
+
+# Function to get full Raptors schedule
+def get_full_raptors_schedule(season=None):
+    return get_team_schedule(rapsdb.DEFAULT_TEAM, season)
+
+# Game ID prefixes of games that don't count (preseason, All-Star)
+EXHIBITION_GAME_PREFIXES = ('001', '003')
+
+def find_team(team_name):
+    for team in rapsbackend.get_backend().teams():
+        if team['full_name'] == team_name:
+            return team
+    raise ValueError(f"Unknown NBA team: {team_name!r}")
+
+# A team's played games in a season, only those on or after date_from (ISO) if given
+@rapsmetrics.timed('nba.fetch_team_games')
+def fetch_team_games(team_id, season, date_from=None):
+    # The endpoint takes dates as MM/DD/YYYY
+    date_from = f"{date_from[5:7]}/{date_from[8:10]}/{date_from[:4]}" if date_from else ''
+    return rapsbackend.fetch_frame(rapsbackend.TEAM_GAMES, TeamID=team_id, Season=season, DateFrom=date_from)
+
+# Rows for rapsdb.apply_game_results from a LeagueGameFinder frame
+def _game_results(games):
+    games = games[~games['GAME_ID'].astype(str).str.startswith(EXHIBITION_GAME_PREFIXES)]
+    games = games.dropna(subset=['PTS', 'PLUS_MINUS'])
+    names = {team['abbreviation']: team['full_name'] for team in rapsbackend.get_backend().teams()}
+
+    opponents = games['MATCHUP'].str.split().str[-1]
+    results = zip(
+        games['GAME_DATE'].str.slice(0, 10),
+        games['GAME_ID'].astype(str),
+        opponents.map(lambda abbreviation: names.get(abbreviation, abbreviation)),
+        games['MATCHUP'].str.contains(' vs. ', regex=False).map({True: 'Home', False: 'Away'}),
+        games['PTS'].astype(int),
+        (games['PTS'] - games['PLUS_MINUS']).round().astype(int),
+        games['WL']
+    )
+    return [(game_date, game_id, opponent, location, int(team_score), int(opponent_score), result or None)
+            for game_date, game_id, opponent, location, team_score, opponent_score, result in results]
+
+# Pull results played since the last sync and write them onto the schedule.
+# Only games from the last synced date on are requested, so repeat syncs are
+# a single small request. `fetch(team_id, season, date_from)` defaults to the
+# live API. Returns what changed, see rapsdb.apply_game_results.
+def sync_team_results(team_name=rapsdb.DEFAULT_TEAM, season=None, fetch=None):
+    fetch = fetch or fetch_team_games
+    season = season or current_season()
+    team = find_team(team_name)
+
+    # The last synced day is requested again in case its result was corrected
+    date_from = rapsdb.get_sync_state(team_name, season)
+    games = fetch(team['id'], season, date_from)
+    results = _game_results(games)
+
+    last_game_date = max((result[0] for result in results), default=None)
+    changes = rapsdb.apply_game_results(team_name, season, results, last_game_date, time.time())
+    changes.update(team=team_name, season=season, date_from=date_from, fetched=len(results))
+    return changes
@@ -0,0 +1,105 @@
+from collections import namedtuple
+import rapsdb
+
+# Only the first errors are kept in full so huge bad files don't eat memory
+MAX_REPORTED_ERRORS = 100
+
+# Spellings accepted for the location column
+LOCATIONS = {
+    'home': 'Home',
+    'h': 'Home',
+    'vs': 'Home',
+    'vs.': 'Home',
+    'away': 'Away',
+    'a': 'Away',
+    '@': 'Away',
+    'at': 'Away'
+}
+
+# Times that mean "not scheduled yet"
+UNKNOWN_TIMES = {'', 'tbd', 'tba'}
+
+# One validated game; game_date is ISO and game_time "HH:MM" (24h, '' if unknown).
+# team is None unless the source names one (the importer's default is used then)
+ScheduleRecord = namedtuple('ScheduleRecord', ['line_number', 'game_date', 'opponent', 'location',
+                                               'game_time', 'time_zone', 'team', 'game_id', 'team_score',
+                                               'opponent_score', 'result'], defaults=[None] * 5)
+
+ParseError = namedtuple('ParseError', ['line_number', 'line', 'message'])
+
+# Running totals for a parse, with the first MAX_REPORTED_ERRORS errors
+class ParseReport:
+    def __init__(self, max_errors=MAX_REPORTED_ERRORS):
+        self.max_errors = max_errors
+        self.lines = 0
+        self.records = 0
+        self.error_count = 0
+        self.errors = []
+
+    def add_error(self, line_number, line, message):
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append(ParseError(line_number, line, message))
+
+    def summary(self, limit=5):
+        lines = [f"Line {error.line_number}: {error.message}" for error in self.errors[:limit]]
+        if self.error_count > limit:
+            lines.append(f"... and {self.error_count - limit} more")
+        return "\n".join(lines)
+
+# Validate one game's fields as text, returns (record, error message)
+def schedule_record(line_number, game_date_text, opponent, location_text, time_text, team=None):
+    game_date_text, opponent = (game_date_text or '').strip(), (opponent or '').strip()
+    location_text, time_text = (location_text or '').strip(), (time_text or '').strip()
+
+    game_date = rapsdb.normalize_game_date(game_date_text)
+    if game_date is None:
+        return None, f"unrecognized date {game_date_text!r}"
+
+    if not opponent:
+        return None, "missing opponent"
+
+    location = LOCATIONS.get(location_text.lower())
+    if location is None:
+        return None, f"unrecognized location {location_text!r} (expected Home or Away)"
+
+    game_time, time_zone = rapsdb.parse_game_time(time_text)
+    if not game_time and time_text.lower() not in UNKNOWN_TIMES:
+        return None, f"unrecognized time {time_text!r}"
+
+    return ScheduleRecord(line_number, game_date, opponent, location, game_time, time_zone, team or None), None
+
+# Validate one "date, opponent, location, time" line, returns (record, error message)
+def parse_schedule_line(line, line_number=0):
+    parts = line.split(',')
+
+    # Tolerate a trailing comma ("..., 7:30 PM EST,")
+    while len(parts) > 4 and not parts[-1].strip():
+        parts.pop()
+    if len(parts) != 4:
+        return None, f"expected 4 comma-separated fields, found {len(parts)}"
+
+    return schedule_record(line_number, *parts)
+
+# Yield a ScheduleRecord for every valid line; blank lines and "#" comments are
+# skipped and bad lines are recorded on `report` without stopping the parse
+def parse_schedule_lines(lines, report=None):
+    report = report if report is not None else ParseReport()
+    for line_number, raw_line in enumerate(lines, start=1):
+        report.lines += 1
+        line = raw_line.strip()
+        if not line or line.startswith('#'):
+            continue
+
+        record, error = parse_schedule_line(line, line_number)
+        if error:
+            report.add_error(line_number, line, error)
+            continue
+
+        report.records += 1
+        yield record
+
+# Stream records from a schedule file, one line in memory at a time
+def iter_schedule_file(filename, report=None):
+    with open(filename, 'r', encoding='utf-8-sig', errors='replace') as file:
+        yield from parse_schedule_lines(file, report)
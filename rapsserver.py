@@ -0,0 +1,349 @@
+# Read-only JSON service over raptors.db for dashboards, built on asyncio
+# streams (no dependencies). Queries run on a thread pool sharing the rapsdb
+# connection pool; every response carries an ETag made from the change
+# counters of the tables it reads, so a client sending If-None-Match gets a
+# bodyless 304 until one of those tables changes.
+#
+#   python -m raptors serve --port 8000
+#
+#   GET /roster?position=G&min_age=&max_age=&min_salary=&max_salary=&name=&q=
+#              &order_by=salary_cents&desc=1&limit=50&offset=0&season=2024-25
+#   GET /roster/changes?since=<version>&limit=500
+#   GET /roster/<id>
+#   GET /roster/<id>/stats?season=2024-25
+#   GET /schedule?start=2024-11-01&end=2024-11-30&team=Toronto+Raptors
+#   GET /search?q=scot+bar&limit=20
+#   GET /health
+import re
+import json
+import math
+import asyncio
+from urllib.parse import urlsplit, parse_qs
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+import rapsdb
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8000
+WORKERS = 8
+
+# Requests larger than this are refused rather than buffered (lines longer
+# than the stream limit, 64 KiB, are refused too)
+MAX_HEADER_LINES = 100
+MAX_BODY_BYTES = 64 * 1024
+KEEP_ALIVE_TIMEOUT = 15
+
+STATUS_TEXT = {
+    200: 'OK',
+    304: 'Not Modified',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    413: 'Payload Too Large',
+    431: 'Request Header Fields Too Large',
+    500: 'Internal Server Error'
+}
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+# Query string helpers; a malformed value is the client's fault (400). Numbers
+# are bound as SQLite parameters, which hold at most a signed 64-bit integer
+SQLITE_INT_MIN = -2 ** 63
+SQLITE_INT_MAX = 2 ** 63 - 1
+
+def _text(params, name):
+    values = params.get(name)
+    return values[-1] if values else None
+
+def _int(params, name):
+    value = _text(params, name)
+    if value is None or value == '':
+        return None
+    try:
+        number = int(value)
+    except ValueError:
+        raise HTTPError(400, f"{name} must be an integer")
+    if not SQLITE_INT_MIN <= number <= SQLITE_INT_MAX:
+        raise HTTPError(400, f"{name} is out of range")
+    return number
+
+def _float(params, name):
+    value = _text(params, name)
+    if value is None or value == '':
+        return None
+    try:
+        number = float(value)
+    except ValueError:
+        raise HTTPError(400, f"{name} must be a number")
+    if not math.isfinite(number):
+        raise HTTPError(400, f"{name} must be a finite number")
+    return number
+
+# A salary in dollars, compared as cents
+def _salary(params, name):
+    salary = _float(params, name)
+    if salary is not None and not SQLITE_INT_MIN <= round(salary * 100) <= SQLITE_INT_MAX:
+        raise HTTPError(400, f"{name} is out of range")
+    return salary
+
+# A player ID from the path; one too large for SQLite cannot exist
+def _player_id(player_id):
+    number = int(player_id)
+    if number > SQLITE_INT_MAX:
+        raise HTTPError(404, f"No player with id {player_id}")
+    return number
+
+def _iso_date(params, name):
+    value = _text(params, name)
+    if value is None or value == '':
+        return None
+    game_date = rapsdb.normalize_game_date(value)
+    if game_date is None:
+        raise HTTPError(400, f"{name} must be a date (YYYY-MM-DD)")
+    return game_date
+
+def player_json(player):
+    data = player._asdict()
+    data.update(height=player.height, weight=player.weight, salary=player.salary)
+    return data
+
+def game_json(game):
+    data = game._asdict()
+    data['time'] = game.time
+    return data
+
+# Route handlers run on the worker threads and return a JSON-ready object
+
+def roster_list(params):
+    filters = dict(
+        position=_text(params, 'position'),
+        min_age=_int(params, 'min_age'),
+        max_age=_int(params, 'max_age'),
+        min_salary=_salary(params, 'min_salary'),
+        max_salary=_salary(params, 'max_salary'),
+        name_prefix=_text(params, 'name'),
+        search=_text(params, 'q')
+    )
+    order_by = _text(params, 'order_by') or 'id'
+    if order_by not in rapsdb.PLAYER_SORT_COLUMNS:
+        raise HTTPError(400, f"order_by must be one of: {', '.join(rapsdb.PLAYER_SORT_COLUMNS)}")
+
+    players = rapsdb.query_players(order_by=order_by, descending=_text(params, 'desc') in ('1', 'true'),
+                                   limit=_int(params, 'limit'), offset=_int(params, 'offset'),
+                                   season=_text(params, 'season') or rapsdb.season_for_date(date.today()),
+                                   **filters)
+    return {'count': rapsdb.count_players(**filters), 'players': [player_json(p) for p in players]}
+
+def roster_player(params, player_id):
+    season = _text(params, 'season') or rapsdb.season_for_date(date.today())
+    player = rapsdb.get_player_with_stats(_player_id(player_id), season)
+    if player is None:
+        raise HTTPError(404, f"No player with id {player_id}")
+    return player_json(player)
+
+def roster_player_stats(params, player_id):
+    player_id = _player_id(player_id)
+    if rapsdb.get_player_by_id(player_id) is None:
+        raise HTTPError(404, f"No player with id {player_id}")
+    stats = rapsdb.get_stored_season_stats(player_id, _text(params, 'season'))
+    return {'player_id': player_id, 'seasons': [row._asdict() for row in stats]}
+
+# Journal entries after a version, for clients patching a cached roster
+def roster_changes(params):
+    changes = rapsdb.get_roster_changes(_int(params, 'since') or 0, _int(params, 'limit') or 500)
+    version = changes[-1].version if changes else rapsdb.get_roster_version()
+    return {'version': version, 'changes': [change._asdict() for change in changes]}
+
+def schedule_range(params):
+    games = rapsdb.get_games_between(_iso_date(params, 'start'), _iso_date(params, 'end'),
+                                     _text(params, 'team'))
+    return {'count': len(games), 'games': [game_json(game) for game in games]}
+
+def search(params):
+    text = _text(params, 'q') or ''
+    limit = _int(params, 'limit') or 20
+    players = rapsdb.search_players(text, limit, rapsdb.season_for_date(date.today()))
+    games = rapsdb.search_games(text, limit, _text(params, 'team'))
+    return {'players': [player_json(p) for p in players], 'games': [game_json(g) for g in games]}
+
+def health(params):
+    return {'status': 'ok', 'schema_version': rapsdb.get_schema_version()}
+
+# (path pattern, handler, tables whose changes invalidate the response)
+ROUTES = [
+    (re.compile(r'^/roster$'), roster_list, ('roster', 'player_season_stats')),
+    (re.compile(r'^/roster/changes$'), roster_changes, ('roster',)),
+    (re.compile(r'^/roster/(\d+)$'), roster_player, ('roster', 'player_season_stats')),
+    (re.compile(r'^/roster/(\d+)/stats$'), roster_player_stats, ('roster', 'player_season_stats')),
+    (re.compile(r'^/schedule$'), schedule_range, ('schedule',)),
+    (re.compile(r'^/search$'), search, ('roster', 'player_season_stats', 'schedule')),
+    (re.compile(r'^/health$'), health, ())
+]
+
+def etag_for(tables):
+    if not tables:
+        return None
+    versions = rapsdb.get_table_versions(tables)
+    return '"' + '.'.join(str(versions.get(table, 0)) for table in tables) + '"'
+
+def _matches(if_none_match, etag):
+    if not if_none_match or etag is None:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in tags or etag in tags or f'W/{etag}' in tags
+
+class RaptorsServer:
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, workers=WORKERS):
+        self.host = host
+        self.port = port
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='rapsserver')
+        self.server = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        # Port 0 picks a free port, report the real one
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        async with self.server:
+            await self.server.serve_forever()
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    # Run one request against the database: (status, body, etag)
+    def dispatch(self, method, target, headers):
+        url = urlsplit(target)
+        params = parse_qs(url.query)
+        for pattern, handler, tables in ROUTES:
+            match = pattern.match(url.path)
+            if match:
+                break
+        else:
+            raise HTTPError(404, f"No route for {url.path}")
+        if method not in ('GET', 'HEAD'):
+            raise HTTPError(405, "Only GET and HEAD are supported")
+
+        etag = etag_for(tables)
+        if _matches(headers.get('if-none-match'), etag):
+            return 304, None, etag
+        return 200, handler(params, *match.groups()), etag
+
+    async def handle_connection(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), KEEP_ALIVE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                except ValueError:
+                    await self.respond(writer, 400, {'error': "Request line too long"}, close=True)
+                    break
+                if not request_line:
+                    break
+
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self.respond(writer, 400, {'error': "Malformed request line"}, close=True)
+                    break
+
+                headers = {}
+                while True:
+                    try:
+                        line = await asyncio.wait_for(reader.readline(), KEEP_ALIVE_TIMEOUT)
+                    except asyncio.TimeoutError:
+                        return
+                    except ValueError:
+                        await self.respond(writer, 400, {'error': "Header line too long"}, close=True)
+                        return
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    if len(headers) >= MAX_HEADER_LINES:
+                        await self.respond(writer, 431, {'error': "Too many headers"}, close=True)
+                        return
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                # Bodies are ignored, but must be drained to keep the connection
+                # usable; a client that stops sending is hung up on
+                try:
+                    length = int(headers.get('content-length') or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self.respond(writer, 400, {'error': "Invalid Content-Length"}, close=True)
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self.respond(writer, 413, {'error': "Request body too large"}, close=True)
+                    break
+                if length:
+                    try:
+                        await asyncio.wait_for(reader.readexactly(length), KEEP_ALIVE_TIMEOUT)
+                    except asyncio.TimeoutError:
+                        break
+
+                connection_header = headers.get('connection', '').lower()
+                close = connection_header == 'close' or (version == 'HTTP/1.0' and connection_header != 'keep-alive')
+
+                try:
+                    status, body, etag = await loop.run_in_executor(
+                        self.executor, self.dispatch, method.upper(), target, headers)
+                except HTTPError as e:
+                    status, body, etag = e.status, {'error': str(e)}, None
+                except Exception as e:
+                    status, body, etag = 500, {'error': f"{type(e).__name__}: {e}"}, None
+
+                await self.respond(writer, status, body, etag, close, head=method.upper() == 'HEAD')
+                if close:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, writer, status, body, etag=None, close=False, head=False):
+        payload = b'' if body is None else json.dumps(body).encode('utf-8')
+        lines = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}"]
+        if status != 304:
+            lines.append('Content-Type: application/json')
+            lines.append(f'Content-Length: {len(payload)}')
+        if etag:
+            lines.append(f'ETag: {etag}')
+            # Dashboards may keep the body but must revalidate before using it
+            lines.append('Cache-Control: no-cache')
+        lines.append(f"Connection: {'close' if close else 'keep-alive'}")
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        if not head and status != 304:
+            writer.write(payload)
+        await writer.drain()
+
+# Serve until interrupted; the pool gets one connection per worker thread
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, workers=WORKERS, db_path=rapsdb.DB_PATH):
+    rapsdb.configure(db_path, pool_size=workers)
+    rapsdb.migrate()
+
+    async def run():
+        server = await RaptorsServer(host, port, workers).start()
+        print(f"Serving {db_path} on http://{server.host}:{server.port}", flush=True)
+        try:
+            await server.serve_forever()
+        finally:
+            server.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        rapsdb.close_connections()
+
+if __name__ == '__main__':
+    serve()
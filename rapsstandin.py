@@ -0,0 +1,86 @@
+# Local stand-in for stats.nba.com: serves responses from any rapsbackend
+# backend (normally a snapshot file) over the stats.nba.com URL scheme, so
+# nba_api itself can be pointed at it with RAPTORS_NBA=http://127.0.0.1:8001.
+#
+#   python -m raptors nba-standin snapshot.db --port 8001
+#
+#   GET /stats/<endpoint>?PlayerID=...&Season=...   stats.nba.com JSON
+#   GET /static/players, /static/teams                nba_api's static lists
+#   GET /health
+import json
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qsl
+import rapsbackend
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8001
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = dict(parse_qsl(url.query, keep_blank_values=True))
+        parts = url.path.strip('/').split('/')
+        backend = self.server.backend
+        try:
+            if parts[0] == 'stats' and len(parts) == 2:
+                self.respond(200, backend.get(parts[1].lower(), params))
+            elif parts == ['static', 'players']:
+                self.respond(200, backend.players())
+            elif parts == ['static', 'teams']:
+                self.respond(200, backend.teams())
+            elif parts == ['health']:
+                self.respond(200, {'status': 'ok', 'backend': backend.name})
+            else:
+                self.respond(404, {'error': f"No route for {url.path}"})
+        except rapsbackend.MissingData as e:
+            self.respond(404, {'error': str(e)})
+        except rapsbackend.BackendError as e:
+            self.respond(400, {'error': str(e)})
+        except Exception as e:
+            self.respond(500, {'error': f"{type(e).__name__}: {e}"})
+
+    def respond(self, status, body):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, backend, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        super().__init__((host, port), StandInHandler)
+        self.backend = backend
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    # Serve on a daemon thread (tests, benchmarks), returns the thread
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever, name='rapsstandin', daemon=True)
+        thread.start()
+        return thread
+
+# Serve a backend setting (snapshot path, 'live' to proxy) until interrupted
+def serve(spec, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    backend = rapsbackend.open_backend(spec)
+    backend.activate()
+    server = StandInServer(backend, host, port)
+    print(f"Serving NBA data from {backend.name} on {server.url}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        backend.close()
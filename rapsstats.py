@@ -0,0 +1,169 @@
+import time
+import pandas as pd
+import rapsdb
+import rapsnba
+import rapsmetrics
+import rapsbackend
+
+# Stats engine: league game logs are fetched once per season, stored in the
+# game_logs table and aggregated with pandas group-bys over every player at
+# once (season averages, last-N windows, home/away and monthly splits).
+
+# Counting stats averaged per game
+PER_GAME_COLUMNS = ['pts', 'reb', 'ast', 'stl', 'blk', 'tov', 'minutes']
+
+# Shooting percentages as (name, made, attempted), computed from season totals
+SHOOTING_COLUMNS = [
+    ('fg_pct', 'fgm', 'fga'),
+    ('fg3_pct', 'fg3m', 'fg3a'),
+    ('ft_pct', 'ftm', 'fta')
+]
+
+BOX_SCORE_COLUMNS = ['fgm', 'fga', 'fg3m', 'fg3a', 'ftm', 'fta', 'oreb', 'dreb', 'reb', 'ast', 'stl',
+                     'blk', 'tov', 'pf', 'pts', 'plus_minus']
+
+# Stats cache endpoint name for the per-player dicts written from game logs;
+# the same dict shape as rapsnba.fetch_season_stats so profiles read them as-is
+STATS_ENDPOINT = 'PlayerDashboardByLastNGames'
+
+# Every player's box scores for a season, one request for the whole league
+@rapsmetrics.timed('nba.fetch_league_game_logs')
+def fetch_league_game_logs(season):
+    return rapsbackend.fetch_frame(rapsbackend.LEAGUE_GAME_LOG, Season=season)
+
+# LeagueGameLog frame -> frame with the game_logs columns
+def normalize_game_logs(frame, season):
+    logs = pd.DataFrame({
+        'nba_player_id': frame['PLAYER_ID'].astype('int64'),
+        'game_id': frame['GAME_ID'].astype(str),
+        'season': season,
+        'game_date': pd.to_datetime(frame['GAME_DATE']).dt.strftime('%Y-%m-%d'),
+        'team': frame['TEAM_ABBREVIATION'],
+        'matchup': frame['MATCHUP'],
+        'home': frame['MATCHUP'].str.contains(' vs. ', regex=False).astype('int64'),
+        'wl': frame['WL'],
+        'minutes': pd.to_numeric(frame['MIN'], errors='coerce')
+    })
+    for column in BOX_SCORE_COLUMNS:
+        logs[column] = pd.to_numeric(frame[column.upper()], errors='coerce')
+    return logs[rapsdb.GAME_LOG_COLUMNS]
+
+# Stored game logs for a season as a frame, optionally only some players
+def load_game_logs(season, nba_player_ids=None):
+    return pd.DataFrame.from_records(rapsdb.get_game_logs(season, nba_player_ids),
+                                     columns=rapsdb.GAME_LOG_COLUMNS)
+
+# Plain Python rows for sqlite3, which doesn't take numpy scalars or NaN
+def _sql_rows(frame):
+    values = frame.astype(object).where(frame.notna(), None)
+    return values.itertuples(index=False, name=None)
+
+def save_game_logs(logs):
+    return rapsdb.save_game_logs(_sql_rows(logs))
+
+def _percent(made, attempted):
+    return (100 * made / attempted.where(attempted > 0)).round(1)
+
+# Per-game averages and shooting percentages for each group (by player unless
+# other keys are given); one row per group with gp, the averages and the totals
+def season_averages(logs, keys=('nba_player_id',)):
+    grouped = logs.groupby(list(keys))
+    totals = grouped[PER_GAME_COLUMNS + [made for _, made, _ in SHOOTING_COLUMNS] +
+                     [attempted for _, _, attempted in SHOOTING_COLUMNS]].sum()
+    gp = grouped.size()
+
+    averages = totals[PER_GAME_COLUMNS].div(gp, axis=0).round(1)
+    averages.columns = [f'{column}_per_game' for column in PER_GAME_COLUMNS]
+    for name, made, attempted in SHOOTING_COLUMNS:
+        averages[name] = _percent(totals[made], totals[attempted])
+    averages.insert(0, 'gp', gp)
+    return averages
+
+# Averages over each player's last `n` games of the season
+def last_n_averages(logs, n):
+    recent = logs.sort_values(['nba_player_id', 'game_date']).groupby('nba_player_id').tail(n)
+    return season_averages(recent)
+
+# Rolling `n`-game averages after every game, for charts and trends
+def rolling_averages(logs, n, columns=('pts', 'reb', 'ast')):
+    ordered = logs.sort_values(['nba_player_id', 'game_date'])
+    rolled = ordered.groupby('nba_player_id')[list(columns)].rolling(n, min_periods=1).mean()
+    result = ordered[['nba_player_id', 'game_id', 'game_date']].copy()
+    for column in columns:
+        result[f'{column}_last_{n}'] = rolled[column].droplevel(0).round(1)
+    return result
+
+# Averages split by 'home' (Home/Away) or 'month' (YYYY-MM) for every player
+def split_averages(logs, by):
+    if by == 'home':
+        key = logs['home'].map({1: 'Home', 0: 'Away'})
+    elif by == 'month':
+        key = logs['game_date'].str[:7]
+    else:
+        raise ValueError(f"Cannot split stats by {by!r}")
+    return season_averages(logs.assign(split=key), keys=('nba_player_id', 'split'))
+
+# Season averages in the player_season_stats row shape
+def _season_stats_rows(averages, season):
+    frame = pd.DataFrame({
+        'nba_player_id': averages.index,
+        'season': season,
+        'gp': averages['gp'].to_numpy(),
+        'ppg': averages['pts_per_game'].to_numpy(),
+        'rpg': averages['reb_per_game'].to_numpy(),
+        'apg': averages['ast_per_game'].to_numpy(),
+        'fg_pct': averages['fg_pct'].to_numpy(),
+        'fg3_pct': averages['fg3_pct'].to_numpy(),
+        'updated_at': time.time()
+    })
+    return _sql_rows(frame)
+
+# The dict rapsnba.fetch_season_stats returns, for the stats cache
+def _stats_dicts(averages):
+    shooting = averages[['fg_pct', 'fg3_pct']].fillna(0.0)
+    table = pd.DataFrame({
+        'PPG': averages['pts_per_game'],
+        'RPG': averages['reb_per_game'],
+        'APG': averages['ast_per_game'],
+        'FG_PCT': shooting['fg_pct'].map('{:.1f}%'.format),
+        '3PT_PCT': shooting['fg3_pct'].map('{:.1f}%'.format),
+        'GP': averages['gp']
+    })
+    return {int(nba_player_id): {key: (value.item() if hasattr(value, 'item') else value)
+                                 for key, value in row.items()}
+            for nba_player_id, row in table.to_dict('index').items()}
+
+# Pull the league's game logs for each season (completed seasons only once),
+# store them, and write the roster's season averages to player_season_stats
+# and the stats cache. `fetch(season)` defaults to the live API.
+def refresh_season_stats(seasons, roster=None, fetch=None):
+    fetch = fetch or fetch_league_game_logs
+    roster = rapsdb.get_all_players() if roster is None else roster
+    summary = {'fetched': [], 'cached': [], 'failed': [], 'unresolved': [], 'players': 0}
+
+    nba_ids = []
+    for player in roster:
+        nba_player_id = rapsnba.resolve_nba_player_id(player[1], player[0])
+        if nba_player_id is None:
+            summary['unresolved'].append(player[1])
+        else:
+            nba_ids.append(nba_player_id)
+
+    for season in seasons:
+        if season < rapsnba.current_season() and rapsdb.count_game_logs(season):
+            summary['cached'].append(season)
+        else:
+            try:
+                save_game_logs(normalize_game_logs(fetch(season), season))
+            except Exception as e:
+                summary['failed'].append((season, str(e)))
+                continue
+            summary['fetched'].append(season)
+
+        averages = season_averages(load_game_logs(season, set(nba_ids)))
+        rapsdb.save_player_season_stats(_season_stats_rows(averages, season))
+        for nba_player_id, stats in _stats_dicts(averages).items():
+            rapsnba.cache_response(nba_player_id, season, STATS_ENDPOINT, stats)
+        summary['players'] = max(summary['players'], len(averages))
+
+    return summary
@@ -0,0 +1,203 @@
+# View models: what each page of the app shows, computed from the database
+# (and the NBA API) with no Tk code, so rapsapp can build them on its worker
+# threads and only turn the finished model into widgets. They can also be
+# built and benchmarked headlessly (benchmarks/bench_suite.py).
+#
+# Models are memoized per arguments and invalidated by the change counters of
+# the tables they read (rapsdb.get_table_versions): asking again when nothing
+# has changed costs one small query.
+import time
+import threading
+import functools
+from collections import namedtuple, OrderedDict
+import rapsdb
+import rapsmetrics
+from rapsnba import get_player_season_stats, CURRENT_SEASON_TTL
+from rapscalendar import load_schedule_months, load_seasons, default_season, month_weeks, month_title
+
+# Models kept per builder, least recently used dropped first
+MEMO_ENTRIES = 32
+
+# Memoize a model builder on its arguments. An entry is reused while the
+# versions of `tables` are the ones read before it was built and, with `ttl`,
+# for at most that many seconds. None results (a missing player, a failed
+# fetch) are not kept. The builder gains peek(), the model only if it is
+# cached and current (for rendering without a round trip to a worker), and
+# cache_clear().
+def memoized(tables, ttl=None, max_entries=MEMO_ENTRIES):
+    def decorate(func):
+        name = func.__name__
+        cache = OrderedDict()
+        lock = threading.Lock()
+
+        def lookup(key, versions):
+            with lock:
+                entry = cache.get(key)
+                if entry is None:
+                    return None
+                entry_versions, built_at, model = entry
+                if entry_versions != versions or (ttl is not None and time.monotonic() - built_at > ttl):
+                    del cache[key]
+                    return None
+                cache.move_to_end(key)
+                return model
+
+        def current_versions():
+            if not tables:
+                return ()
+            versions = rapsdb.get_table_versions(tables)
+            return tuple(versions.get(table, 0) for table in tables)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = args + tuple(sorted(kwargs.items()))
+            # Versions are read before building, so a change made meanwhile
+            # makes the next call build again
+            versions = current_versions()
+            model = lookup(key, versions)
+            if model is not None:
+                rapsmetrics.increment(f'view.{name}.hits')
+                return model
+
+            rapsmetrics.increment(f'view.{name}.misses')
+            model = func(*args, **kwargs)
+            if model is not None:
+                with lock:
+                    cache[key] = (versions, time.monotonic(), model)
+                    cache.move_to_end(key)
+                    while len(cache) > max_entries:
+                        cache.popitem(last=False)
+            return model
+
+        def peek(*args, **kwargs):
+            return lookup(args + tuple(sorted(kwargs.items())), current_versions())
+
+        def cache_clear():
+            with lock:
+                cache.clear()
+
+        wrapper.peek = peek
+        wrapper.cache_clear = cache_clear
+        return wrapper
+    return decorate
+
+# Roster
+
+# A page of roster rows: the PlayerRows (for paging and placing rows) and
+# their display values; exhausted when there are no more rows after it
+RosterPage = namedtuple('RosterPage', ['players', 'values', 'exhausted'])
+
+# Format a PlayerRow for display
+def roster_row_values(player):
+    return (
+        player.name,
+        player.position,
+        player.age,
+        player.height,
+        player.weight,
+        player.salary,
+        *("-" if stat is None else stat for stat in (player.ppg, player.rpg, player.apg))
+    )
+
+# `filters` are query_players keyword arguments as sorted (name, value) pairs
+@memoized(('roster', 'player_season_stats'))
+@rapsmetrics.timed('view.roster_page')
+def roster_page(order_by='id', descending=False, after=None, filters=(), season=None, limit=100):
+    players = tuple(rapsdb.query_players(order_by=order_by, descending=descending, limit=limit, after=after,
+                                         season=season, **dict(filters)))
+    return RosterPage(players, tuple(roster_row_values(player) for player in players), len(players) < limit)
+
+# Schedule
+
+# A calendar day and its games as display strings
+ScheduleDay = namedtuple('ScheduleDay', ['day', 'games'])
+
+# A month tab: weeks of 7 ScheduleDays, None for days outside the month
+ScheduleMonth = namedtuple('ScheduleMonth', ['year', 'month', 'title', 'weeks'])
+
+# A team's season: `seasons` and `teams` fill the pickers
+Schedule = namedtuple('Schedule', ['season', 'team', 'seasons', 'teams', 'months'])
+
+def schedule_month(year, month, days_with_games):
+    weeks = tuple(
+        tuple(ScheduleDay(day, tuple(days_with_games.get(day, ()))) if day else None for day in week)
+        for week in month_weeks(year, month)
+    )
+    return ScheduleMonth(year, month, month_title(year, month), weeks)
+
+# Schedule of a team's season, the current (or latest) one if `season` has no games
+@memoized(('schedule',))
+@rapsmetrics.timed('view.schedule')
+def schedule(season=None, team=rapsdb.DEFAULT_TEAM):
+    seasons = load_seasons(team)
+    if season not in seasons:
+        season = default_season(seasons)
+
+    games = load_schedule_months(season, team)
+    months = tuple(schedule_month(year, month, games.get((year, month), {})) for year, month in seasons[season])
+    return Schedule(season, team, tuple(seasons), tuple(rapsdb.get_schedule_teams()) or (team,), months)
+
+# Player profile
+
+# Name and (label, value) details of a player
+PlayerProfile = namedtuple('PlayerProfile', ['player_id', 'name', 'details'])
+
+# One season's averages as table headers and values
+ProfileStats = namedtuple('ProfileStats', ['season', 'headers', 'values'])
+
+STATS_COLUMNS = [
+    ('PPG', "Points Per Game"),
+    ('RPG', "Rebounds Per Game"),
+    ('APG', "Assists Per Game"),
+    ('FG_PCT', "Field Goal %"),
+    ('3PT_PCT', "3-Point %")
+]
+
+@memoized(('roster',))
+@rapsmetrics.timed('view.player_profile')
+def player_profile(player_id):
+    player = rapsdb.get_player_by_id(player_id)
+    if player is None:
+        return None
+    details = (
+        ("Position", player.position),
+        ("Age", player.age),
+        ("Height", player.height),
+        ("Weight", player.weight),
+        ("Salary", player.salary)
+    )
+    return PlayerProfile(player_id, player.name, details)
+
+# Season averages from the stats cache or the NBA API; None if there are none
+# (or the request failed, in which case the next view tries again). Kept no
+# longer than the stats cache keeps current season stats, and not tied to
+# table versions: fetching the stats stores them in player_season_stats (and
+# may record the player's NBA ID), which would make every new entry stale at
+# once. Instead the entry is keyed on the player's name and NBA ID, so renaming
+# a player or correcting their NBA ID builds it again.
+@memoized((), ttl=CURRENT_SEASON_TTL)
+@rapsmetrics.timed('view.profile_stats')
+def _profile_stats(player_id, name, nba_id, season):
+    stats = get_player_season_stats(name, season, player_id)
+    if not stats:
+        return None
+    return ProfileStats(season, tuple(header for _, header in STATS_COLUMNS),
+                        tuple(stats[field] for field, _ in STATS_COLUMNS))
+
+# (player_id, name, nba_id) for _profile_stats, None for a missing player
+def _profile_stats_player(player_id):
+    player = rapsdb.get_player_by_id(player_id)
+    if player is None:
+        return None
+    return player_id, player.name, rapsdb.get_player_nba_id(player_id)
+
+def profile_stats(player_id, season):
+    player = _profile_stats_player(player_id)
+    return None if player is None else _profile_stats(*player, season)
+
+def _peek_profile_stats(player_id, season):
+    player = _profile_stats_player(player_id)
+    return None if player is None else _profile_stats.peek(*player, season)
+
+profile_stats.peek = _peek_profile_stats
+profile_stats.cache_clear = _profile_stats.cache_clear
@@ -0,0 +1,348 @@
+# Command-line interface for batch jobs, no display needed:
+#
+#   python -m raptors import-schedule raptors_schedule.txt
+#   python -m raptors import-roster roster.csv
+#   python -m raptors export schedule schedule.ics --season 2024-25
+#   python -m raptors list-roster --position G --order-by salary_cents --desc
+#   python -m raptors prefetch-stats --season 2024-25 --season 2023-24
+#   python -m raptors stats --season 2024-25 --split home
+#   python -m raptors sync-results --season 2024-25
+#   python -m raptors undo
+#   python -m raptors serve --port 8000
+#   python -m raptors nba-snapshot nba.db --season 2024-25
+#   python -m raptors --nba nba.db stats          (offline, from the snapshot)
+#   python -m raptors nba-standin nba.db --port 8001
+#   python -m raptors gui
+#
+# Every command brings the database schema up to date first.
+import sys
+import json
+import argparse
+import rapsdb
+import rapsmetrics
+from rapsparse import ParseReport
+
+# Columns printed by list-roster: (PlayerRow field or property, heading)
+ROSTER_LISTING = [
+    ('id', "ID"),
+    ('name', "Name"),
+    ('position', "Pos"),
+    ('age', "Age"),
+    ('height', "Height"),
+    ('weight', "Weight"),
+    ('salary', "Salary"),
+    ('ppg', "PPG"),
+    ('rpg', "RPG"),
+    ('apg', "APG")
+]
+
+# Print up to this many parse errors after an import
+ERRORS_SHOWN = 10
+
+def print_report(report):
+    if report.error_count:
+        print(f"{report.error_count} rows skipped:", file=sys.stderr)
+        print(report.summary(ERRORS_SHOWN), file=sys.stderr)
+
+# How many NBA requests were sent, shared with another caller or retried
+def print_client_stats():
+    from rapsclient import get_stats
+
+    stats = get_stats()
+    print(f"NBA requests: {stats['issued']} sent, {stats['coalesced']} shared, {stats['retried']} retried, "
+          f"{stats['throttled_seconds']:.1f} s throttled")
+
+def cmd_import_schedule(args):
+    from rapsio import import_schedule
+
+    report = ParseReport()
+    added, skipped = import_schedule(args.file, args.format, report, args.team)
+    print(f"New games added: {added}")
+    print(f"Duplicate games skipped: {skipped}")
+    print_report(report)
+    return 1 if args.strict and report.error_count else 0
+
+def cmd_import_roster(args):
+    from rapsio import import_roster
+
+    report = ParseReport()
+    written = import_roster(args.file, args.format, report)
+    print(f"Players added or updated: {written}")
+    print_report(report)
+    return 1 if args.strict and report.error_count else 0
+
+def cmd_export(args):
+    from rapsio import export_roster, export_schedule
+
+    if args.table == 'roster':
+        count = export_roster(args.file, args.format)
+    else:
+        count = export_schedule(args.file, args.format, args.season, args.team)
+    print(f"Exported {count} {'players' if args.table == 'roster' else 'games'} to {args.file}")
+    return 0
+
+def cmd_list_roster(args):
+    from rapsnba import current_season
+
+    players = rapsdb.query_players(
+        position=args.position, min_age=args.min_age, max_age=args.max_age,
+        min_salary=args.min_salary, max_salary=args.max_salary, name_prefix=args.name, search=args.search,
+        order_by=args.order_by, descending=args.desc, limit=args.limit, offset=args.offset,
+        season=args.season or current_season()
+    )
+
+    if args.json:
+        for player in players:
+            print(json.dumps(player._asdict()))
+        return 0
+
+    rows = [[heading for _, heading in ROSTER_LISTING]]
+    for player in players:
+        rows.append(['-' if value is None else str(value)
+                     for value in (getattr(player, field) for field, _ in ROSTER_LISTING)])
+    widths = [max(len(row[i]) for row in rows) for i in range(len(ROSTER_LISTING))]
+    for row in rows:
+        print('  '.join(value.ljust(width) for value, width in zip(row, widths)).rstrip())
+    return 0
+
+def cmd_prefetch_stats(args):
+    from rapsnba import current_season, prefetch_roster_stats
+
+    seasons = args.season or [current_season()]
+    if args.per_player:
+        summary = prefetch_roster_stats(rapsdb.get_all_players(), seasons,
+                                        max_workers=args.workers, rate=args.rate)
+        print(f"Stats fetched: {summary['fetched']}")
+        print(f"Already cached: {summary['cached']}")
+        failures = [f"{nba_player_id} {season}: {error}" for nba_player_id, season, error in summary['failed']]
+    else:
+        from rapsstats import refresh_season_stats
+
+        summary = refresh_season_stats(seasons)
+        print(f"Seasons fetched: {', '.join(summary['fetched']) or '-'}")
+        print(f"Seasons already stored: {', '.join(summary['cached']) or '-'}")
+        print(f"Players with stats: {summary['players']}")
+        failures = [f"{season}: {error}" for season, error in summary['failed']]
+
+    print(f"Failed: {len(failures)}")
+    print(f"Players not found: {len(summary['unresolved'])}")
+    print_client_stats()
+    for failure in failures:
+        print(f"  {failure}", file=sys.stderr)
+    for name in summary['unresolved']:
+        print(f"  not found: {name}", file=sys.stderr)
+    return 1 if failures else 0
+
+# Roster averages computed from stored game logs (see prefetch-stats)
+def cmd_stats(args):
+    import rapsstats
+    from rapsnba import current_season
+
+    season = args.season or current_season()
+    names = {player.nba_id: player.name for player in rapsdb.get_all_players() if player.nba_id is not None}
+    logs = rapsstats.load_game_logs(season, names)
+    if logs.empty:
+        print(f"No game logs stored for {season}, run prefetch-stats first", file=sys.stderr)
+        return 1
+
+    if args.split:
+        table = rapsstats.split_averages(logs, args.split)
+    elif args.last:
+        table = rapsstats.last_n_averages(logs, args.last)
+    else:
+        table = rapsstats.season_averages(logs)
+
+    table = table.rename(index=names, level='nba_player_id').rename_axis(index={'nba_player_id': 'player'})
+    table = table.sort_values('pts_per_game', ascending=False) if not args.split else table.sort_index()
+    print(table.to_csv() if args.csv else table.to_string())
+    return 0
+
+def cmd_sync_results(args):
+    from rapsnba import sync_team_results
+
+    changes = sync_team_results(args.team, args.season)
+    print(f"{changes['team']} {changes['season']}: requested games from {changes['date_from'] or 'season start'}, "
+          f"got {changes['fetched']}")
+    print(f"Results added: {len(changes['added'])}")
+    print(f"Results updated: {len(changes['updated'])}")
+    print(f"Unchanged: {changes['unchanged']}")
+    print_client_stats()
+    for label, games in (('added', changes['added']), ('updated', changes['updated'])):
+        for game in games:
+            separator = 'vs' if game.location == 'Home' else '@'
+            print(f"  {label}: {game.game_date} {separator} {game.opponent} {game.score}")
+    return 0
+
+# Undo or redo the last roster edit, import or command-line change
+def cmd_undo(args):
+    replay = rapsdb.undo_roster_change if args.command == 'undo' else rapsdb.redo_roster_change
+    player_ids = replay()
+    if player_ids is None:
+        print(f"Nothing to {args.command}")
+        return 1
+    print(f"Players changed: {len(player_ids)}")
+    undo, redo = rapsdb.get_undo_state()
+    print(f"Edits left to undo: {undo}, to redo: {redo}")
+    return 0
+
+def cmd_serve(args):
+    from rapsserver import serve
+
+    serve(args.host, args.port, args.workers, args.db)
+    return 0
+
+# Record the NBA responses the app uses into a snapshot file
+def cmd_nba_snapshot(args):
+    from rapsbackend import build_snapshot
+    from rapsnba import current_season, resolve_nba_player_id
+
+    nba_player_ids = [nba_player_id for nba_player_id in
+                      (resolve_nba_player_id(player.name, player.id) for player in rapsdb.get_all_players())
+                      if nba_player_id is not None]
+    summary = build_snapshot(args.file, args.season or [current_season()], nba_player_ids, args.team)
+    print(f"Responses recorded: {summary['responses']}")
+    print(f"Failed: {len(summary['failed'])}")
+    for endpoint, key, error in summary['failed']:
+        print(f"  {endpoint} {key}: {error}", file=sys.stderr)
+    return 1 if summary['failed'] else 0
+
+def cmd_nba_standin(args):
+    from rapsstandin import serve
+
+    serve(args.snapshot, args.host, args.port)
+    return 0
+
+def cmd_gui(args):
+    import rapsapp
+
+    rapsapp.main()
+    return 0
+
+# Timings collected with RAPTORS_METRICS=1, slowest total first
+def print_metrics():
+    print(f"{'operation':<40} {'calls':>7} {'total ms':>10} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>9}",
+          file=sys.stderr)
+    for metric in rapsmetrics.get_metrics():
+        print(f"{metric['name']:<40} {metric['count']:>7} {metric['total_ms']:>10.1f} {metric['p50_ms']:>8} "
+              f"{metric['p95_ms']:>8} {metric['max_ms']:>9.1f}", file=sys.stderr)
+
+def build_parser():
+    from rapsnba import PREFETCH_WORKERS, PREFETCH_RATE
+
+    parser = argparse.ArgumentParser(prog='raptors', description="Raptors roster and schedule tools")
+    parser.add_argument('--db', default=rapsdb.DB_PATH, help="database file (default: %(default)s)")
+    parser.add_argument('--nba', help="NBA data from 'live', a snapshot file or a stand-in URL "
+                                      "(default: $RAPTORS_NBA or live)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    command = commands.add_parser('import-schedule', help="add games from a .txt, .csv, .jsonl or .ics file")
+    command.add_argument('file')
+    command.add_argument('--format', choices=['txt', 'csv', 'jsonl', 'ics'], help="default: from the extension")
+    command.add_argument('--team', default=rapsdb.DEFAULT_TEAM, help="team for rows without one")
+    command.add_argument('--strict', action='store_true', help="exit with status 1 if any row was skipped")
+    command.set_defaults(func=cmd_import_schedule)
+
+    command = commands.add_parser('import-roster', help="add or update players from a .csv or .jsonl file")
+    command.add_argument('file')
+    command.add_argument('--format', choices=['csv', 'jsonl'], help="default: from the extension")
+    command.add_argument('--strict', action='store_true', help="exit with status 1 if any row was skipped")
+    command.set_defaults(func=cmd_import_roster)
+
+    command = commands.add_parser('export', help="write the roster or schedule to a file")
+    command.add_argument('table', choices=['roster', 'schedule'])
+    command.add_argument('file')
+    command.add_argument('--format', choices=['csv', 'jsonl', 'ics'], help="default: from the extension")
+    command.add_argument('--season', help="schedule only, e.g. 2024-25")
+    command.add_argument('--team', help="schedule only")
+    command.set_defaults(func=cmd_export)
+
+    command = commands.add_parser('list-roster', help="print the roster, filtered and sorted")
+    command.add_argument('--position')
+    command.add_argument('--min-age', type=int)
+    command.add_argument('--max-age', type=int)
+    command.add_argument('--min-salary', type=float, help="in dollars")
+    command.add_argument('--max-salary', type=float, help="in dollars")
+    command.add_argument('--name', help="name prefix")
+    command.add_argument('--search', help="words matched as prefixes of names and positions")
+    command.add_argument('--order-by', default='name', choices=list(rapsdb.PLAYER_SORT_COLUMNS))
+    command.add_argument('--desc', action='store_true')
+    command.add_argument('--limit', type=int)
+    command.add_argument('--offset', type=int)
+    command.add_argument('--season', help="season for the PPG/RPG/APG columns (default: current)")
+    command.add_argument('--json', action='store_true', help="one JSON object per line")
+    command.set_defaults(func=cmd_list_roster)
+
+    command = commands.add_parser('prefetch-stats', help="fetch season stats for every roster player")
+    command.add_argument('--season', action='append', help="repeatable (default: current season)")
+    command.add_argument('--workers', type=int, default=PREFETCH_WORKERS, help="threads (--per-player)")
+    command.add_argument('--rate', type=float, default=PREFETCH_RATE, help="requests per second (--per-player)")
+    command.add_argument('--per-player', action='store_true',
+                         help="one dashboard request per player instead of the league game logs")
+    command.set_defaults(func=cmd_prefetch_stats)
+
+    command = commands.add_parser('stats', help="roster averages from stored game logs")
+    command.add_argument('--season', help="default: current season")
+    command.add_argument('--last', type=int, metavar='N', help="only each player's last N games")
+    command.add_argument('--split', choices=['home', 'month'])
+    command.add_argument('--csv', action='store_true')
+    command.set_defaults(func=cmd_stats)
+
+    command = commands.add_parser('sync-results', help="pull final scores played since the last sync")
+    command.add_argument('--team', default=rapsdb.DEFAULT_TEAM)
+    command.add_argument('--season', help="default: current season")
+    command.set_defaults(func=cmd_sync_results)
+
+    command = commands.add_parser('undo', help="undo the last roster change")
+    command.set_defaults(func=cmd_undo)
+
+    command = commands.add_parser('redo', help="redo the last undone roster change")
+    command.set_defaults(func=cmd_undo)
+
+    command = commands.add_parser('serve', help="serve the roster, schedule and stats as JSON over HTTP")
+    command.add_argument('--host', default='127.0.0.1')
+    command.add_argument('--port', type=int, default=8000)
+    command.add_argument('--workers', type=int, default=8, help="database threads (and pooled connections)")
+    command.set_defaults(func=cmd_serve)
+
+    command = commands.add_parser('nba-snapshot', help="record NBA responses into a snapshot for offline use")
+    command.add_argument('file')
+    command.add_argument('--season', action='append', help="repeatable (default: current season)")
+    command.add_argument('--team', action='append', help="teams whose games to record (default: all)")
+    command.set_defaults(func=cmd_nba_snapshot)
+
+    command = commands.add_parser('nba-standin', help="serve a snapshot as a local stand-in for stats.nba.com")
+    command.add_argument('snapshot')
+    command.add_argument('--host', default='127.0.0.1')
+    command.add_argument('--port', type=int, default=8001)
+    command.set_defaults(func=cmd_nba_standin)
+
+    command = commands.add_parser('gui', help="open the desktop app")
+    command.set_defaults(func=cmd_gui)
+
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    rapsmetrics.configure_logging()
+    rapsdb.configure(args.db)
+    if args.nba:
+        import rapsbackend
+
+        rapsbackend.use(args.nba)
+
+    # The app migrates once its window is up, the server on startup
+    if args.command not in ('gui', 'serve', 'nba-standin'):
+        rapsdb.migrate()
+
+    try:
+        return args.func(args)
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        rapsdb.close_connections()
+        if rapsmetrics.ENABLED and not rapsmetrics.TRACE_PATH:
+            print_metrics()
+
+if __name__ == '__main__':
+    sys.exit(main())